@@ -0,0 +1,109 @@
+import gzip
+import os
+import threading
+import time
+import zlib
+
+SAVE_FILE = 'autosave.sav'
+# Seconds between autosaves, changes made in between are saved together
+AUTOSAVE_INTERVAL = 5.0
+
+
+def write_save(path: str, data: bytes) -> None:
+    """
+    Write the compressed snapshot to the file atomically: a temporary file
+    is synced to the disk and renamed, so a crash leaves the old save or the new one.
+    """
+    temp = f'{path}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(gzip.compress(data, 6))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+    # The rename itself is durable when the directory is synced
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def read_save(path: str = SAVE_FILE) -> bytes | None:
+    """Snapshot from the save file (None if there is no save or it is broken)."""
+    try:
+        with open(path, 'rb') as f:
+            return gzip.decompress(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, zlib.error) as e:
+        print(f'Save file is broken: {e}')
+        return None
+
+
+class AutoSave:
+    """
+    Saves the session in the background.
+
+    The UI thread only marks the session as changed. Once per interval it takes
+    the session snapshot (see GameSession.snapshot): the compact pickle is the cheapest
+    consistent copy of the game, a fraction of a millisecond, cheaper than copying the state.
+    Compression, writing and fsync are done by the worker thread.
+    Changes during the interval are saved with one write, and a snapshot taken
+    while the previous one is still being written replaces the waiting one.
+    """
+
+    def __init__(self, session, path: str = SAVE_FILE, interval: float = AUTOSAVE_INTERVAL) -> None:
+        """Start the worker thread saving the session to the file."""
+        self.session = session
+        self.path = path
+        self.interval = interval
+        self.dirty = False
+        self.saved_at = 0.0
+        # The latest snapshot waiting for the worker
+        self.pending = None
+        self.stopped = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self._thread.start()
+
+    def changed(self) -> None:
+        """Mark the session as changed, it is saved by the next tick after the interval."""
+        self.dirty = True
+
+    def tick(self) -> None:
+        """Take the snapshot of the changed session if the interval has passed (call it from the UI timer)."""
+        if self.dirty and time.monotonic() - self.saved_at >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        """Take the snapshot now and pass it to the worker."""
+        data = self.session.snapshot()
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        with self._condition:
+            self.pending = data
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """Helper: write snapshots until the autosave is closed."""
+        while True:
+            with self._condition:
+                while self.pending is None and not self.stopped:
+                    self._condition.wait()
+                data = self.pending
+                self.pending = None
+                if data is None:
+                    return
+            try:
+                write_save(self.path, data)
+            except OSError as e:
+                print(f'Autosave failed: {e}')
+
+    def close(self) -> None:
+        """Save unsaved changes and wait for the worker to write them."""
+        if self.dirty:
+            self.save()
+        with self._condition:
+            self.stopped = True
+            self._condition.notify()
+        self._thread.join()
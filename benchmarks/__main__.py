@@ -0,0 +1,71 @@
+import argparse
+import json
+import sys
+
+from benchmarks import bench_engine  # noqa: F401 (registers benchmarks)
+from benchmarks.harness import BENCHMARKS, compare, load_baseline, run, save_baseline, select
+
+BASELINE_FILE = 'benchmarks/baseline.json'
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Command line options of the benchmark run."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmarks of the Space Saga engine and user interface.',
+    )
+    parser.add_argument('--filter', help='run only benchmarks with this text in the name')
+    parser.add_argument('--no-ui', action='store_true', help='skip benchmarks which need Textual')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplier of the number of calls (e.g. 0.1 for a quick check)')
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_FILE, metavar='PATH',
+                        help=f'save results as the baseline (default: {BASELINE_FILE})')
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE, metavar='PATH',
+                        help=f'compare results with the baseline (default: {BASELINE_FILE})')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='slowdown treated as a regression (default: 0.1 is 10%%)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Run benchmarks, :return: exit code (1 if any benchmark regressed)."""
+    args = parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare)
+        except FileNotFoundError:
+            print(f'Baseline {args.compare} was not found.')
+            return 2
+        except json.JSONDecodeError as e:
+            print(f'Error in the baseline {args.compare}: {e}')
+            return 2
+
+    # Textual is imported only when UI benchmarks are needed
+    if not args.no_ui:
+        from benchmarks import bench_ui  # noqa: F401
+
+    benchmarks = select(BENCHMARKS, args.filter, ui=not args.no_ui)
+    if not benchmarks:
+        print('No benchmarks to run.')
+        return 2
+
+    results = run(benchmarks, args.scale)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f'\nBaseline saved to {args.save_baseline}')
+
+    if baseline is not None:
+        lines, regressions = compare(baseline, results, args.threshold)
+        print('\nComparison with the baseline:')
+        print('\n'.join(lines))
+        if regressions:
+            print(f'\nRegressed: {", ".join(regressions)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import random
+import time
+
+from benchmarks.harness import micro, register
+from bots import TRADE_LOOP, RandomBot, ScriptedBot, play
+from game_state import GameState
+from options import OPTION_IDS
+from session import GameSession
+from zobrist import full_hash
+
+# Random events follow the same course in every run
+SEED = 2024
+
+
+def new_session(location: str = 'Spaceport') -> GameSession:
+    """Fresh game in the location."""
+    random.seed(SEED)
+    session = GameSession(GameState(traffic_seed=SEED))
+    session.show_location(location)
+    return session
+
+
+@micro('engine.drive', number=20000)
+def bench_drive():
+    engine = new_session().engine
+    engine.state.truck.cargo['coal'] = 3
+    return lambda: engine.drive(46)
+
+
+@micro('engine.apply_effect', number=20000)
+def bench_apply_effect():
+    engine = new_session().engine
+    effects = {'distance': 46, 'time': 5, 'cash': -1, 'fatigue': -3}
+    return lambda: engine.apply_effect(effects)
+
+
+@micro('engine.apply_effect (hashed state)', number=20000)
+def bench_apply_effect_hashed():
+    engine = new_session().engine
+    engine.state.state_hash()
+    effects = {'distance': 46, 'time': 5, 'cash': -1, 'fatigue': -3}
+    return lambda: engine.apply_effect(effects)
+
+
+@micro('zobrist.full_hash (from scratch)', number=500)
+def bench_full_hash():
+    state = new_session().state
+    state.state_hash()
+    return lambda: full_hash(state)
+
+
+@micro('engine.select_option (compiled effects)', number=20000)
+def bench_select_option():
+    engine = new_session().engine
+    path = (OPTION_IDS.intern('go_dex'),)
+    return lambda: engine.select_option('Mining Settlement', path)
+
+
+@micro('engine.run_action by name', number=20000)
+def bench_run_action_by_name():
+    engine = new_session().engine
+    args = {'coal': 0}
+    return lambda: engine.run_action('buy_coal_1', args)
+
+
+@micro('engine.run_action by id', number=20000)
+def bench_run_action_by_id():
+    engine = new_session().engine
+    action = OPTION_IDS.intern('buy_coal_1')
+    args = {'coal': 0}
+    return lambda: engine.run_action(action, args)
+
+
+@micro('engine.run_action unknown', number=20000)
+def bench_run_action_unknown():
+    engine = new_session().engine
+    return lambda: engine.run_action('go_town', None)
+
+
+@micro('session._show_options town', number=5000)
+def bench_show_options_town():
+    session = new_session('Brackenbridge')
+    options = session.state.locations['Brackenbridge']['options']['go_town']['options']
+    return lambda: session._show_options(options)
+
+
+@micro('session._show_options farm', number=5000)
+def bench_show_options_farm():
+    session = new_session('Corn Farm')
+    options = session.state.locations['Corn Farm']['options']['approach_farm']['options']
+    return lambda: session._show_options(options)
+
+
+@micro('session._get_dynamic_description farm', number=20000)
+def bench_dynamic_description_farm():
+    session = new_session('Corn Farm')
+    return lambda: session._get_dynamic_description('buy_corn_5')
+
+
+@micro('session._get_dynamic_description bar', number=20000)
+def bench_dynamic_description_bar():
+    session = new_session('The Stingray Bar')
+    return lambda: session._get_dynamic_description('go_to_barman')
+
+
+def _measure_playthrough(make_bot, max_steps: int):
+    """Helper: measuring function of the whole game played by the bot (game loading is not timed)."""
+    def measure(repeat: int, number: int) -> list:
+        times = []
+        for _ in range(repeat):
+            elapsed = 0.0
+            for _ in range(number):
+                session = new_session()
+                bot = make_bot()
+                start = time.perf_counter()
+                play(session, bot, max_steps)
+                elapsed += time.perf_counter() - start
+            times.append(elapsed / number)
+        return times
+    return measure
+
+
+register('headless trade loop playthrough',
+         _measure_playthrough(lambda: ScriptedBot(TRADE_LOOP), 1000),
+         kind='macro', number=20, repeat=10)
+register('headless random bot, 300 options',
+         _measure_playthrough(lambda: RandomBot(SEED), 300),
+         kind='macro', number=10, repeat=10)
@@ -0,0 +1,90 @@
+import asyncio
+import random
+import time
+import timeit
+
+from textual.widgets import OptionList
+
+from benchmarks.bench_engine import SEED
+from benchmarks.harness import register
+from bots import TRADE_LOOP, ScriptedBot
+from game_state import GameState
+from gui import SpaceSaga
+
+SCREEN_SIZE = (160, 50)
+
+
+async def _time_in_app(prepare, repeat: int, number: int) -> list:
+    """
+    Helper: time the function returned by prepare(app) inside the running app.
+
+    Only the call itself is timed, Textual repaints the screen
+    between repeats, when the pilot waits for pending messages.
+    """
+    random.seed(SEED)
+    app = SpaceSaga(GameState(traffic_seed=SEED))
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        await pilot.pause()
+        fn = prepare(app)
+        times = []
+        for _ in range(repeat):
+            times.append(timeit.timeit(fn, number=number) / number)
+            await pilot.pause()
+        return times
+
+
+def _measure_in_app(prepare):
+    """Helper: measuring function of the call inside the running app."""
+    def measure(repeat: int, number: int) -> list:
+        return asyncio.run(_time_in_app(prepare, repeat, number))
+    return measure
+
+
+def _prepare_state_panel(app):
+    app.show_location('Mining Settlement')
+    app.state.truck.cargo['coal'] = 3
+    return app.sp.update_state_panel
+
+
+def _prepare_render_session(app):
+    app.show_location('Brackenbridge')
+    app.session.select('go_town')
+    return app._render_session
+
+
+async def _play_in_app(script) -> float:
+    """Helper: play the script in the running app, every option goes through the message queue."""
+    random.seed(SEED)
+    app = SpaceSaga(GameState(traffic_seed=SEED))
+    async with app.run_test(size=SCREEN_SIZE) as pilot:
+        await pilot.pause()
+        bot = ScriptedBot(script)
+        panel = app.command_panel
+        start = time.perf_counter()
+        for step in range(1000):
+            option_id = bot.choose(app.session)
+            if option_id is None:
+                break
+            index = next(i for i, option in enumerate(app.session.options) if option.id == option_id)
+            # Textual draws from the same random generator as the game,
+            # so every step starts from a known state
+            random.seed(SEED + step)
+            panel.post_message(OptionList.OptionSelected(panel, panel.get_option_at_index(index), index))
+            await pilot.pause()
+        return time.perf_counter() - start
+
+
+def _measure_playthrough(repeat: int, number: int) -> list:
+    times = []
+    for _ in range(repeat):
+        elapsed = sum(asyncio.run(_play_in_app(TRADE_LOOP)) for _ in range(number))
+        times.append(elapsed / number)
+    return times
+
+
+register('ui StatePanel.update_state_panel', _measure_in_app(_prepare_state_panel),
+         ui=True, number=2000, repeat=10)
+register('ui SpaceSaga._render_session town', _measure_in_app(_prepare_render_session),
+         ui=True, number=500, repeat=10)
+register('ui trade loop playthrough', _measure_playthrough,
+         kind='macro', ui=True, number=1, repeat=5)
@@ -0,0 +1,195 @@
+import json
+import math
+import platform
+import statistics
+import sys
+import timeit
+from typing import NamedTuple
+
+# Registered benchmarks in the order of registration
+BENCHMARKS = []
+
+# Two-sided 95% Student's t quantiles by degrees of freedom
+_T_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+    10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042,
+}
+
+
+class Benchmark(NamedTuple):
+    """
+    Registered benchmark.
+
+    - measure: function (repeat, number) -> seconds per call for every repeat;
+    - kind: 'micro' or 'macro';
+    - ui: the benchmark needs Textual.
+    """
+    name: str
+    measure: object
+    kind: str
+    ui: bool
+    number: int
+    repeat: int
+
+
+class Stats(NamedTuple):
+    """Statistics of one benchmark in seconds per call."""
+    name: str
+    mean: float
+    median: float
+    stdev: float
+    min: float
+    ci: float
+    repeat: int
+    number: int
+
+    @classmethod
+    def from_times(cls, name: str, times: list, number: int) -> 'Stats':
+        """Statistics of per-call times of every repeat (ci is the half-width of 95% interval of the mean)."""
+        n = len(times)
+        mean = statistics.fmean(times)
+        stdev = statistics.stdev(times) if n > 1 else 0.0
+        ci = _t_95(n - 1) * stdev / math.sqrt(n) if n > 1 else 0.0
+        return cls(name, mean, statistics.median(times), stdev, min(times), ci, n, number)
+
+
+def _t_95(df: int) -> float:
+    """Helper: t quantile for the degrees of freedom (the nearest smaller known one)."""
+    if df > 30:
+        return 1.96
+    return _T_95[max(known for known in _T_95 if known <= df)]
+
+
+def register(name: str, measure, kind: str = 'micro', ui: bool = False,
+             number: int = 1000, repeat: int = 15) -> None:
+    """Register the benchmark with a measuring function."""
+    BENCHMARKS.append(Benchmark(name, measure, kind, ui, number, repeat))
+
+
+def micro(name: str, number: int = 1000, repeat: int = 15, ui: bool = False):
+    """
+    Decorator of a setup function, which prepares the game and returns the function to time.
+
+    Setup runs once per repeat, so changes made by timed calls do not pile up.
+    """
+    def decorator(setup):
+        def measure(repeat: int, number: int) -> list:
+            times = []
+            for _ in range(repeat):
+                fn = setup()
+                times.append(timeit.timeit(fn, number=number) / number)
+            return times
+
+        register(name, measure, 'micro', ui, number, repeat)
+        return setup
+    return decorator
+
+
+def select(benchmarks: list, pattern: str | None = None, ui: bool = True) -> list:
+    """Benchmarks with the pattern in the name (UI ones can be skipped)."""
+    return [
+        bench for bench in benchmarks
+        if (pattern is None or pattern in bench.name) and (ui or not bench.ui)
+    ]
+
+
+def run(benchmarks: list, scale: float = 1.0, report=print) -> list:
+    """
+    Run benchmarks and report every result as soon as it is ready.
+
+    :param scale: multiplier of the number of calls (e.g. 0.1 for a quick check).
+    :return: list of Stats.
+    """
+    results = []
+    for bench in benchmarks:
+        number = max(1, round(bench.number * scale))
+        stats = Stats.from_times(bench.name, bench.measure(bench.repeat, number), number)
+        results.append(stats)
+        report(format_stats(stats))
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    """Helper: time with a readable unit."""
+    for unit, factor in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds >= 1 / factor:
+            return f'{seconds * factor:.3f} {unit}'
+    return f'{seconds * 1e9:.1f} ns'
+
+
+def format_stats(stats: Stats) -> str:
+    """One line report of the benchmark."""
+    return (
+        f'{stats.name:<40} median {_format_time(stats.median):>11}  '
+        f'mean {_format_time(stats.mean):>11} ± {_format_time(stats.ci):>11}  '
+        f'min {_format_time(stats.min):>11}  '
+        f'stdev {_format_time(stats.stdev):>11}  ({stats.repeat} x {stats.number})'
+    )
+
+
+def environment() -> dict:
+    """Python and machine the results were measured on."""
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def save_baseline(path: str, results: list) -> None:
+    """Save results as the baseline for later comparison."""
+    data = {
+        'environment': environment(),
+        'results': {stats.name: stats._asdict() for stats in results},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_baseline(path: str) -> dict:
+    """
+    Read the baseline saved by save_baseline.
+
+    :raise FileNotFoundError: if the file does not exist.
+    :raise json.JSONDecodeError: if the file is broken.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, results: list, threshold: float = 0.1) -> tuple[list, list]:
+    """
+    Compare results with the baseline by medians.
+
+    A benchmark regressed if it became slower by more than the threshold
+    (0.1 is 10%) and the difference is bigger than both confidence intervals.
+
+    :return: report lines and names of regressed benchmarks.
+    """
+    lines = []
+    regressions = []
+    saved = baseline.get('results', {})
+    for stats in results:
+        old = saved.get(stats.name)
+        if not old:
+            lines.append(f'{stats.name:<40} new')
+            continue
+        ratio = stats.median / old['median']
+        noise = stats.ci + old['ci']
+        if ratio > 1 + threshold and stats.median - old['median'] > noise:
+            verdict = 'SLOWER'
+            regressions.append(stats.name)
+        elif ratio < 1 - threshold and old['median'] - stats.median > noise:
+            verdict = 'faster'
+        else:
+            verdict = 'same'
+        lines.append(
+            f'{stats.name:<40} {_format_time(old["median"]):>11} -> {_format_time(stats.median):>11}'
+            f'  x{ratio:.2f}  {verdict}'
+        )
+
+    if baseline.get('environment') != environment():
+        lines.append('Warning: the baseline was measured in another environment '
+                     f'({baseline.get("environment")})')
+    return lines, regressions
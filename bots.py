@@ -0,0 +1,192 @@
+import random
+from typing import NamedTuple
+
+from options import OPTION_IDS
+
+# Options which get the hero through road encounters and police stops
+# without spending money on them
+PASS_BY_OPTIONS = ('keep_going', 'wait_policeman', 'pay_fine', 'go_to_impound', 'leave_impound')
+
+
+# Weights of option kinds for MixBot: players mostly talk and look around,
+# drive now and then and trade least of all
+DEFAULT_MIX = {'talk': 5, 'back': 3, 'travel': 2, 'trade': 1}
+
+
+class Travel(NamedTuple):
+    """Step of the script: drive to the location by the shortest route."""
+    destination: str
+
+
+class Bot:
+    """Player without a keyboard: selects options of a GameSession."""
+
+    def choose(self, session) -> str | None:
+        """Option id to select next (None to stop playing)."""
+        raise NotImplementedError
+
+
+class RandomBot(Bot):
+    """Selects a random available option."""
+
+    def __init__(self, seed: int | None = None) -> None:
+        """Initialize the bot with its own random generator."""
+        self.rng = random.Random(seed)
+
+    def choose(self, session) -> str | None:
+        enabled = [option.id for option in session.options if not option.disabled]
+        if not enabled:
+            return None
+        return self.rng.choice(enabled)
+
+
+def option_kinds(locations: dict) -> dict:
+    """
+    Kinds of options in the locations: travel (goto), trade (buying, selling, fuel),
+    back (return to the previous dialogue level) or talk (everything else).
+
+    :return: option name -> kind.
+    """
+    kinds = {}
+
+    def walk(options: dict) -> None:
+        for name, option in options.items():
+            if option.get('goto'):
+                kind = 'travel'
+            elif name.startswith(('buy_', 'sell_')) or 'fill_up' in name:
+                kind = 'trade'
+            elif OPTION_IDS.info(name).is_back:
+                kind = 'back'
+            else:
+                kind = 'talk'
+            kinds.setdefault(name, kind)
+            if option.get('options'):
+                walk(option['options'])
+
+    for location in locations.values():
+        walk(location.get('options') or {})
+    return kinds
+
+
+class MixBot(Bot):
+    """
+    Selects a random available option with the weight of its kind (see option_kinds),
+    so bots play with a mix of actions close to the players' one.
+
+    Only the shown options are used, so the bot plays remote sessions as well.
+    """
+
+    def __init__(self, kinds: dict, mix: dict = DEFAULT_MIX, seed: int | None = None) -> None:
+        """Initialize the bot with option kinds, weights of kinds and its own random generator."""
+        self.kinds = kinds
+        self.mix = mix
+        self.rng = random.Random(seed)
+
+    def choose(self, session) -> str | None:
+        enabled = [option.id for option in session.options if not option.disabled]
+        if not enabled:
+            return None
+        weights = [self.mix.get(self.kinds.get(option_id, 'talk'), 1) for option_id in enabled]
+        return self.rng.choices(enabled, weights)[0]
+
+
+class ScriptedBot(Bot):
+    """
+    Plays the script: a list of option ids and Travel steps.
+
+    Scripted options which are not available at the moment are skipped.
+    Road encounters, police stops and ride requests are passed by
+    without changing the script.
+    """
+
+    def __init__(self, script) -> None:
+        """Initialize the bot with the script."""
+        self.script = list(script)
+        self.position = 0
+
+    @staticmethod
+    def _interruption(session, enabled: list) -> str | None:
+        """Helper: option to get through a random event (None if there is no event)."""
+        for option_id in enabled:
+            name = OPTION_IDS.info(option_id).name
+            if name.startswith('refuse_') or name.endswith('_delivered'):
+                return option_id
+        if not session.state.world.current_location.startswith('Road - '):
+            return None
+        for option_id in PASS_BY_OPTIONS:
+            if option_id in enabled:
+                return option_id
+        return enabled[0] if enabled else None
+
+    def _travel(self, session, destination: str, enabled: list) -> str | None:
+        """Helper: option of the next road to the destination (None if the hero has arrived)."""
+        current = session.state.world.current_location
+        if current == destination:
+            return None
+        # Roads are on the first dialogue level
+        if session.options_stack:
+            for option_id in enabled:
+                if OPTION_IDS.info(option_id).is_back:
+                    return option_id
+            return None
+        route = session.engine.route(current, destination)
+        if route is None or len(route.locations) < 2:
+            return None
+        options = session.state.locations[current]['options']
+        for option_id in enabled:
+            if options.get(option_id, {}).get('goto') == route.locations[1]:
+                return option_id
+        return None
+
+    def choose(self, session) -> str | None:
+        enabled = [option.id for option in session.options if not option.disabled]
+        interruption = self._interruption(session, enabled)
+        if interruption:
+            return interruption
+
+        while self.position < len(self.script):
+            step = self.script[self.position]
+            if isinstance(step, Travel):
+                option_id = self._travel(session, step.destination, enabled)
+                if option_id:
+                    return option_id
+            elif step in enabled:
+                self.position += 1
+                return step
+            self.position += 1
+        return None
+
+
+# Spaceport, a few coins in the mine, coal to the town, corn to the mines
+# and back to the spaceport to leave the planet
+TRADE_LOOP = (
+    Travel('Mining Settlement'),
+    'go_mines', 'enter_mine', 'work_in_mine', 'back', 'work_in_mine', 'back', 'back',
+    'go_to_trading_house', 'buy_coal_3', 'back', 'back_to_road',
+    Travel('Dex\'s Fuel Station'),
+    'go_dex', 'dex_fill_up_5', 'back',
+    Travel('Brackenbridge'),
+    'go_town', 'go_to_factory', 'sell_all_coal', 'back', 'back_to_road',
+    Travel('Corn Farm'),
+    'approach_farm', 'buy_corn_1', 'back',
+    Travel('Mining Settlement'),
+    'go_mines', 'go_to_trading_house', 'sell_all_corn', 'back', 'back_to_road',
+    Travel('Spaceport'),
+    'go_spaceport', 'leave_planet',
+)
+
+
+def play(session, bot: Bot, max_steps: int = 1000) -> int:
+    """
+    Let the bot play the session.
+
+    :return: number of selected options.
+    """
+    steps = 0
+    while steps < max_steps:
+        option_id = bot.choose(session)
+        if option_id is None:
+            break
+        session.select(option_id)
+        steps += 1
+    return steps
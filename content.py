@@ -0,0 +1,166 @@
+import copy
+import json
+import os
+
+from effects import ContentError
+
+LOCATIONS_FILE = 'location_actions.json'
+
+# Content files read once per process: (path, reader) -> (file signature, content)
+_shared = {}
+
+
+def read_locations(path: str = LOCATIONS_FILE) -> dict:
+    """
+    Read locations from the json file.
+
+    :raise FileNotFoundError: if the file does not exist.
+    :raise json.JSONDecodeError: if the file is broken.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_locations(path: str = LOCATIONS_FILE) -> dict:
+    """Read locations from the json file (empty dict if the file is missing or broken)."""
+    try:
+        return read_locations(path)
+    except FileNotFoundError:
+        print('File with locations was not found.')
+    except json.JSONDecodeError as e:
+        print(f'Error in the file with locations: {e}')
+    return {}
+
+
+def file_signature(path: str) -> tuple | None:
+    """Modification time and size of the file (None if it can't be read)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_shared(path: str, reader):
+    """
+    Content of the file made by the reader (e.g. load_locations), read once per process.
+
+    All sessions of the process get the same objects, so they must not change them.
+    The file is read again when it changes.
+    """
+    signature = file_signature(path)
+    cached = _shared.get((path, reader))
+    if cached is None or cached[0] != signature:
+        cached = (signature, reader(path))
+        _shared[path, reader] = cached
+    return cached[1]
+
+
+def diff_locations(old: dict, new: dict) -> tuple[set, set]:
+    """
+    Compare two versions of the locations.
+
+    :return: names of changed (or added) locations and names of removed locations.
+    """
+    changed = {name for name, location in new.items() if old.get(name) != location}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+def valid_options_path(location: dict | None, options_stack: list) -> list:
+    """
+    Helper: the longest prefix of options_stack which still exists in the location.
+
+    Is used to keep the player on the same dialogue level after the content was changed.
+    """
+    if not location:
+        return []
+    options = location.get('options') or {}
+    path = []
+    for el in options_stack:
+        parent = options.get(el)
+        if not parent or 'options' not in parent:
+            break
+        path.append(el)
+        options = parent['options']
+    return path
+
+
+class ContentReloader:
+    """
+    Keeps game locations in sync with location_actions.json.
+
+    The file content as it was read is kept separately from the live locations,
+    because the engine replaces live locations during the game (e.g. descriptions).
+    Only locations changed in the file are replaced, so the engine changes
+    in other locations survive reloading.
+
+    The content is read once per process and shared by sessions (see read_shared),
+    locations are never changed in place, changed ones are replaced with copies.
+
+    The compiler is called with changed locations (name -> location) and
+    names of removed locations before they get into the game state.
+    """
+
+    def __init__(self, state, path: str = LOCATIONS_FILE, compiler=None) -> None:
+        """Initialize reloader for the game state, the locations file and the compiler."""
+        self.state = state
+        self.path = path
+        self.compiler = compiler
+        self._source = {}
+        self._signature = None
+
+    def load(self) -> None:
+        """
+        Load all locations into the game state.
+
+        :raise ContentError: if the compiler found a mistake in the locations.
+        """
+        self._signature = file_signature(self.path)
+        self._source = read_shared(self.path, load_locations)
+        locations = dict(self._source)
+        if self.compiler:
+            self.compiler(locations)
+        self.state.locations = locations
+
+    def has_changed(self) -> bool:
+        """Checks if the locations file was modified since the last load."""
+        return file_signature(self.path) != self._signature
+
+    def reload(self) -> set:
+        """
+        Swap changed locations into the game state.
+
+        With a broken file or a mistake in locations the game keeps the previous content,
+        the file is read again after the next change.
+
+        :return: names of changed and removed locations.
+        :raise ContentError: if the file can't be read or the compiler found a mistake.
+        """
+        self._signature = file_signature(self.path)
+        try:
+            source = read_locations(self.path)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ContentError(f'Locations were not reloaded: {e}') from e
+
+        changed, removed = diff_locations(self._source, source)
+        if not changed and not removed:
+            return set()
+
+        changed_locations = {name: copy.deepcopy(source[name]) for name in changed}
+        if self.compiler:
+            try:
+                self.compiler(changed_locations, removed)
+            except ContentError as e:
+                raise ContentError(f'Locations were not reloaded: {e}') from e
+
+        locations = dict(self.state.locations)
+        locations.update(changed_locations)
+        for name in removed:
+            locations.pop(name, None)
+
+        # The whole dictionary is replaced at once,
+        # so the game never sees half-applied changes
+        self.state.locations = locations
+        self._source = source
+        return changed | removed
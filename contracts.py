@@ -0,0 +1,91 @@
+import json
+from typing import NamedTuple
+
+CONTRACTS_FILE = 'delivery_contracts.json'
+
+
+class Contract(NamedTuple):
+    """
+    Delivery of a passenger or cargo from one location to another.
+
+    Contracts are declared in delivery_contracts.json:
+    - who: passenger or cargo name shown in the state panel;
+    - origin: location where the contract is taken;
+    - destination: location where the contract is completed;
+    - offer: random offer when leaving the origin
+      (option id, chance, text), None if the contract is taken by a location option;
+    - delivery_text: quest text on arrival;
+    - reward: cash, ammo and shotgun given on arrival;
+    - load: tons of truck space taken by cargo (0 for passengers, who take the seat);
+    - hide_options: options hidden after the contract is taken.
+    """
+    id: str
+    who: str
+    origin: str
+    destination: str
+    offer: dict | None
+    delivery_text: str
+    reward: dict
+    load: int
+    hide_options: tuple
+
+    @property
+    def is_passenger(self) -> bool:
+        """Passengers take the seat in the cabin, cargo takes truck space."""
+        return self.load == 0
+
+
+class ContractBook:
+    """
+    All delivery contracts of the game.
+
+    Random offers are indexed by (location, option id),
+    so the check when the hero leaves a location is a single lookup.
+    """
+
+    def __init__(self, contracts: dict | None = None) -> None:
+        """Initialize the book with contracts (contract id -> Contract)."""
+        self.contracts = contracts or {}
+        self.offers = {}
+        for contract in self.contracts.values():
+            if contract.offer:
+                key = (contract.origin, contract.offer['option'])
+                self.offers.setdefault(key, []).append(contract)
+
+    def get(self, contract_id: str) -> Contract | None:
+        """Contract by its id."""
+        return self.contracts.get(contract_id)
+
+    def offers_for(self, location: str, option_id: str) -> list:
+        """Contracts which can be offered after the option is selected in the location."""
+        return self.offers.get((location, option_id), [])
+
+
+def parse_contracts(data: dict) -> ContractBook:
+    """Build contracts from the json data."""
+    contracts = {}
+    for contract_id, item in data.items():
+        contracts[contract_id] = Contract(
+            id=contract_id,
+            who=item.get('who', contract_id),
+            origin=item['origin'],
+            destination=item['destination'],
+            offer=item.get('offer'),
+            delivery_text=item.get('delivery_text', ''),
+            reward=item.get('reward', {}),
+            load=item.get('load', 0),
+            hide_options=tuple(item.get('hide_options', ())),
+        )
+    return ContractBook(contracts)
+
+
+def load_contracts(path: str = CONTRACTS_FILE) -> ContractBook:
+    """Read contracts from the json file (empty book if the file is missing or broken)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_contracts(json.load(f))
+    except FileNotFoundError:
+        print('File with delivery contracts was not found.')
+    except (json.JSONDecodeError, KeyError) as e:
+        print(f'Error in the file with delivery contracts: {e}')
+    return ContractBook()
@@ -0,0 +1,150 @@
+from options import LOCATION_IDS, OPTION_IDS
+
+# Keys of the option in location_actions.json
+OPTION_KEYS = ('text', 'description', 'goto', 'effects', 'options')
+
+# Effects applied to the game state, in the order of applying
+STATE_EFFECTS = ('distance', 'time', 'cash', 'health', 'fatigue', 'hanger', 'fuel')
+
+# Effects which are arguments of option actions
+ACTION_ARGS = ('corn', 'coal', 'scrap', 'load_change', 'speed_change', 'fuel_consumption_change')
+
+
+# Compiled locations shared by all engines of the process:
+# (location name, id of the location) -> (location, programs), the location is kept so its id stays unique
+_compiled = {}
+
+
+class ContentError(ValueError):
+    """Mistake in location_actions.json."""
+
+
+def _compile_step(key: str, value: int):
+    """Helper: function applying one effect to the game state of the engine."""
+    if key == 'distance':
+        def step(engine):
+            engine.drive(value)
+    elif key == 'time':
+        def step(engine):
+            engine.state.world.current_time += value
+    elif key == 'cash':
+        def step(engine):
+            engine.state.hero.cash += value
+    # Hero health, fatigue and hanger max level is 100
+    elif key == 'health':
+        def step(engine):
+            hero = engine.state.hero
+            hero.health = min(hero.health + value, 100)
+    elif key == 'fatigue':
+        def step(engine):
+            hero = engine.state.hero
+            hero.fatigue = min(hero.fatigue + value, 100)
+    elif key == 'hanger':
+        def step(engine):
+            hero = engine.state.hero
+            hero.hanger = min(hero.hanger + value, 100)
+    else:
+        def step(engine):
+            truck = engine.state.truck
+            truck.fuel = min(truck.fuel + value, 100)
+    return step
+
+
+def check_option(path: tuple, option: dict) -> None:
+    """
+    Checks option keys and effects.
+
+    :raise ContentError: with the path to the wrong option.
+    """
+    where = ' > '.join(path)
+    for key in option:
+        if key not in OPTION_KEYS:
+            raise ContentError(f'{where}: unknown option key "{key}"')
+
+    effects = option.get('effects')
+    if effects is None:
+        return
+    if not isinstance(effects, dict):
+        raise ContentError(f'{where}: effects must be an object')
+    for key, value in effects.items():
+        if key not in STATE_EFFECTS and key not in ACTION_ARGS:
+            raise ContentError(f'{where}: unknown effect "{key}"')
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ContentError(f'{where}: effect "{key}" must be a number')
+
+
+def check_location(name: str, location: dict) -> None:
+    """
+    Checks all options of the location, including nested ones.
+
+    :raise ContentError: with the path to the first wrong option.
+    """
+    def walk(options: dict, path: tuple) -> None:
+        for option_id, option in options.items():
+            check_option(path + (option_id,), option)
+            if option.get('options'):
+                walk(option['options'], path + (option_id,))
+
+    walk(location.get('options') or {}, (name,))
+
+
+def compile_option(path: tuple, option: dict):
+    """
+    Compile the checked option (see check_location) into a program: a function of the engine.
+
+    The program does the same as Engine.apply_effect followed by Engine.run_action,
+    but all checks are done once, when locations are loaded.
+    Programs don't keep the engine, so engines of all sessions share them.
+    """
+    option_id = OPTION_IDS.intern(path[-1])
+    effects = option.get('effects')
+
+    if effects:
+        steps = tuple(_compile_step(key, effects[key]) for key in STATE_EFFECTS if key in effects)
+    else:
+        # Any action without effects takes a minute
+        steps = (_compile_step('time', 1),)
+
+    args = effects or {}
+
+    def program(engine):
+        for step in steps:
+            step(engine)
+        action = engine.actions.get(option_id)
+        if action is not None:
+            action(args)
+    return program
+
+
+def compile_location(name: str, location: dict) -> dict:
+    """
+    Compile all options of the location, including nested ones.
+    Option ids and the location name are interned and option targets are registered
+    only after all options are checked.
+
+    Locations are not changed during the game (see Engine.get_new_truck),
+    so a location is compiled once and its programs are shared.
+
+    :return: path of the option inside the location
+             (options_stack + interned option id) -> program.
+    :raise ContentError: with the path to the wrong option.
+    """
+    cached = _compiled.get((name, id(location)))
+    if cached is not None and cached[0] is location:
+        return cached[1]
+    check_location(name, location)
+    LOCATION_IDS.intern(name)
+    programs = {}
+
+    def walk(options: dict, stack: tuple) -> None:
+        for option_id, option in options.items():
+            path = stack + (option_id,)
+            programs[stack + (OPTION_IDS.intern(option_id),)] = compile_option((name,) + path, option)
+            if 'goto' in option:
+                OPTION_IDS.add_target(option_id, option['goto'])
+            if option.get('options'):
+                walk(option['options'], path)
+
+    walk(location.get('options') or {}, ())
+    _compiled[name, id(location)] = (location, programs)
+    return programs
@@ -0,0 +1,166 @@
+import json
+import random
+
+ENCOUNTERS_FILE = 'encounters.json'
+
+
+class AliasTable:
+    """
+    Weighted random choice in constant time (Vose's alias method).
+
+    The table is built once for a list of outcomes and weights,
+    after that every sample costs one index and one coin flip.
+    """
+
+    def __init__(self, outcomes: list, weights: list) -> None:
+        """Build probability and alias columns for the outcomes."""
+        self.outcomes = list(outcomes)
+        n = len(self.outcomes)
+        total = sum(weights)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        if not n or total <= 0:
+            self.outcomes = []
+            return
+
+        scaled = [weight * n / total for weight in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+        # Leftovers differ from 1 only by rounding errors
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=random):
+        """Randomly select one outcome according to its weight (None for an empty table)."""
+        if not self.outcomes:
+            return None
+        i = int(rng.random() * len(self.outcomes))
+        if rng.random() < self.prob[i]:
+            return self.outcomes[i]
+        return self.outcomes[self.alias[i]]
+
+
+class EncounterTable:
+    """
+    Random events of one kind (road encounters, police stops, city events...).
+
+    Every event is a dict from encounters.json with:
+    - id: event id (location or option name);
+    - weight: relative weight among events available at the same time and place;
+    - hours: optional [start, end) range of hours when the event is possible
+      (ranges crossing midnight are supported, e.g. [23, 5]);
+    - locations: optional list of locations where the event is possible;
+    - any additional event data (text, fine, effects...).
+
+    Table chance is the probability that anything happens at all.
+    Events are compiled into alias tables for every location and hour,
+    so sampling does not depend on the number of events.
+    """
+
+    def __init__(self, name: str, events: list, chance: float = 1.0) -> None:
+        """Initialize the table and compile alias tables."""
+        self.name = name
+        self.events = events
+        self.chance = chance
+        self._tables = {}
+        self._default = []
+        self.compile()
+
+    @staticmethod
+    def _is_hour_in_range(hour: int, hours: list | None) -> bool:
+        """Helper: checks if the hour is in the [start, end) range."""
+        if not hours:
+            return True
+        start, end = hours
+        if start <= end:
+            return start <= hour < end
+        # Range crosses midnight
+        return hour >= start or hour < end
+
+    def _weigh(self, location: str | None, hour: int) -> tuple[list, list]:
+        """Helper: events possible in the location at the hour and their weights (None is nothing happens)."""
+        outcomes = []
+        weights = []
+        for event in self.events:
+            if 'locations' in event and location not in event['locations']:
+                continue
+            if not self._is_hour_in_range(hour, event.get('hours')):
+                continue
+            outcomes.append(event)
+            weights.append(self.chance * event.get('weight', 1))
+
+        # Nothing happens with the rest of probability
+        total = sum(weights)
+        if total and self.chance < 1:
+            outcomes.append(None)
+            weights.append(total * (1 - self.chance) / self.chance)
+        return outcomes, weights
+
+    def _build(self, location: str | None, hour: int) -> AliasTable:
+        """Helper: alias table with events possible in the location at the hour."""
+        return AliasTable(*self._weigh(location, hour))
+
+    def compile(self) -> None:
+        """Precompute alias tables for every hour and every location mentioned in events."""
+        locations = {location for event in self.events for location in event.get('locations', ())}
+        self._default = [self._build(None, hour) for hour in range(24)]
+        self._tables = {
+            (location, hour): self._build(location, hour)
+            for location in locations
+            for hour in range(24)
+        }
+
+    def sample(self, location: str | None, hour: int) -> dict | None:
+        """
+        Randomly select the event for the location and the hour of the day.
+
+        :return: event data or None if nothing happens.
+        """
+        table = self._tables.get((location, hour))
+        if table is None:
+            table = self._default[hour]
+        return table.sample()
+
+    def probabilities(self, location: str | None, hour: int) -> list:
+        """
+        Exact chances of events in the location at the hour.
+
+        :return: list of (event, probability), event is None when nothing happens.
+        """
+        if (location, hour) not in self._tables:
+            location = None
+        outcomes, weights = self._weigh(location, hour)
+        total = sum(weights)
+        if not total:
+            return [(None, 1.0)]
+        return [(event, weight / total) for event, weight in zip(outcomes, weights)]
+
+
+def parse_encounters(data: dict) -> dict:
+    """Build encounter tables from the json data (table name -> EncounterTable)."""
+    return {
+        name: EncounterTable(name, item.get('events', []), item.get('chance', 1.0))
+        for name, item in data.items()
+    }
+
+
+def load_encounters(path: str = ENCOUNTERS_FILE) -> dict:
+    """Read encounter tables from the json file (no tables if the file is missing or broken)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_encounters(json.load(f))
+    except FileNotFoundError:
+        print('File with encounters was not found.')
+    except json.JSONDecodeError as e:
+        print(f'Error in the file with encounters: {e}')
+    return {}
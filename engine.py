@@ -1,7 +1,14 @@
 import random
 from datetime import datetime
 
+from content import read_shared
+from contracts import CONTRACTS_FILE, Contract, load_contracts
+from effects import check_location, compile_location
+from encounters import ENCOUNTERS_FILE, load_encounters
 from game_state import GameState
+from options import OPTION_IDS
+from trade import CargoPlan, plan_cargo
+from traffic import Route, Traffic, road_graph, road_route, road_vehicles
 
 
 class Engine:
@@ -17,6 +24,16 @@ class Engine:
     def __init__(self, state: GameState):
         """Initialize game engine with game state values."""
         self.state = state
+        # Contracts and encounter tables are read once per process and shared by engines
+        self.contracts = read_shared(CONTRACTS_FILE, load_contracts)
+        self.encounters = read_shared(ENCOUNTERS_FILE, load_encounters)
+        # Roads between locations, shortest routes found on them and NPC vehicles on them,
+        # made on the first use (see roads, route, road_traffic)
+        self.road_map = None
+        self.routes = {}
+        self.traffic = None
+        # Compiled options: location name -> option path -> program
+        self.programs = {}
 
         # Allowed function list to call from location_actions.json
         self.allowed_functions = {
@@ -26,7 +43,6 @@ class Engine:
             'buy_corn_3': self.buy_corn,
             'buy_corn_5': self.buy_corn,
             'buy_corn_10': self.buy_corn,
-            'take_drox': self.take_drox,
             'treat_everyone': self.treat_everyone,
             'hit_stomach': self.hit_stomach,
             'sleep_in_bar': self.sleep_in_bar,
@@ -64,16 +80,6 @@ class Engine:
             'dex_fill_up_5': self.dex_fill_up,
             'dex_fill_up_15': self.dex_fill_up,
             'buy_porridge': self.buy_porridge,
-            'take_policeman': self.take_policeman,
-            'delivered_policeman': self.policeman_delivered,
-            'take_passenger_from_mine_to_city': self.take_passenger_from_mine_to_city,
-            'passenger_from_mine_to_city_delivered': self.passenger_from_mine_to_city_delivered,
-            'take_passenger_from_city_to_mine': self.take_passenger_from_city_to_mine,
-            'passenger_from_city_to_mine_delivered': self.passenger_from_city_to_mine_delivered,
-            'take_passenger_from_bar_to_city': self.take_passenger_from_bar_to_city,
-            'passenger_from_bar_to_city_delivered': self.passenger_from_bar_to_city_delivered,
-            'take_passenger_from_mine_to_bar': self.take_passenger_from_mine_to_bar,
-            'passenger_from_mine_to_bar_delivered': self.passenger_from_mine_to_bar_delivered,
             'back_after_buy_shell': self.back_after_buy_shell,
             'back_after_buy_fuel': self.back_after_buy_fuel,
             'back_after_sell_fuel': self.back_after_sell_fuel,
@@ -81,14 +87,66 @@ class Engine:
             'go_to_impound': self.go_to_impound,
         }
 
-    def run_action(self, action_name: str, args: dict | None) -> None:
-        """Move the action with the name from the allow list."""
-        if not action_name:
+        # Delivery contracts are taken with 'take_<contract id>' options
+        for contract_id in self.contracts.contracts:
+            self.allowed_functions[f'take_{contract_id}'] = self._contract_taker(contract_id)
+
+        # The same actions by interned option ids
+        self.actions = {OPTION_IDS.intern(name): fn for name, fn in self.allowed_functions.items()}
+
+    def compile_locations(self, locations: dict, removed=()) -> None:
+        """
+        Compile options of the locations (location name -> location).
+
+        Nothing is changed if any option has a mistake.
+
+        :raise ContentError: if an option has unknown keys or wrong effects.
+        """
+        # All locations are checked before anything is compiled or interned
+        for name, location in locations.items():
+            check_location(name, location)
+        programs = {name: compile_location(name, location) for name, location in locations.items()}
+        # Programs of unchanged locations may be shared with other engines, the dict is replaced
+        programs = {**self.programs, **programs}
+        for name in removed:
+            programs.pop(name, None)
+        self.programs = programs
+        # Roads may have changed
+        self.road_map = None
+        self.routes = {}
+        self.traffic = None
+
+    def select_option(self, location_name: str, path: tuple) -> None:
+        """
+        Apply effects and run the action of the selected option.
+
+        :param path: options_stack with the selected option id (interned, see OPTION_IDS).
+        """
+        program = self.programs.get(location_name, {}).get(path)
+        if program:
+            program(self)
+            self.state.visited_options.bits |= 1 << path[-1]
+            if path[-1] in self.actions:
+                self.state.choices.append(OPTION_IDS.info(path[-1]).name)
+            # The option shows the world as it is at the new time (e.g. restocked stations)
+            self.advance_world()
+
+    def run_action(self, action: int | str | None, args: dict | None) -> None:
+        """
+        Move the action from the allow list.
+
+        :param action: interned option id or option name.
+        """
+        if action is None:
             return
-        fn = self.allowed_functions.get(action_name)
+        if isinstance(action, str):
+            action = OPTION_IDS.ids.get(action)
+        fn = self.actions.get(action)
         if not fn:
             return
         fn(args or {})
+        self.state.choices.append(OPTION_IDS.info(action).name)
+        self.advance_world()
 
     def apply_effect(self, effects: dict | None) -> None:
         """Handle support base game state changes."""
@@ -116,24 +174,43 @@ class Engine:
         if 'fuel' in effects:
             self.state.truck.fuel = min(self.state.truck.fuel + effects['fuel'], 100)
 
-    def drive(self, distance: int) -> None:
+    def advance_world(self) -> None:
+        """Run world events due by the current time (restocks) and take changes of the shared planet."""
+        world = self.state.world
+        # Called after every option: nothing is due most of the time
+        due = world.events.next_time()
+        if due is not None and due <= world.current_time:
+            world.events.run_until(world.current_time, world.run_event)
+        if world.shared is not None:
+            world.sync()
+
+    def drive_cost(self, distance: int, load: int | None = None) -> tuple[int, int]:
         """
-        Simulate driving the truck for a given distance.
+        Fuel and minutes needed to drive the truck for a given distance.
 
         Truck speed and fuel consumption depend on cargo value.
+
+        :param load: tons of cargo (the cargo of the truck by default).
         """
-        load = 0
-        for cargo in self.state.truck.cargo.values():
-            load += cargo
+        if load is None:
+            load = 0
+            for cargo in self.state.truck.cargo.values():
+                load += cargo
 
         # Each ton of cargo increases truck fuel consumption by 0.2 l
         fuel_consumption = self.state.truck.avg_fuel_consumption + load * 0.2
         used_fuel = round((distance / 100) * fuel_consumption)
-        self.state.truck.fuel -= used_fuel
 
         # Each ton of cargo reduce truck speed by 2 km/h
         speed = self.state.truck.avg_speed - load * 2
         time = round((distance / speed) * 60)
+        return used_fuel, time
+
+    def drive(self, distance: int) -> None:
+        """Simulate driving the truck for a given distance."""
+        used_fuel, time = self.drive_cost(distance)
+        self.state.truck.fuel -= used_fuel
+        self.state.truck.mileage += distance
         self.state.world.current_time += time
 
     def get_new_truck(self, args: dict) -> None:
@@ -147,20 +224,24 @@ class Engine:
         self.state.truck.upgrade_load_capacity = False
         self.state.truck.blades_on_wheels = False
         self.state.invisible_options.add('inspect_lorry')
-        self.state.locations[self.state.world.current_location][
-            'description'] = (
-            f'You stop at a big T-shaped canyon. A small river shines at the bottom. '
-            f'[green]Two bridges — on the western and northern sides of the ravine — are destroyed.[/green] '
-            f'At the bottom of the canyon, [green]you notice a wrecked lorry[/green]. '
-            f'It looks like [green]it\'s yours[/green]...'
-        )
-        self.state.locations['Forsaken Iridium Mines - West'][
-            'description'] = (
-            'You stop at a big T-shaped canyon. A small river shines at the bottom and, '
-            'it seems, a broken car, looking like your old truck. [green]Two bridges – '
-            'to the east and to the north – are broken[/green]. '
-            'It looks like one of them went to the iridium mines.'
-        )
+        # Locations are shared with other sessions, changed ones are copied (with the same options)
+        locations = dict(self.state.locations)
+        for name, description in (
+            (self.state.world.current_location, (
+                f'You stop at a big T-shaped canyon. A small river shines at the bottom. '
+                f'[green]Two bridges — on the western and northern sides of the ravine — are destroyed.[/green] '
+                f'At the bottom of the canyon, [green]you notice a wrecked lorry[/green]. '
+                f'It looks like [green]it\'s yours[/green]...'
+            )),
+            ('Forsaken Iridium Mines - West', (
+                'You stop at a big T-shaped canyon. A small river shines at the bottom and, '
+                'it seems, a broken car, looking like your old truck. [green]Two bridges – '
+                'to the east and to the north – are broken[/green]. '
+                'It looks like one of them went to the iridium mines.'
+            )),
+        ):
+            locations[name] = {**locations[name], 'description': description}
+        self.state.locations = locations
 
     def buy_corn(self, args: dict) -> None:
         """Corn purchase on the farm."""
@@ -199,22 +280,6 @@ class Engine:
                 f'[green]You have lost[/green].'
             )
 
-    def take_drox(self, args) -> None:
-        """
-        Start of the quest with the delivery of drox to the city.
-        Add drox to the passenger dictionary (passenger: destination).
-        The quest is one-time only.
-        """
-        self.state.truck.passenger['drox'] = 'Brackenbridge'
-        self.state.invisible_options.add('go_to_drox')
-        self.state.invisible_options.add('ask_barman_about_drox')
-
-    def drox_delivered(self) -> None:
-        """The reward for delivering drox to the city is a shotgun with 6 shells."""
-        self.state.hero.has_shotgun = True
-        self.state.hero.ammo += 6
-        del self.state.truck.passenger['drox']
-
     def treat_everyone(self, args) -> None:
         """The party at the bar tires the hero."""
         self.state.hero.fatigue = 19
@@ -317,36 +382,38 @@ class Engine:
 
     def sell_all_coal(self, args) -> None:
         """Hero sells all coal for factory in the city."""
-        self.state.hero.cash += 12 * self.state.truck.cargo.get('coal')
+        factory = self.state.world.factory
+        tons = self.state.truck.cargo.get('coal')
+        self.state.hero.cash += factory.coal_price * tons
         self.state.truck.cargo['coal'] = 0
+        factory.trade('coal_price', tons)
 
     def sell_all_scrap(self, args) -> None:
         """Hero sells all scarp for factory in the city."""
-        self.state.hero.cash += 23 * self.state.truck.cargo.get('scrap')
+        factory = self.state.world.factory
+        tons = self.state.truck.cargo.get('scrap')
+        self.state.hero.cash += factory.scrap_price * tons
         self.state.truck.cargo['scrap'] = 0
+        factory.trade('scrap_price', tons)
+
+    def _sample_encounter(self, table_name: str) -> dict | None:
+        """Helper: random event from the encounter table for the current location and hour."""
+        table = self.encounters.get(table_name)
+        if not table:
+            return None
+        hour = (self.state.world.current_time // 60) % 24
+        return table.sample(self.state.world.current_location, hour)
 
     def randomize_city_exploration_event(self) -> None:
         """
         Randomizes events during the hero's walks around the city.
-        During the day and at night, possible events and their probability of occurrence differ.
-        """
-        if self._is_time_in_range('23:00', '05:00'):
-            self.state.discover_city_event = random.choices(
-                ['back_nothing_interesting',
-                 'meet_beggar',
-                 'back_conflict_with_hooligans'],
-                weights=[0.45, 0.45, 0.1],
-                k=1
-            )[0]
-        else:
-            self.state.discover_city_event = random.choices(
-                ['back_stolen_money',
-                 'back_nothing_interesting',
-                 'meet_beggar'],
-                weights=[0.2, 0.4, 0.4],
-                k=1
-            )[0]
-        self.state.invisible_options.discard(self.state.discover_city_event)
+        During the day and at night, possible events and their probability
+        of occurrence differ (see city_exploration in encounters.json).
+        """
+        event = self._sample_encounter('city_exploration')
+        self.state.discover_city_event = event['id'] if event else None
+        if self.state.discover_city_event:
+            self.state.invisible_options.discard(self.state.discover_city_event)
 
     def _is_time_in_range(self, start: str, end: str) -> bool:
         """Checks if the current time is in the range [start, end]."""
@@ -452,8 +519,11 @@ class Engine:
 
     def sell_all_corn(self, args) -> None:
         """Hero sells all corn in the mining settlement."""
-        self.state.hero.cash += 45 * self.state.truck.cargo.get('corn')
+        trading_house = self.state.world.trading_house
+        tons = self.state.truck.cargo.get('corn')
+        self.state.hero.cash += trading_house.corn_price * tons
         self.state.truck.cargo['corn'] = 0
+        trading_house.trade('corn_price', tons)
 
     def work_in_mine(self) -> int:
         """Working in a coal mine, the hero can earn 2 or 3 cr per hour."""
@@ -466,6 +536,14 @@ class Engine:
             self.state.hero.cash += earned_money
         return earned_money
 
+    def plan_cargo(self, distance: int = 0) -> CargoPlan:
+        """
+        The most profitable cargo to buy with the current cash and truck space.
+
+        :param distance: km the cargo will be driven (extra fuel for the load is paid).
+        """
+        return plan_cargo(self, distance)
+
     def dex_repair_cost(self) -> int:
         """Dex's estimates the repairing cost of the truck."""
         # Dex uses non-original spare parts to repair cars,
@@ -493,50 +571,69 @@ class Engine:
         if self.state.hero.hanger < 40:
             self.state.hero.hanger = min(self.state.hero.hanger + 10, 39)
 
-    def take_policeman(self, args) -> None:
-        """Start of the quest with the delivery policeman to the city."""
-        self.state.truck.passenger['policeman'] = 'Brackenbridge'
-
-    def policeman_delivered(self) -> None:
-        """The reward for delivering policeman to the city is 8 shells."""
-        self.state.hero.ammo += 8
-        del self.state.truck.passenger['policeman']
+    def _contract_taker(self, contract_id: str):
+        """Helper: action taking the contract, for the allowed function list."""
+        return lambda args: self.take_contract(contract_id)
 
-    def take_passenger_from_mine_to_city(self, args) -> None:
-        """Start of the quest with the delivery passenger from mine to the city."""
-        self.state.truck.passenger['passenger'] = ('Mining Settlement', 'Brackenbridge')
-
-    def passenger_from_mine_to_city_delivered(self) -> None:
-        """The reward for delivering passenger from mine to the city is 40 cr."""
-        self.state.hero.cash += 40
-        del self.state.truck.passenger['passenger']
-
-    def take_passenger_from_city_to_mine(self, args) -> None:
-        """Start of the quest with the delivery passenger from city to mine."""
-        self.state.truck.passenger['passenger'] = ('Brackenbridge', 'Mining Settlement')
+    def can_take_contract(self, contract: Contract) -> bool:
+        """
+        Checks if the hero can take the contract.
 
-    def passenger_from_city_to_mine_delivered(self) -> None:
-        """The reward for delivering passenger from city to mine is 30 cr."""
-        self.state.hero.cash += 30
-        del self.state.truck.passenger['passenger']
+        There is only one free seat in the cabin for passengers,
+        cargo needs enough truck space.
+        """
+        truck = self.state.truck
+        if contract.id in truck.contracts:
+            return False
+        if contract.is_passenger:
+            passengers = sum(1 for taken in truck.contracts.values() if taken.is_passenger)
+            return passengers < truck.passenger_seats
+        return truck.truck_space >= contract.load
 
-    def take_passenger_from_bar_to_city(self, args) -> None:
-        """Start of the quest with the delivery passenger from bar to city."""
-        self.state.truck.passenger['passenger'] = ('The Stingray Bar', 'Brackenbridge')
+    def offer_contract(self, location: str, option_id: str) -> Contract | None:
+        """
+        Randomize a contract offer when the hero leaves the location with the option.
 
-    def passenger_from_bar_to_city_delivered(self) -> None:
-        """The reward for delivering passenger from bar to city is 100 cr."""
-        self.state.hero.cash += 100
-        del self.state.truck.passenger['passenger']
+        Offers are checked in the order they are declared in delivery_contracts.json.
+        """
+        for contract in self.contracts.offers_for(location, option_id):
+            if self.can_take_contract(contract) and random.random() < contract.offer['chance']:
+                return contract
+        return None
 
-    def take_passenger_from_mine_to_bar(self, args) -> None:
-        """Start of the quest with the delivery passenger from mine to bar."""
-        self.state.truck.passenger['passenger'] = ('Mining Settlement', 'The Stingray Bar')
+    def take_contract(self, contract_id: str) -> None:
+        """Start of the quest with the delivery to the contract destination."""
+        contract = self.contracts.get(contract_id)
+        if not contract:
+            return
+        truck = self.state.truck
+        truck.contracts[contract.id] = contract
+        truck.deliveries.setdefault(contract.destination, []).append(contract.id)
+        truck.truck_space -= contract.load
+        for option in contract.hide_options:
+            self.state.invisible_options.add(option)
+
+    def deliver_contracts(self, location: str) -> list:
+        """
+        Complete all contracts with the destination in the location and give rewards.
 
-    def passenger_from_mine_to_bar_delivered(self) -> None:
-        """The reward for delivering passenger from mine to bar is 60 cr."""
-        self.state.hero.cash += 60
-        del self.state.truck.passenger['passenger']
+        :return: delivered contracts.
+        """
+        truck = self.state.truck
+        contract_ids = truck.deliveries.pop(location, None)
+        if not contract_ids:
+            return []
+
+        delivered = []
+        for contract_id in contract_ids:
+            contract = truck.contracts.pop(contract_id)
+            truck.truck_space += contract.load
+            self.state.hero.cash += contract.reward.get('cash', 0)
+            self.state.hero.ammo += contract.reward.get('ammo', 0)
+            if contract.reward.get('shotgun'):
+                self.state.hero.has_shotgun = True
+            delivered.append(contract)
+        return delivered
 
     def back_after_buy_shell(self, args) -> None:
         """Simulate ammo buying from stranger on the road."""
@@ -553,52 +650,75 @@ class Engine:
         """Hides fuel selling options (one-time action)."""
         self.state.invisible_options.add('ask_about_news')
 
-    def randomize_encounter_on_road(self) -> str | None:
-        """Randomize events to meet someone on the road."""
-        if random.random() < 0.1:
-            return random.choice([
-                'Road - empty mustang',
-                'Road - pickup',
-                'Road - mustang',
-                'Road - damage truck',
-                'Road - fuel truck',
-                'Road - healer'
-            ])
+    def roads(self) -> dict:
+        """Roads between the loaded locations (see traffic.road_graph)."""
+        if self.road_map is None:
+            self.road_map = road_graph(self.state.locations)
+        return self.road_map
+
+    def route(self, start: str, destination: str) -> Route | None:
+        """Shortest route between locations (see traffic.road_route), found once for the loaded roads."""
+        key = (start, destination)
+        if key not in self.routes:
+            self.routes[key] = road_route(self.roads(), start, destination)
+        return self.routes[key]
+
+    def road_traffic(self) -> Traffic:
+        """NPC vehicles of the road encounters on roads between locations (see road in encounters.json)."""
+        seed = self.state.world.traffic_seed
+        if self.traffic is None or self.traffic.seed != seed:
+            vehicles = road_vehicles(self.encounters.get('road'))
+            self.traffic = Traffic(self.roads(), vehicles, seed)
+        return self.traffic
+
+    def vehicles_on_road(self, source: str, destination: str, end: int | None = None) -> list:
+        """
+        Vehicles the hero meets on the road between locations, in the order of meeting.
+
+        :param end: game minute when the trip ends (now by default, the hero has just driven the road).
+        """
+        traffic = self.road_traffic()
+        distance = traffic.roads.get(tuple(sorted((source, destination))))
+        if distance is None:
+            return []
+        if end is None:
+            end = self.state.world.current_time
+        return traffic.meet(source, destination, end - self.drive_cost(distance)[1], end)
+
+    def randomize_encounter_on_road(self, source: str, destination: str) -> str | None:
+        """
+        Randomize events to meet someone on the road (see road in encounters.json).
+
+        Every vehicle met on the road stops the hero with the chance of the road table.
+        """
+        table = self.encounters.get('road')
+        if not table:
+            return None
+        for vehicle in self.vehicles_on_road(source, destination):
+            if random.random() < table.chance:
+                return vehicle.kind
         return None
 
     def randomize_police_event(self) -> dict | None:
-        """Simulate policeman encounter when hero goes to the marshal."""
-        fine = random.randint(7, 16)
-        if random.random() < 0.1:
-            policeman = random.choice([
-                '– Papers! And for the truck too. Hm… insurance, papers… Oh! '
-                'When was your last inspection? Two years ago?! Today is August 18, '
-                f'3018! Pay [green]{fine} credits[/green] or your truck goes to the impound',
-                '– Your face looks red. Been drinking? Blow into this!\n'
-                'You did — clean. He frowned, then blew into the tube himself.\n'
-                '– Oh! Works fine. Look — medium intoxication! So, you are drunk. '
-                f'Pay [green]{fine} credits[/green], or it’s the impound for you!',
-                f'– You broke the speed limit! Pay [green]{fine} credits[/green]. What? No sign? '
-                f'Doesn’t matter, pay [green]{fine} credits[/green] or go to the impound.',
-                '– Documents, please. Why breaking rules? Which rules? Doesn’t matter, '
-                f'all rules are the same. For this, you pay [green]{fine} credits[/green]. '
-                'Or maybe you want the impound?'
-            ])
-            marshal = random.choice([
-                'If you left the truck at the impound, the marshal [green]grilled you for 2 hours[/green], '
-                'checked reports, and finally gave you a pass. But when you returned, '
-                '[green]parts were missing[/green]. The guard just shrugged. Nothing you could do…',
-                'At the marshal’s office, after [green]long waiting[/green], he admitted you were '
-                'innocent. You left [green]tired[/green], but happy you proved your point.'
-            ])
-            result = {
-                "fine": fine,
-                "policeman": policeman,
-                "marshal": marshal
-            }
-            self.state.world.police_event = result
-            return result
-        return None
+        """
+        Simulate policeman encounter when hero goes to the marshal.
+
+        Policeman's demand and the result of going to the impound
+        are selected from police and impound tables in encounters.json.
+        """
+        policeman = self._sample_encounter('police')
+        if not policeman:
+            return None
+        fine = random.randint(*policeman['fine'])
+        marshal = self._sample_encounter('impound') or {}
+        result = {
+            "fine": fine,
+            "policeman": policeman['text'].format(fine=fine),
+            "marshal": marshal.get('text', ''),
+            "marshal_effects": marshal.get('effects', {})
+        }
+        self.state.world.police_event = result
+        return result
 
     def pay_fine(self, args) -> None:
         """Simulate the hero pays the fine for policeman."""
@@ -610,9 +730,7 @@ class Engine:
         Simulate the hero goes to the impound lot.
         Event is generated randomly (randomly text and effects).
         """
-        if self.state.world.police_event['marshal'].startswith('If you left the truck'):
-            self.state.world.current_time += 120
-            self.state.truck.truck_condition -= 17
-        if self.state.world.police_event['marshal'].startswith('At the marshal’s office'):
-            self.state.world.current_time += 180
+        effects = self.state.world.police_event['marshal_effects']
+        self.state.world.current_time += effects.get('time', 0)
+        self.state.truck.truck_condition += effects.get('truck_condition', 0)
         self.state.world.active_encounter = False
\ No newline at end of file
@@ -0,0 +1,491 @@
+import argparse
+import json
+import multiprocessing
+import random
+import zlib
+from array import array
+from collections import deque
+from typing import NamedTuple
+
+from content import load_locations
+from game_state import GameState, Market, MarketPrice
+from options import LOCATION_IDS, OPTION_IDS
+from session import GameSession
+from zobrist import zobrist_key
+
+# Option which finishes the game
+GOAL_OPTION = 'leave_planet'
+
+
+class Abstraction(NamedTuple):
+    """
+    How exact states are merged into abstract ones.
+
+    - time_bucket: minutes of the day in one bucket (days are ignored);
+    - cash_cap: any cash above the cap counts as the cap;
+    - price_bucket: credits of a market price in one bucket
+      (the trade history behind the price is ignored);
+    - stats are clamped at zero (empty tank, exhausted hero);
+    - the mileage is ignored, the truck condition worn by it is kept.
+
+    Without the abstraction waiting, working and driving in circles
+    would give an endless number of states.
+    """
+    time_bucket: int = 60
+    cash_cap: int = 200
+    price_bucket: int = 1
+
+
+# Fields clamped at zero by the abstraction: part of the state and field
+_CLAMPED_AT_ZERO = (
+    ('truck', 'fuel'),
+    ('hero', 'health'),
+)
+
+# Values decaying with time or mileage (see Decaying): the abstraction
+# keeps their current value instead of the level and the clock reading
+_DECAYING = (
+    ('hero', 'fatigue'),
+    ('hero', 'hanger'),
+    ('truck', 'truck_condition'),
+)
+
+# Market class -> names of its prices (see MarketPrice)
+_market_prices = {}
+
+
+def _prices(market: Market) -> list:
+    """Helper: price descriptors of the market by their names."""
+    cls = type(market)
+    prices = _market_prices.get(cls)
+    if prices is None:
+        prices = _market_prices[cls] = [
+            (name, attr) for klass in cls.__mro__ for name, attr in vars(klass).items()
+            if isinstance(attr, MarketPrice)
+        ]
+    return prices
+
+
+def abstract_key(session: GameSession, abstraction: Abstraction) -> int:
+    """
+    64-bit key of the abstract state of the session.
+
+    Zobrist keys of the exact values are swapped for keys of the abstract ones,
+    so the key costs a few XORs on top of the incremental state hash.
+    Available options are a part of the key (ride offers are not in the game state).
+    """
+    state = session.state
+    key = state.state_hash()
+
+    time = state.world.current_time
+    key ^= zobrist_key('state.world', 'current_time', time)
+    key ^= zobrist_key('state.world', 'time_of_day', time % 1440 // abstraction.time_bucket)
+
+    cash = state.hero.cash
+    if cash > abstraction.cash_cap:
+        key ^= zobrist_key('state.hero', 'cash', cash) ^ zobrist_key('state.hero', 'cash', abstraction.cash_cap)
+
+    for part, field in _CLAMPED_AT_ZERO:
+        value = getattr(getattr(state, part), field)
+        if value < 0:
+            scope = f'state.{part}'
+            key ^= zobrist_key(scope, field, value) ^ zobrist_key(scope, field, 0)
+
+    for part, field in _DECAYING:
+        obj = getattr(state, part)
+        scope = f'state.{part}'
+        key ^= zobrist_key(scope, f'{field}_level', getattr(obj, f'{field}_level'))
+        key ^= zobrist_key(scope, f'{field}_since', getattr(obj, f'{field}_since'))
+        key ^= zobrist_key(scope, field, max(getattr(obj, field), 0))
+
+    truck = state.truck
+    key ^= zobrist_key(truck._scope, 'mileage', truck.mileage)
+
+    # Prices are kept as the trade pressure and the minute of the last trade,
+    # the abstraction keeps the evaluated price instead
+    for _, market in state.world._fields():
+        if not isinstance(market, Market):
+            continue
+        scope = market._scope
+        for name, price in _prices(market):
+            key ^= zobrist_key(scope, price.pressure, getattr(market, price.pressure))
+            key ^= zobrist_key(scope, price.since, getattr(market, price.since))
+            key ^= zobrist_key(scope, f'{name}_bucket', getattr(market, name) // abstraction.price_bucket)
+
+    shown = tuple((option.id, option.disabled) for option in session.options)
+    return key ^ zobrist_key('session', 'options', shown)
+
+
+class Expansion(NamedTuple):
+    """
+    Result of expanding one state.
+
+    - summary: location, cash, fuel and time of the state (for the report);
+    - children: (key, compressed snapshot or None if the worker has sent it before);
+    - selected: (location, option path) selected for the first time in the worker.
+    """
+    key: int
+    depth: int
+    summary: tuple
+    goal: bool
+    dead_end: bool
+    children: list
+    selected: list
+
+
+class _Worker:
+    """Expands states in one process: restores snapshots and tries every available option."""
+
+    def __init__(self, abstraction: Abstraction, samples: int) -> None:
+        """Initialize the session of the worker."""
+        self.abstraction = abstraction
+        self.samples = samples
+        # Traffic is the same in every worker and every run
+        self.session = GameSession(GameState(traffic_seed=0))
+        self.session.state.state_hash()
+        # Memo of what was already sent to the master
+        self.sent_keys = set()
+        self.sent_selected = set()
+
+    def start(self) -> tuple:
+        """Key and compressed snapshot of the first state of the game."""
+        random.seed(0)
+        self.session.show_location('Spaceport')
+        key = abstract_key(self.session, self.abstraction)
+        self.sent_keys.add(key)
+        return key, zlib.compress(self.session.snapshot(), 1)
+
+    def expand(self, node: tuple) -> Expansion:
+        """Expand the node (key, depth, compressed snapshot)."""
+        key, depth, packed = node
+        snapshot = zlib.decompress(packed)
+        session = self.session
+        session.restore(snapshot)
+
+        state = session.state
+        location = state.world.current_location
+        summary = (location, state.hero.cash, state.truck.fuel, state.world.current_time)
+        enabled = [option.id for option in session.options if not option.disabled]
+        goal = GOAL_OPTION in enabled
+
+        children = []
+        selected = []
+        child_keys = set()
+        for i, option_id in enumerate(enabled):
+            path = (location, tuple(state.options_stack) + (option_id,))
+            if path not in self.sent_selected:
+                self.sent_selected.add(path)
+                selected.append(path)
+
+            for sample in range(self.samples):
+                if i or sample:
+                    session.restore(snapshot)
+                # Random events depend only on the state and the choice,
+                # so the result does not depend on the worker
+                random.seed(key ^ zobrist_key('explorer', option_id, sample))
+                session.select(option_id)
+                child = abstract_key(session, self.abstraction)
+                if child in child_keys:
+                    continue
+                child_keys.add(child)
+                if child in self.sent_keys:
+                    children.append((child, None))
+                else:
+                    self.sent_keys.add(child)
+                    children.append((child, zlib.compress(session.snapshot(), 1)))
+
+        return Expansion(key, depth, summary, goal, not enabled, children, selected)
+
+
+# Worker of the current process (set by the pool initializer)
+_worker = None
+
+
+def _init_worker(abstraction: Abstraction, samples: int) -> None:
+    """Helper: create the worker of the pool process."""
+    global _worker
+    _worker = _Worker(abstraction, samples)
+
+
+def _expand(node: tuple) -> Expansion:
+    """Helper: expand the node in the pool process."""
+    return _worker.expand(node)
+
+
+class Explorer:
+    """
+    Explores the game graph: states are nodes, selected options are edges.
+
+    States are deduplicated by abstract keys (see Abstraction), so
+    every abstract state is expanded once. Known states are kept as
+    64-bit keys with a few numbers for the report, snapshots are kept
+    compressed only for the frontier.
+    """
+
+    def __init__(self, abstraction: Abstraction = Abstraction(), samples: int = 1,
+                 workers: int = 1, order: str = 'bfs',
+                 max_states: int = 1_000_000, max_depth: int | None = None) -> None:
+        """
+        Initialize the explorer.
+
+        :param samples: random outcomes tried for every option.
+        :param order: 'bfs' or 'dfs'.
+        """
+        self.abstraction = abstraction
+        self.samples = samples
+        self.workers = workers
+        self.order = order
+        self.max_states = max_states
+        self.max_depth = max_depth
+
+        # Key -> node index, node data are in arrays by the index
+        self.index = {}
+        self.locations = array('H')
+        self.cash = array('l')
+        self.fuel = array('l')
+        self.time = array('l')
+        self.expanded = array('b')
+        # Not expanded yet or some children were dropped by the limits
+        self.open = array('b')
+        self.goal = array('b')
+        self.dead_end = array('b')
+        # Edges (parent index, child index)
+        self.edge_from = array('L')
+        self.edge_to = array('L')
+
+        self.selected = set()
+        self.max_reached_depth = 0
+        self.truncated = False
+
+    def _add_node(self, key: int) -> int:
+        """Helper: index of the new node."""
+        i = len(self.index)
+        self.index[key] = i
+        self.locations.append(0)
+        self.cash.append(0)
+        self.fuel.append(0)
+        self.time.append(0)
+        self.expanded.append(0)
+        self.open.append(1)
+        self.goal.append(0)
+        self.dead_end.append(0)
+        return i
+
+    def _record(self, expansion: Expansion, frontier: deque) -> None:
+        """Helper: add the expanded node and its new children to the graph."""
+        i = self.index[expansion.key]
+        location, cash, fuel, time = expansion.summary
+        self.locations[i] = LOCATION_IDS.intern(location)
+        self.cash[i] = cash
+        self.fuel[i] = fuel
+        self.time[i] = time
+        self.expanded[i] = 1
+        self.open[i] = 0
+        self.goal[i] = expansion.goal
+        self.dead_end[i] = expansion.dead_end
+        self.selected.update(expansion.selected)
+        self.max_reached_depth = max(self.max_reached_depth, expansion.depth)
+
+        for child, packed in expansion.children:
+            j = self.index.get(child)
+            if j is None:
+                if packed is None or len(self.index) >= self.max_states:
+                    self.truncated = True
+                    self.open[i] = 1
+                    continue
+                j = self._add_node(child)
+                if self.max_depth is None or expansion.depth < self.max_depth:
+                    frontier.append((child, expansion.depth + 1, packed))
+                else:
+                    self.truncated = True
+            self.edge_from.append(i)
+            self.edge_to.append(j)
+
+    def _batches(self, frontier: deque, size: int):
+        """Helper: batches of frontier nodes in the exploration order."""
+        while frontier:
+            take = frontier.popleft if self.order == 'bfs' else frontier.pop
+            yield [take() for _ in range(min(size, len(frontier)))]
+
+    def run(self) -> 'Explorer':
+        """Explore the game from the start."""
+        worker = _Worker(self.abstraction, self.samples)
+        key, packed = worker.start()
+        self._add_node(key)
+        frontier = deque([(key, 0, packed)])
+
+        if self.workers <= 1:
+            for batch in self._batches(frontier, 1):
+                for node in batch:
+                    self._record(worker.expand(node), frontier)
+            return self
+
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(self.workers, _init_worker, (self.abstraction, self.samples)) as pool:
+            for batch in self._batches(frontier, self.workers * 64):
+                # Results are recorded in the order of the batch, so the graph
+                # does not depend on which worker is faster
+                for expansion in pool.imap(_expand, batch, chunksize=16):
+                    self._record(expansion, frontier)
+        return self
+
+    def _reaching_goal(self) -> array:
+        """
+        Helper: nodes from which the goal can be reached.
+
+        Open nodes (stopped by the limits) are treated as reaching the goal,
+        so soft-locks are never reported by mistake.
+        Reverse edges are packed into arrays (CSR), so millions of edges fit in memory.
+        """
+        n = len(self.index)
+        start = array('L', [0]) * (n + 1)
+        for j in self.edge_to:
+            start[j + 1] += 1
+        for j in range(n):
+            start[j + 1] += start[j]
+        parents = array('L', [0]) * len(self.edge_to)
+        fill = array('L', start)
+        for i, j in zip(self.edge_from, self.edge_to):
+            parents[fill[j]] = i
+            fill[j] += 1
+
+        reaching = array('b', [0]) * n
+        queue = deque(i for i in range(n) if self.goal[i] or self.open[i])
+        for i in queue:
+            reaching[i] = 1
+        while queue:
+            j = queue.popleft()
+            for i in parents[start[j]:start[j + 1]]:
+                if not reaching[i]:
+                    reaching[i] = 1
+                    queue.append(i)
+        return reaching
+
+    def _examples(self, nodes: list, limit: int) -> list:
+        """Helper: readable description of a few nodes."""
+        return [
+            {
+                'location': LOCATION_IDS.name(self.locations[i]),
+                'cash': self.cash[i],
+                'fuel': self.fuel[i],
+                'time': self.time[i],
+            }
+            for i in nodes[:limit]
+        ]
+
+    def report(self, locations: dict, examples: int = 5) -> dict:
+        """
+        Results of the exploration.
+
+        - unreachable locations and options of location_actions.json;
+        - dead ends: states without available options;
+        - soft-locks: states from which the goal can't be reached
+          (e.g. no fuel and no cash far from a fuel station).
+        """
+        reaching = self._reaching_goal()
+        expanded = [i for i in range(len(self.index)) if self.expanded[i]]
+        dead_ends = [i for i in expanded if self.dead_end[i]]
+        soft_locks = [i for i in expanded if not reaching[i]]
+
+        visited = {LOCATION_IDS.name(self.locations[i]) for i in expanded}
+        unreachable_locations = sorted(set(locations) - visited)
+
+        unreachable_options = {}
+        for name, location in locations.items():
+            for path in _option_paths(location.get('options') or {}, ()):
+                if (name, path) not in self.selected:
+                    unreachable_options.setdefault(name, []).append(' > '.join(path))
+
+        soft_lock_places = {}
+        for i in soft_locks:
+            place = LOCATION_IDS.name(self.locations[i])
+            soft_lock_places[place] = soft_lock_places.get(place, 0) + 1
+
+        return {
+            'states': len(self.index),
+            'expanded': len(expanded),
+            'edges': len(self.edge_from),
+            'depth': self.max_reached_depth,
+            'complete': not self.truncated,
+            'goal_reached': any(self.goal),
+            'unreachable_locations': unreachable_locations,
+            'unreachable_options': unreachable_options,
+            'dead_ends': len(dead_ends),
+            'dead_end_examples': self._examples(dead_ends, examples),
+            'soft_locks': len(soft_locks),
+            'soft_locks_by_location': dict(sorted(soft_lock_places.items(), key=lambda item: -item[1])),
+            'soft_lock_examples': self._examples(soft_locks, examples),
+        }
+
+
+def _option_paths(options: dict, stack: tuple):
+    """Helper: paths of all options of the location (including nested ones)."""
+    for option_id, option in options.items():
+        path = stack + (option_id,)
+        yield path
+        if option.get('options'):
+            yield from _option_paths(option['options'], path)
+
+
+def print_report(report: dict) -> None:
+    """Print the exploration report."""
+    print(f'States: {report["states"]} ({report["expanded"]} expanded), '
+          f'edges: {report["edges"]}, depth: {report["depth"]}')
+    if not report['complete']:
+        print('Exploration stopped by the limits, unreachable content may be reachable deeper.')
+    print(f'Goal ({GOAL_OPTION}) reached: {report["goal_reached"]}')
+
+    print(f'\nUnreachable locations ({len(report["unreachable_locations"])}):')
+    for name in report['unreachable_locations']:
+        print(f'  {name}')
+
+    count = sum(len(paths) for paths in report['unreachable_options'].values())
+    print(f'\nUnreachable options ({count}):')
+    for name, paths in report['unreachable_options'].items():
+        print(f'  {name}:')
+        for path in paths:
+            print(f'    {path}')
+
+    print(f'\nDead ends: {report["dead_ends"]}')
+    for example in report['dead_end_examples']:
+        print(f'  {example}')
+
+    print(f'\nSoft-locks (the goal can\'t be reached): {report["soft_locks"]}')
+    for place, count in report['soft_locks_by_location'].items():
+        print(f'  {place}: {count}')
+    for example in report['soft_lock_examples']:
+        print(f'  {example}')
+
+
+def main(argv=None) -> None:
+    """Explore the game from the command line."""
+    parser = argparse.ArgumentParser(description='Explore reachable game states of Space Saga.')
+    parser.add_argument('--order', choices=('bfs', 'dfs'), default='bfs')
+    parser.add_argument('--workers', type=int, default=1, help='parallel worker processes')
+    parser.add_argument('--max-states', type=int, default=1_000_000)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--samples', type=int, default=1, help='random outcomes tried for every option')
+    parser.add_argument('--time-bucket', type=int, default=60, help='minutes of the day in one abstract state')
+    parser.add_argument('--cash-cap', type=int, default=200, help='cash above the cap is the same state')
+    parser.add_argument('--price-bucket', type=int, default=1, help='credits of a market price in one state')
+    parser.add_argument('--json', metavar='PATH', help='save the report as json')
+    args = parser.parse_args(argv)
+
+    explorer = Explorer(
+        Abstraction(args.time_bucket, args.cash_cap, args.price_bucket),
+        samples=args.samples,
+        workers=args.workers,
+        order=args.order,
+        max_states=args.max_states,
+        max_depth=args.max_depth,
+    ).run()
+
+    report = explorer.report(load_locations())
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
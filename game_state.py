@@ -1,20 +1,236 @@
-class World:
+import random
+
+from options import BitSet, LOCATION_IDS, OPTION_IDS
+from scheduler import Scheduler
+from zobrist import Hashed, assign_fields, track
+
+
+class Decaying:
+    """
+    Value which falls with a clock (game time, mileage), computed when it is read.
+
+    The object keeps the level and the clock reading when the level was set
+    in fields <name>_level and <name>_since, so reading costs one subtraction
+    however much time has passed, and nothing is ticked on every step.
+    Decay stops at zero.
+    """
+
+    def __init__(self, amount: int, per: int, clock: str) -> None:
+        """
+        Initialize the value losing amount for every per units of the clock.
+
+        :param clock: name of the method returning the clock reading.
+        """
+        self.amount = amount
+        self.per = per
+        self.clock = clock
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.level = f'{name}_level'
+        self.since = f'{name}_since'
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        level = getattr(obj, self.level)
+        elapsed = getattr(obj, self.clock)() - getattr(obj, self.since)
+        return max(level - elapsed * self.amount // self.per, min(level, 0))
+
+    def __set__(self, obj, value) -> None:
+        setattr(obj, self.level, value)
+        setattr(obj, self.since, getattr(obj, self.clock)())
+
+
+class MarketPrice:
+    """
+    Price which reacts to the trade volume of the hero and recovers with the game time.
+
+    Every traded unit pushes the price by the impact share (negative for places
+    which buy from the hero), the push halves every half_life minutes.
+    The whole trade history is one number: the push at the last trade
+    (field <name>_pressure) and the minute of that trade (<name>_since),
+    the price is evaluated in closed form only when it is read.
+    Assignment changes the base price (field <name>_base).
+    """
+
+    def __init__(self, impact: float, half_life: int = 720) -> None:
+        """Initialize the price with the share of the base price per traded unit."""
+        self.impact = impact
+        self.half_life = half_life
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.base = f'{name}_base'
+        self.pressure = f'{name}_pressure'
+        self.since = f'{name}_since'
+
+    def _pressure(self, obj) -> float:
+        """Helper: the push of past trades at the current minute."""
+        pressure = getattr(obj, self.pressure)
+        if not pressure:
+            return 0.0
+        return pressure * 0.5 ** ((obj._now() - getattr(obj, self.since)) / self.half_life)
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        base = getattr(obj, self.base)
+        return max(1, round(base * (1 + self.impact * self._pressure(obj))))
+
+    def __set__(self, obj, value) -> None:
+        setattr(obj, self.base, value)
+        if not hasattr(obj, self.pressure):
+            setattr(obj, self.pressure, 0.0)
+            setattr(obj, self.since, obj._now())
+
+    def after(self, obj, amount: int) -> int:
+        """Price after more units traded by the hero right now (trade in closed form)."""
+        base = getattr(obj, self.base)
+        return max(1, round(base * (1 + self.impact * (self._pressure(obj) + amount))))
+
+    def trade(self, obj, amount: int) -> None:
+        """Add units traded by the hero right now."""
+        setattr(obj, self.pressure, self._pressure(obj) + amount)
+        setattr(obj, self.since, obj._now())
+
+
+class Market(Hashed):
+    """Place where the hero trades at prices following his trade volume (see MarketPrice)."""
+
+    DERIVED = ('price',)
+
+    def __init__(self, world=None) -> None:
+        """Initialize the market with the world as the clock of prices."""
+        self._world = world
+
+    def _now(self) -> int:
+        """Helper: game time for prices."""
+        return self._world.current_time if self._world is not None else 0
+
+    def trade(self, price: str, amount: int) -> None:
+        """Record units traded at the price (name of the MarketPrice)."""
+        getattr(type(self), price).trade(self, amount)
+
+    def price_after(self, price: str, amount: int) -> int:
+        """The price (name of the MarketPrice) after more units traded right now."""
+        return getattr(type(self), price).after(self, amount)
+
+
+class Station(Market):
+    """
+    Market selling goods with the stock restocking over time.
+
+    - MAX_OFFER: tons in the full stock;
+    - RESTOCK: tons added every RESTOCK_PERIOD minutes.
+    """
+
+    MAX_OFFER = 0
+    RESTOCK = 0
+    RESTOCK_PERIOD = 360
+
+    def register(self, scheduler: Scheduler, name: str, now: int) -> None:
+        """Schedule restocks of the station (name is the World attribute)."""
+        scheduler.schedule(now + self.RESTOCK_PERIOD, f'{name}.restock', self.RESTOCK_PERIOD)
+
+    def _shared(self):
+        """Helper: store of the shared planet (see SharedWorld) or None for a single player."""
+        return self._world.shared if self._world is not None else None
+
+    def _key(self) -> str:
+        """Helper: name of the station in the shared store."""
+        return self._hashed_base().__name__
+
+    def share(self, shared) -> None:
+        """Put the station to the shared planet, its stock comes from the store from now on."""
+        shared.add(self._key(), self.offer, self._now() // self.RESTOCK_PERIOD)
+        self.offer = shared.offer(self._key())
+
+    def take(self, amount: int) -> bool:
+        """
+        Take goods from the stock (False if there are not enough of them).
+
+        On the shared planet the stock is changed in the store by one compare and swap,
+        purchases of other players can't make it negative.
+        """
+        shared = self._shared()
+        if shared is None:
+            if amount > self.offer:
+                return False
+            self.offer -= amount
+            return True
+        taken, self.offer = shared.take(self._key(), amount)
+        return taken
+
+    def restock(self, times: int = 1) -> None:
+        """Bring new goods for the passed periods (up to the full stock)."""
+        shared = self._shared()
+        if shared is not None:
+            period = self._now() // self.RESTOCK_PERIOD
+            self.offer = shared.restock(self._key(), period, self.RESTOCK, self.MAX_OFFER)
+        elif self.offer < self.MAX_OFFER:
+            self.offer = min(self.offer + self.RESTOCK * times, self.MAX_OFFER)
+
+
+class World(Hashed):
     """Represents global game states (current_time and navigation)."""
 
-    def __init__(self) -> None:
-        """Initialize the world with default current_time and starting location."""
+    # Scheduled events are defined by the time, they are not a part of the hash,
+    # the shared store is a connection to other players
+    UNHASHED = ('events', 'shared')
+
+    # World attributes of stations with scheduled restocks
+    STATIONS = ('corn_farm', 'wreckyard', 'mine')
+
+    def __init__(self, traffic_seed: int | None = None) -> None:
+        """
+        Initialize the world with default current_time and starting location.
+
+        :param traffic_seed: seed of NPC traffic (see Traffic), a random one if None.
+        """
         self.days = 0
         self.current_time = 408
         self.current_location = 'Start'
-        self.corn_farm = self.CornFarm()
-        self.gruber_gas_station = self.GruberGasStation()
+        self.corn_farm = self.CornFarm(self)
+        self.gruber_gas_station = self.GruberGasStation(self)
         self.biker_mood = None  # ('Biker looks determined', 'Biker is confident', 'Biker is careful', 'Biker is afraid', 'Biker is afraid')
-        self.wreckyard = self.Wreckyard()
-        self.mine = self.Mine()
-        self.dex_gas_station = self.DexGasStation()
+        self.wreckyard = self.Wreckyard(self)
+        self.mine = self.Mine(self)
+        self.dex_gas_station = self.DexGasStation(self)
+        # Buyers of goods: the factory in Brackenbridge and the trading house in the mining settlement
+        self.factory = self.Factory(self)
+        self.trading_house = self.TradingHouse(self)
         self.next_location = None
         self.active_encounter = False
         self.police_event = None
+        # Routes of NPC vehicles on roads are made from the seed (see Traffic)
+        self.traffic_seed = random.randrange(2 ** 32) if traffic_seed is None else traffic_seed
+
+        # Events of the world by game minutes (see Scheduler)
+        self.events = Scheduler()
+        for name in self.STATIONS:
+            getattr(self, name).register(self.events, name, self.current_time)
+
+        # Store of the planet shared with other players (see SharedWorld), None for a single player
+        self.shared = None
+
+    def share(self, shared) -> None:
+        """Join the planet shared with other players: stocks of stations are kept in the store."""
+        self.shared = shared
+        for name in self.STATIONS:
+            getattr(self, name).share(shared)
+
+    def sync(self) -> None:
+        """Take stocks of stations changed by other players from the shared store."""
+        if self.shared is None:
+            return
+        offers = self.shared.offers()
+        for name in self.STATIONS:
+            station = getattr(self, name)
+            station.offer = offers.get(station._key(), station.offer)
+
+    def run_event(self, event: str, times: int) -> None:
+        """Run the scheduled event ('<station>.<method>') for the number of passed periods."""
+        station, method = event.split('.')
+        getattr(getattr(self, station), method)(times)
 
     def show_days(self) -> int:
         """Show how many days have passed since the start of game."""
@@ -27,12 +243,19 @@ class World:
         m = self.current_time % 60
         return f'{h:02}:{m:02}'
 
-    class CornFarm:
+    class CornFarm(Station):
         """Represents corn farm and its state."""
 
-        def __init__(self) -> None:
+        MAX_OFFER = 35
+        RESTOCK = 5
+        RESTOCK_PERIOD = 360
+        # Every ton bought raises the price by 2%
+        price = MarketPrice(0.02)
+
+        def __init__(self, world=None) -> None:
             """Initialize parameters of corn farm."""
-            self.offer = 35
+            super().__init__(world)
+            self.offer = self.MAX_OFFER
             self.price = 25
 
         def can_buy_corn(self, amount: int, hero, truck) -> bool:
@@ -47,18 +270,22 @@ class World:
 
         def buy(self, amount: int, hero, truck) -> None:
             """Make the purchase if it's possible."""
-            if not self.can_buy_corn(amount, hero, truck):
+            if not self.can_buy_corn(amount, hero, truck) or not self.take(amount):
                 return
-            self.offer -= amount
             hero.cash -= amount * self.price
             truck.truck_space -= amount
             truck.cargo['corn'] += amount
+            self.trade('price', amount)
 
-    class GruberGasStation:
+    class GruberGasStation(Market):
         """Represents Gruber's gas station."""
 
-        def __init__(self) -> None:
+        # Every liter bought raises the price by 0.5%
+        price = MarketPrice(0.005)
+
+        def __init__(self, world=None) -> None:
             """Initialize Gruber's gas station with fuel's price."""
+            super().__init__(world)
             # Price is for 5 liters of fuel.
             self.price = 7
 
@@ -74,13 +301,21 @@ class World:
                 return
             hero.cash -= int((amount / 5) * self.price)
             truck.fuel += amount
+            self.trade('price', amount)
 
-    class Wreckyard:
+    class Wreckyard(Station):
         """Represents wreckyard and its state."""
 
-        def __init__(self):
+        MAX_OFFER = 51
+        RESTOCK = 3
+        RESTOCK_PERIOD = 240
+        # Every ton bought raises the price by 3%
+        price = MarketPrice(0.03)
+
+        def __init__(self, world=None):
             """Initialize parameters of wreckyard."""
-            self.offer = 51
+            super().__init__(world)
+            self.offer = self.MAX_OFFER
             self.price = 10
 
         def can_buy_scrap(self, amount, hero, truck) -> bool:
@@ -95,19 +330,26 @@ class World:
 
         def buy(self, amount: int, hero, truck) -> None:
             """Make the purchase if it's possible."""
-            if not self.can_buy_scrap(amount, hero, truck):
+            if not self.can_buy_scrap(amount, hero, truck) or not self.take(amount):
                 return
-            self.offer -= amount
             hero.cash -= amount * self.price
             truck.truck_space -= amount
             truck.cargo['scrap'] += amount
+            self.trade('price', amount)
 
-    class Mine:
+    class Mine(Station):
         """Represents mine and its state."""
 
-        def __init__(self):
+        MAX_OFFER = 76
+        RESTOCK = 10
+        RESTOCK_PERIOD = 120
+        # Every ton bought raises the price by 4%
+        price = MarketPrice(0.04)
+
+        def __init__(self, world=None):
             """Initialize parameters of mine."""
-            self.offer = 76
+            super().__init__(world)
+            self.offer = self.MAX_OFFER
             self.price = 5
 
         def can_buy_coal(self, amount, hero, truck) -> bool:
@@ -122,18 +364,22 @@ class World:
 
         def buy(self, amount: int, hero, truck) -> None:
             """Make the purchase if it's possible."""
-            if not self.can_buy_coal(amount, hero, truck):
+            if not self.can_buy_coal(amount, hero, truck) or not self.take(amount):
                 return
-            self.offer -= amount
             hero.cash -= amount * self.price
             truck.truck_space -= amount
             truck.cargo['coal'] += amount
+            self.trade('price', amount)
 
-    class DexGasStation:
+    class DexGasStation(Market):
         """Represents Dex's gas station."""
 
-        def __init__(self) -> None:
+        # Every liter bought raises the price by 1%
+        price = MarketPrice(0.01)
+
+        def __init__(self, world=None) -> None:
             """Initialize Dex's gas station with fuel's price."""
+            super().__init__(world)
             # Price is for 1 liter of fuel.
             self.price = 1
 
@@ -149,13 +395,47 @@ class World:
                 return
             hero.cash -= int(amount * self.price)
             truck.fuel += amount
+            self.trade('price', amount)
+
+    class Factory(Market):
+        """Represents the factory in Brackenbridge, it buys coal and scrap."""
+
+        # Every ton sold lowers the price by 3%, the price recovers in a few days
+        DERIVED = ('coal_price', 'scrap_price')
+        coal_price = MarketPrice(-0.03, 1440)
+        scrap_price = MarketPrice(-0.03, 1440)
+
+        def __init__(self, world=None) -> None:
+            """Initialize the factory with its prices per ton."""
+            super().__init__(world)
+            self.coal_price = 12
+            self.scrap_price = 23
+
+    class TradingHouse(Market):
+        """Represents the trading house in the mining settlement, it buys corn."""
+
+        # Every ton sold lowers the price by 2%, the price recovers in a few days
+        DERIVED = ('corn_price',)
+        corn_price = MarketPrice(-0.02, 1440)
 
+        def __init__(self, world=None) -> None:
+            """Initialize the trading house with its price per ton."""
+            super().__init__(world)
+            self.corn_price = 45
 
-class Hero:
+
+class Hero(Hashed):
     """Represents the hero and his personal state."""
 
-    def __init__(self):
+    # Hero gets hungry and tired with the game time, 2 points per hour
+    DERIVED = ('fatigue', 'hanger')
+    fatigue = Decaying(2, 60, '_now')
+    hanger = Decaying(2, 60, '_now')
+
+    def __init__(self, world: World | None = None):
         """Initialize the hero with default health, hanger, fatigue, cash."""
+        # Clock of needs (no decay without the world)
+        self._world = world
         self.health = 100
         self.fatigue = 100
         self.hanger = 100
@@ -165,6 +445,10 @@ class Hero:
         self.stingrays_member = False
         self.swims_qty = 0
 
+    def _now(self) -> int:
+        """Helper: game time for needs."""
+        return self._world.current_time if self._world is not None else 0
+
     def is_ammo(self) -> str:
         """Checks if the character has weapon and ammo."""
         text = ''
@@ -185,33 +469,62 @@ class Hero:
         return ''
 
 
-class Truck:
+class Truck(Hashed):
     """Represents the truck and its state."""
 
+    # Deliveries are an index of contracts by destination, contracts are hashed
+    UNHASHED = ('deliveries',)
+
+    # The truck wears by 2% every 100 km
+    DERIVED = ('truck_condition',)
+    truck_condition = Decaying(2, 100, '_mileage')
+
     def __init__(self) -> None:
         """Initialize the truck with default truck condition, fuel, space available."""
+        # Kilometers driven, the clock of the truck wear
+        self.mileage = 0
         self.truck_condition = 100
         self.fuel = 100
         self.truck_space = 10
         self.cargo = {'coal': 0, 'corn': 0, 'scrap': 0}
         self.avg_speed = 70  # Assume the average truck speed is 70 km/h
         self.avg_fuel_consumption = 10  # Assume the average truck fuel consumption is 12 l/100km
-        self.passenger = {}
+        # Accepted delivery contracts (contract id -> Contract)
+        # and their ids by destination to check them on arrival
+        self.contracts = {}
+        self.deliveries = {}
+        self.passenger_seats = 1
         self.upgrade_load_capacity = False
         self.blades_on_wheels = False
 
+    def _mileage(self) -> int:
+        """Helper: clock of the truck wear."""
+        return self.mileage
 
-class GameState:
-    """Main container for the game state."""
 
-    def __init__(self) -> None:
-        """Initialize the full game state with default world, hero and truck."""
-        self.world = World()
-        self.hero = Hero()
+class GameState(Hashed):
+    """
+    Main container for the game state.
+
+    The state is hashed incrementally (see zobrist.py): after the first call
+    of state_hash() every change of a field updates the hash in O(1).
+    Content and the history of visits are not part of the state hash.
+    """
+
+    UNHASHED = ('locations', 'visited_locations', 'visited_options', 'route', 'choices')
+
+    def __init__(self, traffic_seed: int | None = None) -> None:
+        """
+        Initialize the full game state with default world, hero and truck.
+
+        :param traffic_seed: seed of NPC traffic, reproducible runs pass their own.
+        """
+        self.world = World(traffic_seed)
+        self.hero = Hero(self.world)
         self.truck = Truck()
         self.locations = {}
         # List of options hidden from the player
-        self.invisible_options = {
+        self.invisible_options = BitSet(OPTION_IDS, {
             'biker_defeated',
             'go_to_rockers_is_stingray',
             'treat_everyone_is_stingray',
@@ -227,7 +540,36 @@ class GameState:
             'order_cactus',
             'wait_restaurant_opening',
             'three_swims',
-        }
+        })
+
+        # Locations and options the player has already seen (for fog of war and analytics)
+        self.visited_locations = BitSet(LOCATION_IDS)
+        self.visited_options = BitSet(OPTION_IDS)
+        # Locations in the order of visits and options with engine actions (for the run history)
+        self.route = []
+        self.choices = []
 
         # Randomly selected event for the hero's walk around the city
         self.discover_city_event = None
+
+        # Dialogue level of the current location (ids of opened options)
+        self.options_stack = []
+
+    def assign(self, other: 'GameState') -> None:
+        """
+        Make the state equal to the other one.
+
+        The state object stays the same, so the engine and compiled
+        options keep working with it (and its hash stays incremental).
+        """
+        assign_fields(self, other)
+
+    def state_hash(self) -> int:
+        """
+        64-bit hash of the game state, equal states have equal hashes in any process.
+
+        Hashing starts with the first call, the game without solvers does not pay for it.
+        """
+        if self._zobrist is None:
+            track(self)
+        return self._zobrist.value
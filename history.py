@@ -0,0 +1,217 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+from typing import NamedTuple
+
+from bots import TRADE_LOOP, RandomBot, ScriptedBot, play
+from game_state import GameState
+
+HISTORY_FILE = 'runs.db'
+# The run ends when the hero leaves the planet
+FINISH_OPTION = 'leave_planet'
+# Runs written in one transaction by simulations
+BATCH_SIZE = 10000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    source TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    days INTEGER NOT NULL,
+    minutes INTEGER NOT NULL,
+    cash INTEGER NOT NULL,
+    route TEXT NOT NULL,
+    choices TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_best ON runs (days, cash DESC);
+CREATE INDEX IF NOT EXISTS runs_player_best ON runs (player, days, cash DESC);
+'''
+
+# Runs are ranked by days on the planet, then by cash
+ORDER = 'ORDER BY days, cash DESC'
+
+
+class Run(NamedTuple):
+    """
+    Finished run of the game.
+
+    - source: 'game' for real sessions, 'simulation' for bots;
+    - days: days on the planet (World.show_days), minutes: game time;
+    - route: locations in the order of visits;
+    - choices: options with engine actions (buying, repairs, contracts...).
+    """
+    player: str
+    source: str
+    finished_at: float
+    days: int
+    minutes: int
+    cash: int
+    route: tuple
+    choices: tuple
+
+
+def run_of(state, player: str, source: str = 'game') -> Run:
+    """Run of the finished game state."""
+    world = state.world
+    return Run(player, source, time.time(), world.show_days(), world.current_time, state.hero.cash,
+               tuple(state.route), tuple(state.choices))
+
+
+def _row(run: Run) -> tuple:
+    """Helper: table row of the run (route and choices are joined with '|')."""
+    return (run.player, run.source, run.finished_at, run.days, run.minutes, run.cash,
+            '|'.join(run.route), '|'.join(run.choices))
+
+
+def _run(row: tuple) -> Run:
+    """Helper: run of the table row."""
+    player, source, finished_at, days, minutes, cash, route, choices = row
+    return Run(player, source, finished_at, days, minutes, cash,
+               tuple(route.split('|')) if route else (), tuple(choices.split('|')) if choices else ())
+
+
+class RunHistory:
+    """
+    Finished runs in a SQLite database in WAL mode.
+
+    Runs are buffered and written in one transaction for the batch,
+    so simulations of millions of runs don't pay a commit (and a WAL sync) per run.
+    The ranking is kept in indexes by (days, cash) and by (player, days, cash),
+    top-N queries read only N index entries however many runs there are.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE, batch_size: int = BATCH_SIZE) -> None:
+        """Open the history (the database is created if it doesn't exist)."""
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        # In WAL mode a crash loses at most the last transactions, the database stays consistent
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def add(self, run: Run) -> None:
+        """Add the run, it is written with the batch (see flush)."""
+        self.pending.append(_row(run))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending runs in one transaction."""
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO runs (player, source, finished_at, days, minutes, cash, route, choices) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self.pending,
+            )
+        self.pending = []
+
+    def close(self) -> None:
+        """Write pending runs and close the database."""
+        self.flush()
+        self.connection.close()
+
+    def top(self, n: int = 10, source: str | None = None) -> list:
+        """Best runs of all players (the fewest days, then the most cash)."""
+        columns = 'player, source, finished_at, days, minutes, cash, route, choices'
+        if source is None:
+            rows = self.connection.execute(f'SELECT {columns} FROM runs {ORDER} LIMIT ?', (n,))
+        else:
+            rows = self.connection.execute(f'SELECT {columns} FROM runs WHERE source = ? {ORDER} LIMIT ?',
+                                           (source, n))
+        return [_run(row) for row in rows]
+
+    def best(self, player: str, n: int = 10) -> list:
+        """Best runs of the player."""
+        rows = self.connection.execute(
+            'SELECT player, source, finished_at, days, minutes, cash, route, choices '
+            f'FROM runs WHERE player = ? {ORDER} LIMIT ?',
+            (player, n),
+        )
+        return [_run(row) for row in rows]
+
+    def count(self, player: str | None = None) -> int:
+        """Number of runs (of the player, if given)."""
+        if player is None:
+            return self.connection.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+        return self.connection.execute('SELECT COUNT(*) FROM runs WHERE player = ?', (player,)).fetchone()[0]
+
+    def rank(self, run: Run) -> int:
+        """Place the run would take in the top (1 is the best)."""
+        return 1 + self.connection.execute(
+            'SELECT COUNT(*) FROM runs WHERE days < ? OR (days = ? AND cash > ?)',
+            (run.days, run.days, run.cash),
+        ).fetchone()[0]
+
+
+def simulate(task: tuple) -> Run | None:
+    """Play one game with the bot (see bots.py), :return: the run or None if the game hasn't finished."""
+    # The session records runs with this module
+    from session import GameSession
+
+    seed, bot, max_steps = task
+    random.seed(seed)
+    session = GameSession(GameState(traffic_seed=seed))
+    session.show_location('Spaceport')
+    player = ScriptedBot(TRADE_LOOP) if bot == 'trade' else RandomBot(seed)
+    play(session, player, max_steps)
+    if FINISH_OPTION not in session.state.visited_options:
+        return None
+    return run_of(session.state, f'{bot}-bot', 'simulation')
+
+
+def _print_runs(runs: list) -> None:
+    """Helper: one line per run."""
+    for place, run in enumerate(runs, 1):
+        print(f'{place:3}. {run.player:20} {run.days:3} days {run.cash:6} cr  '
+              f'{len(run.route)} locations, {len(run.choices)} choices ({run.source})')
+
+
+def main(argv=None) -> None:
+    """Run history from the command line: the leaderboard, runs of a player or simulations."""
+    parser = argparse.ArgumentParser(description='History of finished Space Saga runs.')
+    parser.add_argument('--db', default=HISTORY_FILE, help='SQLite database of runs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    top = commands.add_parser('top', help='the best runs')
+    top.add_argument('-n', type=int, default=10)
+    player = commands.add_parser('player', help='the best runs of the player')
+    player.add_argument('name')
+    player.add_argument('-n', type=int, default=10)
+    simulation = commands.add_parser('simulate', help='play games with bots and record finished runs')
+    simulation.add_argument('--games', type=int, default=100)
+    simulation.add_argument('--bot', choices=('trade', 'random'), default='trade')
+    simulation.add_argument('--max-steps', type=int, default=1000)
+    simulation.add_argument('--seed', type=int, default=0)
+    simulation.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.db)
+    try:
+        if args.command == 'top':
+            _print_runs(history.top(args.n))
+        elif args.command == 'player':
+            _print_runs(history.best(args.name, args.n))
+            print(f'{history.count(args.name)} runs')
+        else:
+            tasks = [(seed, args.bot, args.max_steps) for seed in range(args.seed, args.seed + args.games)]
+            finished = 0
+            with multiprocessing.get_context('spawn').Pool(args.workers) as pool:
+                for run in pool.imap_unordered(simulate, tasks, chunksize=8):
+                    if run is not None:
+                        history.add(run)
+                        finished += 1
+            history.flush()
+            print(f'{finished} of {args.games} games finished, {history.count()} runs in {args.db}')
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+import hashlib
+import multiprocessing
+import os
+import resource
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+from game_state import GameState
+from session import GameSession
+
+START_LOCATION = 'Spaceport'
+# Seconds to wait until a started worker listens on its socket
+START_TIMEOUT = 10
+
+
+def rss_kb() -> int:
+    """
+    Memory of this process in KB: the current resident set size on Linux (/proc/self/statm),
+    the peak one where it is not available.
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pages * resource.getpagesize() // 1024
+
+
+class HostingError(RuntimeError):
+    """Request failed in the worker (unknown session, session already exists...)."""
+
+
+class Worker:
+    """
+    Game sessions of one worker process.
+
+    Requests are tuples (command, *arguments), the answer is ('ok', result)
+    or ('error', message). Sessions are moved between workers as snapshots
+    (see GameSession.snapshot), game content is loaded by every worker itself.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the worker without sessions."""
+        # Session id -> GameSession
+        self.sessions = {}
+        self.commands = {
+            'new': self.new,
+            'view': self.view,
+            'select': self.select,
+            'snapshot': self.snapshot,
+            'load': self.load,
+            'drop': self.drop,
+            'list': self.session_ids,
+            'stats': self.stats,
+        }
+
+    def _session(self, session_id: str) -> GameSession:
+        """
+        Helper: the session by id.
+
+        :raise HostingError: if there is no such session.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HostingError(f'Unknown session: {session_id}')
+        return session
+
+    def _add(self, session_id: str) -> GameSession:
+        """
+        Helper: new session with the new game.
+
+        :raise HostingError: if the session already exists.
+        """
+        if session_id in self.sessions:
+            raise HostingError(f'Session already exists: {session_id}')
+        session = GameSession(GameState())
+        self.sessions[session_id] = session
+        return session
+
+    def new(self, session_id: str) -> tuple:
+        """Start the game, :return: the view (see view)."""
+        self._add(session_id).show_location(START_LOCATION)
+        return self.view(session_id)
+
+    def view(self, session_id: str) -> tuple:
+        """What the player sees: (text, list of ShownOption)."""
+        session = self._session(session_id)
+        return session.text, session.options
+
+    def select(self, session_id: str, option_id: str) -> tuple:
+        """
+        Select the option, :return: the view after it.
+
+        :raise OptionError: if the option is not shown to the player or is disabled.
+        """
+        self._session(session_id).select(option_id)
+        return self.view(session_id)
+
+    def snapshot(self, session_id: str) -> bytes:
+        """Snapshot of the session, the session stays here until it is dropped."""
+        return self._session(session_id).snapshot()
+
+    def load(self, session_id: str, data: bytes) -> None:
+        """Continue the session from the snapshot made by another worker."""
+        session = self._add(session_id)
+        try:
+            session.restore(data)
+        except Exception:
+            del self.sessions[session_id]
+            raise
+
+    def drop(self, session_id: str) -> None:
+        """Forget the session (it has moved to another worker)."""
+        self.sessions.pop(session_id, None)
+
+    def session_ids(self) -> list:
+        """Ids of sessions of the worker."""
+        return list(self.sessions)
+
+    def stats(self) -> dict:
+        """Number of sessions, the current (see rss_kb) and the peak memory of the worker process in KB."""
+        return {
+            'sessions': len(self.sessions),
+            'rss_kb': rss_kb(),
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+
+    def serve(self, connection) -> bool:
+        """
+        Answer requests of the connection until it is closed.
+
+        :return: False if the worker is asked to stop.
+        """
+        while True:
+            try:
+                command, *args = connection.recv()
+            except EOFError:
+                return True
+            if command == 'stop':
+                connection.send(('ok', None))
+                return False
+            handler = self.commands.get(command)
+            try:
+                if handler is None:
+                    raise HostingError(f'Unknown command: {command}')
+                connection.send(('ok', handler(*args)))
+            except Exception as e:
+                connection.send(('error', f'{type(e).__name__}: {e}'))
+
+
+def serve(address: str) -> None:
+    """Run the worker on the Unix socket until the stop request."""
+    if os.path.exists(address):
+        os.unlink(address)
+    worker = Worker()
+    with Listener(address, family='AF_UNIX') as listener:
+        while True:
+            with listener.accept() as connection:
+                if not worker.serve(connection):
+                    return
+
+
+def _weight(session_id: str, worker: str) -> bytes:
+    """Helper: rendezvous hash of the session on the worker."""
+    return hashlib.blake2b(f'{session_id}:{worker}'.encode(), digest_size=8).digest()
+
+
+class Router:
+    """
+    Sessions spread over worker processes on one machine, connected by Unix sockets.
+
+    The worker of a session is chosen by rendezvous hashing of its id among active workers,
+    so when a worker is drained or added only sessions of that worker move.
+    A session is moved with its snapshot: the new worker loads it before the old one
+    drops it, requests to the session wait for the move and go to the new worker.
+    Rolling restarts drain a worker, restart it and bring its sessions back.
+    """
+
+    def __init__(self, directory: str, workers: int = os.cpu_count() or 1) -> None:
+        """Start workers with sockets in the directory."""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.context = multiprocessing.get_context('spawn')
+        self.processes = {}
+        self.connections = {}
+        # Worker -> lock of its connection (one request at a time)
+        self.locks = {}
+        self.active = []
+        # Session id -> worker
+        self.placement = {}
+        for i in range(workers):
+            self.start(f'worker-{i}')
+
+    def address(self, worker: str) -> str:
+        """Unix socket of the worker."""
+        return os.path.join(self.directory, f'{worker}.sock')
+
+    def start(self, worker: str) -> None:
+        """
+        Start the worker process and make it active.
+
+        :raise HostingError: if the worker doesn't listen in START_TIMEOUT seconds.
+        """
+        address = self.address(worker)
+        process = self.context.Process(target=serve, args=(address,), daemon=True)
+        process.start()
+        deadline = time.monotonic() + START_TIMEOUT
+        while True:
+            try:
+                connection = Client(address, family='AF_UNIX')
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline or not process.is_alive():
+                    process.kill()
+                    raise HostingError(f'{worker} has not started')
+                time.sleep(0.01)
+        self.processes[worker] = process
+        self.connections[worker] = connection
+        self.locks.setdefault(worker, threading.Lock())
+        if worker not in self.active:
+            self.active.append(worker)
+
+    def stop(self, worker: str) -> None:
+        """Stop the worker process (its sessions are lost, drain it first)."""
+        if worker in self.active:
+            self.active.remove(worker)
+        with self.locks[worker]:
+            connection = self.connections.pop(worker)
+            connection.send(('stop',))
+            connection.recv()
+            connection.close()
+        self.processes.pop(worker).join()
+
+    def close(self) -> None:
+        """Stop all workers."""
+        for worker in list(self.processes):
+            self.stop(worker)
+
+    def home(self, session_id: str) -> str:
+        """Worker the session belongs to by its id."""
+        return max(self.active, key=lambda worker: _weight(session_id, worker))
+
+    def _call(self, worker: str, *request):
+        """
+        Helper: send the request to the worker (its lock must be held).
+
+        :raise HostingError: if the request failed.
+        """
+        connection = self.connections[worker]
+        connection.send(request)
+        status, result = connection.recv()
+        if status != 'ok':
+            raise HostingError(f'{worker}: {result}')
+        return result
+
+    def request(self, session_id: str, *request):
+        """Send the request about the session to its worker (e.g. 'select', option_id)."""
+        while True:
+            worker = self.placement.get(session_id) or self.home(session_id)
+            with self.locks[worker]:
+                # The session could move while the request waited for the worker
+                if (self.placement.get(session_id) or self.home(session_id)) == worker:
+                    return self._call(worker, request[0], session_id, *request[1:])
+
+    def new_session(self, session_id: str) -> tuple:
+        """Start the game of the session, :return: the view (text, options)."""
+        worker = self.home(session_id)
+        self.placement[session_id] = worker
+        return self.request(session_id, 'new')
+
+    def end_session(self, session_id: str) -> None:
+        """Finish the game of the session, the worker forgets it."""
+        self.request(session_id, 'drop')
+        self.placement.pop(session_id, None)
+
+    def select(self, session_id: str, option_id: str) -> tuple:
+        """Select the option in the session, :return: the view (text, options)."""
+        return self.request(session_id, 'select', option_id)
+
+    def view(self, session_id: str) -> tuple:
+        """What the player of the session sees: (text, options)."""
+        return self.request(session_id, 'view')
+
+    def stats(self, worker: str) -> dict:
+        """Number of sessions and the memory of the worker (see Worker.stats)."""
+        with self.locks[worker]:
+            return self._call(worker, 'stats')
+
+    def sessions(self, worker: str) -> list:
+        """Ids of sessions on the worker."""
+        return [session_id for session_id, placed in self.placement.items() if placed == worker]
+
+    def migrate(self, session_id: str, target: str) -> None:
+        """Move the session to the worker (e.g. from an overloaded one) through its snapshot."""
+        source = self.placement[session_id]
+        if source == target:
+            return
+        first, second = sorted((source, target))
+        with self.locks[first], self.locks[second]:
+            data = self._call(source, 'snapshot', session_id)
+            self._call(target, 'load', session_id, data)
+            self.placement[session_id] = target
+            self._call(source, 'drop', session_id)
+
+    def drain(self, worker: str) -> int:
+        """
+        Move all sessions from the worker to other active workers, new sessions don't go there.
+
+        :return: number of moved sessions.
+        :raise HostingError: if the worker is the last active one (its sessions have nowhere to go).
+        """
+        if worker in self.active:
+            if len(self.active) == 1:
+                raise HostingError(f'{worker} is the last active worker')
+            self.active.remove(worker)
+        sessions = self.sessions(worker)
+        for session_id in sessions:
+            self.migrate(session_id, self.home(session_id))
+        return len(sessions)
+
+    def rebalance(self) -> int:
+        """
+        Move sessions to their home workers (e.g. after a restart).
+
+        :return: number of moved sessions.
+        """
+        moved = 0
+        for session_id, worker in list(self.placement.items()):
+            home = self.home(session_id)
+            if worker != home:
+                self.migrate(session_id, home)
+                moved += 1
+        return moved
+
+    def restart(self, worker: str) -> None:
+        """
+        Restart the worker without stopping games: drain, restart and rebalance.
+
+        The last active worker is drained to a spare worker, which is stopped after the restart.
+        """
+        spare = None
+        if self.active == [worker]:
+            spare = f'{worker}-spare'
+            self.start(spare)
+        self.drain(worker)
+        self.stop(worker)
+        self.start(worker)
+        if spare is not None:
+            self.drain(spare)
+            self.stop(spare)
+        self.rebalance()
@@ -0,0 +1,256 @@
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from bots import TRADE_LOOP, MixBot, RandomBot, ScriptedBot, option_kinds
+from content import load_locations
+from game_state import GameState
+from hosting import START_LOCATION, Router, rss_kb
+from session import GameSession
+
+# Bot name -> function making the bot (option kinds, seed)
+BOTS = {
+    'mix': lambda kinds, seed: MixBot(kinds, seed=seed),
+    'random': lambda kinds, seed: RandomBot(seed),
+    'trade': lambda kinds, seed: ScriptedBot(TRADE_LOOP),
+}
+
+# Bots which read the game state, not only the shown options (local sessions only)
+LOCAL_BOTS = ('trade',)
+
+# Results compared with the baseline: name -> True if a bigger value is better
+COMPARED = {'throughput': True, 'p50_ms': False, 'p99_ms': False, 'memory_kb_per_session': False}
+
+
+class LocalClient:
+    """Bot playing a session in this process."""
+
+    def __init__(self, bot) -> None:
+        """Start the game for the bot."""
+        self.bot = bot
+        self.session = GameSession(GameState())
+        self.session.show_location(START_LOCATION)
+
+    def step(self) -> bool:
+        """Select the option chosen by the bot, :return: False if the bot has finished."""
+        option_id = self.bot.choose(self.session)
+        if option_id is None:
+            return False
+        self.session.select(option_id)
+        return True
+
+    def snapshot_size(self) -> int:
+        """Size of the session snapshot in bytes."""
+        return len(self.session.snapshot())
+
+    def close(self) -> None:
+        """Finish the game."""
+
+
+class RemoteClient:
+    """Bot playing a session on the worker process through the router (see Router)."""
+
+    def __init__(self, bot, router: Router, session_id: str) -> None:
+        """Start the game for the bot."""
+        self.bot = bot
+        self.router = router
+        self.session_id = session_id
+        _, self.options = router.new_session(session_id)
+
+    def step(self) -> bool:
+        """Select the option chosen by the bot, :return: False if the bot has finished."""
+        option_id = self.bot.choose(self)
+        if option_id is None:
+            return False
+        _, self.options = self.router.select(self.session_id, option_id)
+        return True
+
+    def snapshot_size(self) -> int:
+        """Size of the session snapshot in bytes."""
+        return len(self.router.request(self.session_id, 'snapshot'))
+
+    def close(self) -> None:
+        """Finish the game, the worker forgets the session."""
+        self.router.end_session(self.session_id)
+
+
+def _memory_kb(router: Router | None) -> int:
+    """Helper: current memory of this process or of all active workers of the router in KB."""
+    if router is None:
+        return rss_kb()
+    return sum(router.stats(worker)['rss_kb'] for worker in router.active)
+
+
+def percentile(times: list, share: float) -> float:
+    """Value below which the share of sorted times lies (nearest rank)."""
+    if not times:
+        return 0.0
+    return times[min(len(times) - 1, int(share * len(times)))]
+
+
+def run(clients: int = 100, steps: int = 100, bot: str = 'mix', workers: int = 0,
+        threads: int = 1, seed: int = 0, report=print) -> dict:
+    """
+    Let bots play concurrent games and measure the session layer.
+
+    Every client selects steps options, a bot which has finished its game starts a new one.
+    Clients are split between threads, every thread plays its clients in turns.
+
+    :param workers: number of worker processes (see Router), 0 plays sessions in this process.
+    :return: results: throughput (selections per second), latency percentiles,
+        memory and snapshot size per session.
+    :raise FileNotFoundError: if there are no locations (the test is run outside the game directory).
+    """
+    locations = load_locations()
+    if not locations:
+        raise FileNotFoundError('No locations: run the load test from the game directory')
+    kinds = option_kinds(locations)
+    seeds = itertools.count(seed)
+    ids = itertools.count()
+    router = None
+    directory = None
+    if workers:
+        directory = tempfile.mkdtemp(prefix='space-saga-')
+        router = Router(directory, workers)
+    memory_before = _memory_kb(router)
+
+    def make_client():
+        new_bot = BOTS[bot](kinds, next(seeds))
+        if router is None:
+            return LocalClient(new_bot)
+        return RemoteClient(new_bot, router, f'bot-{next(ids)}')
+
+    try:
+        started = time.perf_counter()
+        players = [make_client() for _ in range(clients)]
+        report(f'{clients} sessions started in {time.perf_counter() - started:.2f} s')
+        # The peak memory is usually reached before the sessions (while modules and content load),
+        # so sessions are measured by the growth of the current memory
+        memory_after = _memory_kb(router)
+
+        latencies = [[] for _ in range(threads)]
+        games = [0] * threads
+
+        def play(thread: int) -> None:
+            mine = list(range(thread, clients, threads))
+            times = latencies[thread]
+            clock = time.perf_counter
+            for _ in range(steps):
+                for i in mine:
+                    start = clock()
+                    playing = players[i].step()
+                    times.append(clock() - start)
+                    if not playing:
+                        players[i].close()
+                        players[i] = make_client()
+                        games[thread] += 1
+
+        started = time.perf_counter()
+        if threads == 1:
+            play(0)
+        else:
+            pool = [threading.Thread(target=play, args=(thread,)) for thread in range(threads)]
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+        seconds = time.perf_counter() - started
+
+        sample = players[:min(clients, 20)]
+        snapshot_size = statistics.fmean(player.snapshot_size() for player in sample) if sample else 0
+    finally:
+        if router is not None:
+            router.close()
+            os.rmdir(directory)
+
+    times = sorted(itertools.chain.from_iterable(latencies))
+    return {
+        'clients': clients,
+        'steps': len(times),
+        'games': sum(games),
+        'seconds': seconds,
+        'throughput': len(times) / seconds if seconds else 0.0,
+        'p50_ms': percentile(times, 0.5) * 1000,
+        'p90_ms': percentile(times, 0.9) * 1000,
+        'p99_ms': percentile(times, 0.99) * 1000,
+        'max_ms': times[-1] * 1000 if times else 0.0,
+        'memory_kb_per_session': max(memory_after - memory_before, 0) / clients if clients else 0.0,
+        'snapshot_bytes': snapshot_size,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Results which are worse than the baseline by more than the threshold share.
+
+    :return: lines about regressions (empty if there are none).
+    """
+    regressions = []
+    for name, bigger_is_better in COMPARED.items():
+        old = baseline.get(name)
+        new = results.get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if bigger_is_better else change) > threshold:
+            regressions.append(f'{name}: {old:.3f} -> {new:.3f} ({change:+.1%})')
+    return regressions
+
+
+def main(argv=None) -> int:
+    """Run the load test from the command line, :return: exit code (1 if results regressed)."""
+    parser = argparse.ArgumentParser(description='Load test of Space Saga sessions with bots.')
+    parser.add_argument('--clients', type=int, default=1000, help='concurrent sessions')
+    parser.add_argument('--steps', type=int, default=50, help='options selected by every client')
+    parser.add_argument('--bot', choices=sorted(BOTS), default='mix')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes behind the router (0 plays sessions in this process)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='client threads (default: 1 without workers, 2 per worker with them)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='save results as json (e.g. as the baseline)')
+    parser.add_argument('--compare', metavar='PATH', help='compare results with the saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='worsening treated as a regression (default: 0.1 is 10%%)')
+    args = parser.parse_args(argv)
+    if args.workers and args.bot in LOCAL_BOTS:
+        parser.error(f'{args.bot} bot reads the game state, it plays without --workers only')
+    threads = args.threads or (2 * args.workers if args.workers else 1)
+
+    try:
+        results = run(args.clients, args.steps, args.bot, args.workers, threads, args.seed)
+    except FileNotFoundError as e:
+        print(e)
+        return 2
+    print(f'{results["steps"]} selections in {results["seconds"]:.2f} s, '
+          f'{results["throughput"]:.0f} per second, {results["games"]} games finished')
+    print(f'latency: p50 {results["p50_ms"]:.3f} ms  p90 {results["p90_ms"]:.3f} ms  '
+          f'p99 {results["p99_ms"]:.3f} ms  max {results["max_ms"]:.3f} ms')
+    print(f'memory: {results["memory_kb_per_session"]:.1f} KB per session, '
+          f'snapshot {results["snapshot_bytes"]:.0f} bytes')
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f'Baseline {args.compare} was not found.')
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
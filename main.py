@@ -1,7 +1,35 @@
+import sys
+
+from autosave import SAVE_FILE
 from game_state import GameState
 from gui import SpaceSaga
+from history import RunHistory
+from shared_world import SharedWorld
+from telemetry import Telemetry
 
 if __name__ == '__main__':
     state = GameState()
-    app = SpaceSaga(state)
+    # Run with --shared-world=PATH to share stocks of stations with other players (SQLite file)
+    for arg in sys.argv[1:]:
+        if arg.startswith('--shared-world='):
+            state.world.share(SharedWorld(arg.partition('=')[2]))
+    # Run with --history=PATH to record finished runs in the SQLite database
+    history = None
+    for arg in sys.argv[1:]:
+        if arg.startswith('--history='):
+            history = RunHistory(arg.partition('=')[2])
+    # Run with --telemetry to record every action in the telemetry directory
+    telemetry = Telemetry() if '--telemetry' in sys.argv else None
+    # Run with --autosave[=PATH] to continue the saved game and save it in the background
+    save_path = None
+    for arg in sys.argv[1:]:
+        if arg == '--autosave' or arg.startswith('--autosave='):
+            save_path = arg.partition('=')[2] or SAVE_FILE
+    # Run with --hot-reload to apply changes of location_actions.json on the fly
+    app = SpaceSaga(state, hot_reload='--hot-reload' in sys.argv, history=history, telemetry=telemetry,
+                    save_path=save_path)
     app.run()
+    if history is not None:
+        history.close()
+    if telemetry is not None:
+        telemetry.close()
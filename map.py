@@ -1,3 +1,8 @@
+import itertools
+import unicodedata
+
+from traffic import road_route
+
 MAP = """
              💎════🌽════💀
              ║     ║
@@ -29,4 +34,182 @@ MAP_LEGEND ="""💎 - Forsaken Iridium Mines
 🌊 - Forest Lake
 ⛏ - Mining Settlement
 🏪 - Dex’s Fuel Station
-"""
\ No newline at end of file
+"""
+# Symbol on the map -> locations it stands for
+MAP_LOCATIONS = {
+    '💎': ('Forsaken Iridium Mines - West', 'Forsaken Iridium Mines - East'),
+    '🌽': ('Corn Farm',),
+    '💀': ('Hyenas Hideout',),
+    '🍺': ('The Stingray Bar',),
+    '⛽': ("Gruber's Fuel Station",),
+    '🔧': ("Bolt's Garage",),
+    '🏠': ('Brackenbridge',),
+    '⚙️': ('Wreckyard',),
+    '⛰️': ('The Endless Rift',),
+    '🚀': ('Spaceport',),
+    '🏞️': ('Erratic Rocks',),
+    '👮': ('Marshal',),
+    '🌊': ('Forest Lake',),
+    '⛏️': ('Mining Settlement',),
+    '🏪': ("Dex's Fuel Station",),
+}
+
+# Road symbol -> directions (row, column) it connects
+ROAD_SYMBOLS = {
+    '═': ((0, -1), (0, 1)),
+    '║': ((-1, 0), (1, 0)),
+    '╝': ((0, -1), (-1, 0)),
+    '╚': ((0, 1), (-1, 0)),
+    '╗': ((0, -1), (1, 0)),
+    '╔': ((0, 1), (1, 0)),
+}
+
+CURRENT_STYLE = 'black on red'
+DESTINATION_STYLE = 'black on yellow'
+ROUTE_STYLE = 'yellow'
+
+
+def _width(symbol: str) -> int:
+    """Helper: columns the symbol takes on the screen (wide characters take two)."""
+    return 2 if unicodedata.east_asian_width(symbol[0]) in 'WF' else 1
+
+
+class MapFrames:
+    """
+    Frames of the map with the current location and the planned route highlighted.
+
+    The map is parsed once into symbols with their screen columns, locations are found
+    by their symbols (MAP_LOCATIONS) and roads are traced between them.
+    The frame of every location is rendered in advance, a frame with a route
+    is rendered on its first use and kept, so moving around and looking
+    at destinations only picks a ready string.
+    """
+
+    def __init__(self, roads: dict, text: str = MAP) -> None:
+        """Parse the map and render frames of locations on the road graph (see traffic.road_graph)."""
+        self.roads = roads
+        # Symbols of every line, and (line, screen column) -> (line, symbol index) for every column they take
+        self.lines = []
+        self.grid = {}
+        for row, line in enumerate(text.split('\n')):
+            symbols = []
+            for char in line:
+                # Variation selector belongs to the emoji before it
+                if char == '\ufe0f' and symbols:
+                    symbols[-1] += char
+                else:
+                    symbols.append(char)
+            column = 0
+            for i, symbol in enumerate(symbols):
+                for _ in range(_width(symbol)):
+                    self.grid[row, column] = (row, i)
+                    column += 1
+            self.lines.append(symbols)
+
+        # Location -> (line, symbol index, first column, last column)
+        self.nodes = {}
+        for (row, column), (_, i) in self.grid.items():
+            names = MAP_LOCATIONS.get(self.lines[row][i], ())
+            for name in names:
+                first = self.nodes.get(name, (row, i, column, column))[2]
+                self.nodes[name] = (row, i, first, column)
+
+        # Road (pair of locations in sorted order) -> its symbols on the map
+        self.paths = {}
+        symbol_roads = {}
+        for name, node in self.nodes.items():
+            for end, cells in self._trace(node):
+                symbol_roads[node[:2], end] = cells
+        for road in roads:
+            first, second = (self.nodes.get(name) for name in road)
+            if first and second and (first[:2], second[:2]) in symbol_roads:
+                self.paths[road] = symbol_roads[first[:2], second[:2]]
+
+        self.base = self._render({})
+        # Location -> its frame, (location, destination) -> frame with the route
+        self.frames = {name: self._render({node[:2]: CURRENT_STYLE}) for name, node in self.nodes.items()}
+        self.routes = {}
+
+    def _road(self, row: int, column: int, direction: tuple) -> tuple | None:
+        """Helper: road symbol at the screen position connecting in the direction, with its directions."""
+        cell = self.grid.get((row, column))
+        if cell is None:
+            return None
+        directions = ROAD_SYMBOLS.get(self.lines[row][cell[1]], ())
+        return (cell, directions) if direction in directions else None
+
+    def _node(self, row: int, column: int, vertical: bool) -> tuple | None:
+        """
+        Helper: location symbol (line, symbol index) a road reaches at the screen position.
+
+        Wide symbols are drawn one column off the roads above and below them,
+        so a vertical road also reaches a symbol in the next column.
+        """
+        for shift in ((0, -1, 1) if vertical else (0,)):
+            cell = self.grid.get((row, column + shift))
+            if cell and self.lines[row][cell[1]] in MAP_LOCATIONS:
+                return cell
+        return None
+
+    def _trace(self, node: tuple) -> list:
+        """Helper: roads leaving the location symbol as (symbol it leads to, road symbols)."""
+        row, _, first, last = node
+        starts = [(row, first - 1, (0, -1)), (row, last + 1, (0, 1))]
+        starts += [(row + dr, column, (dr, 0)) for dr in (-1, 1) for column in range(first - 1, last + 2)]
+        found = []
+        for row, column, direction in starts:
+            road = self._road(row, column, (-direction[0], -direction[1]))
+            cells = []
+            while road is not None:
+                cell, directions = road
+                cells.append(cell)
+                direction = next(d for d in directions if d != (-direction[0], -direction[1]))
+                row, column = row + direction[0], column + direction[1]
+                road = self._road(row, column, (-direction[0], -direction[1]))
+            if not cells:
+                continue
+            end = self._node(row, column, direction[1] == 0)
+            if end is not None and end != node[:2]:
+                found.append((end, cells))
+        return found
+
+    def _render(self, styles: dict) -> str:
+        """Helper: map text with styled symbols, styles: (line, symbol index) -> style."""
+        lines = []
+        for row, symbols in enumerate(self.lines):
+            # Neighbour symbols of the same style share one markup tag
+            parts = []
+            for style, group in itertools.groupby(range(len(symbols)), key=lambda i: styles.get((row, i))):
+                text = ''.join(symbols[i] for i in group)
+                parts.append(f'[{style}]{text}[/]' if style else text)
+            lines.append(''.join(parts))
+        return '\n'.join(lines)
+
+    def frame(self, location: str, destination: str | None = None) -> str:
+        """
+        Map with the current location and the route to the destination highlighted.
+
+        Locations which are not on the map (road encounters) are not highlighted.
+        """
+        if destination is None or destination == location:
+            return self.frames.get(location, self.base)
+        frame = self.routes.get((location, destination))
+        if frame is None:
+            frame = self._render_route(location, destination)
+            self.routes[location, destination] = frame
+        return frame
+
+    def _render_route(self, location: str, destination: str) -> str:
+        """Helper: frame with the route, the frame of the location if there is no route."""
+        route = road_route(self.roads, location, destination)
+        if route is None or destination not in self.nodes:
+            return self.frame(location)
+        styles = {}
+        for first, second in zip(route.locations, route.locations[1:]):
+            for cell in self.paths.get(tuple(sorted((first, second))), ()):
+                styles[cell] = ROUTE_STYLE
+            styles[self.nodes[second][:2]] = ROUTE_STYLE
+        styles[self.nodes[destination][:2]] = DESTINATION_STYLE
+        if location in self.nodes:
+            styles[self.nodes[location][:2]] = CURRENT_STYLE
+        return self._render(styles)
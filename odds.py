@@ -0,0 +1,398 @@
+import argparse
+import itertools
+import math
+from collections import OrderedDict
+from typing import NamedTuple
+
+from content import load_locations
+from engine import Engine
+from game_state import GameState
+
+# Effects described by distributions
+FIELDS = ('cash', 'time', 'health')
+
+# Options with random results in their dynamic descriptions
+SLOT_MACHINE_OPTION = 'play_slot_machine'
+MINE_WORK_OPTION = 'work_in_mine'
+CITY_EXPLORATION_OPTION = 'discover_city'
+
+# Random parts kept in the cache, the least recently used ones are dropped
+CACHE_SIZE = 4096
+
+
+class Outcome(NamedTuple):
+    """
+    One result of a random mechanic.
+
+    - effects: changes of game values (cash, time, health...);
+    - label: what happened (empty for an ordinary result).
+    """
+    probability: float
+    effects: dict
+    label: str = ''
+
+
+class Distribution:
+    """
+    Discrete distribution of option effects.
+
+    Outcomes are listed explicitly, so means and variances are exact sums
+    instead of Monte Carlo estimates.
+    """
+
+    __slots__ = ('outcomes',)
+
+    def __init__(self, outcomes: list) -> None:
+        """Initialize the distribution with outcomes (probabilities sum to 1)."""
+        self.outcomes = outcomes
+
+    @classmethod
+    def certain(cls, effects: dict | None = None, label: str = '') -> 'Distribution':
+        """Distribution with the single outcome."""
+        return cls([Outcome(1.0, effects or {}, label)])
+
+    def then(self, other: 'Distribution') -> 'Distribution':
+        """Distribution of both independent mechanics: effects are added, labels are joined."""
+        outcomes = []
+        for first, second in itertools.product(self.outcomes, other.outcomes):
+            effects = dict(first.effects)
+            for field, value in second.effects.items():
+                effects[field] = effects.get(field, 0) + value
+            label = ' + '.join(label for label in (first.label, second.label) if label)
+            outcomes.append(Outcome(first.probability * second.probability, effects, label))
+        return Distribution(outcomes)
+
+    def is_certain(self) -> bool:
+        """The distribution has only one outcome."""
+        return len(self.outcomes) == 1
+
+    def mean(self, field: str) -> float:
+        """Expected change of the field."""
+        return sum(outcome.probability * outcome.effects.get(field, 0) for outcome in self.outcomes)
+
+    def variance(self, field: str) -> float:
+        """Variance of the change of the field."""
+        mean = self.mean(field)
+        return sum(outcome.probability * (outcome.effects.get(field, 0) - mean) ** 2 for outcome in self.outcomes)
+
+    def stdev(self, field: str) -> float:
+        """Standard deviation of the change of the field."""
+        return math.sqrt(self.variance(field))
+
+    def chance(self, label: str) -> float:
+        """Probability of outcomes with the label (e.g. encounter id)."""
+        return sum(outcome.probability for outcome in self.outcomes if label in outcome.label.split(' + '))
+
+    def labels(self) -> dict:
+        """Probabilities of labels (empty label is an ordinary result)."""
+        chances = {}
+        for outcome in self.outcomes:
+            chances[outcome.label] = chances.get(outcome.label, 0.0) + outcome.probability
+        return chances
+
+    def summary(self, fields=FIELDS) -> dict:
+        """Field -> (mean, variance)."""
+        return {field: (self.mean(field), self.variance(field)) for field in fields}
+
+
+def slot_machine() -> Distribution:
+    """
+    Payout of the slot machine (see Engine.play_slot_machine).
+
+    Every one of 7³ combinations of reels is equally likely.
+    """
+    counts = {}
+    for reels in itertools.product(range(1, 8), repeat=3):
+        matches = len(set(reels))
+        if matches == 1:
+            result = (25, 'triple match')
+        elif matches == 2:
+            result = (2, 'double match')
+        else:
+            result = (0, '')
+        counts[result] = counts.get(result, 0) + 1
+    total = 7 ** 3
+    return Distribution([
+        Outcome(count / total, {'cash': cash} if cash else {}, label)
+        for (cash, label), count in counts.items()
+    ])
+
+
+def mine_work() -> Distribution:
+    """Pay for an hour in the mine or an accident (see Engine.work_in_mine)."""
+    return Distribution([
+        Outcome(0.25, {'health': -30, 'time': 17}, 'accident'),
+        Outcome(0.375, {'cash': 2}),
+        Outcome(0.375, {'cash': 3}),
+    ])
+
+
+def biker_attack() -> Distribution:
+    """Blow of the biker, on the head or in the stomach (see Engine._biker_attacks)."""
+    return Distribution([
+        Outcome(0.5, {'health': -25}, 'hit on the head'),
+        Outcome(0.5, {'health': -10}, 'hit in the stomach'),
+    ])
+
+
+def encounter(table, location: str | None, hour: int) -> Distribution:
+    """Events of the encounter table, labeled by event ids (nothing happens is not labeled)."""
+    if table is None:
+        return Distribution.certain()
+    return Distribution([
+        Outcome(probability, {}, event['id'] if event else '')
+        for event, probability in table.probabilities(location, hour)
+    ])
+
+
+def police_stop(encounters: dict, location: str | None, hour: int) -> Distribution:
+    """
+    Policeman on the way to the marshal (see Engine.randomize_police_event).
+
+    The hero decides later whether to pay the fine or go to the impound,
+    so both costs are kept: fine, impound_time and impound_truck_condition.
+    """
+    police = encounters.get('police')
+    if police is None:
+        return Distribution.certain()
+    impound = encounter(encounters.get('impound'), location, hour)
+    impound_events = {event['id']: event for event in encounters['impound'].events} if 'impound' in encounters else {}
+
+    outcomes = []
+    for policeman, probability in police.probabilities(location, hour):
+        if policeman is None:
+            outcomes.append(Outcome(probability, {}))
+            continue
+        low, high = policeman['fine']
+        fines = range(low, high + 1)
+        for fine in fines:
+            for result in impound.outcomes:
+                effects = impound_events.get(result.label, {}).get('effects', {})
+                outcomes.append(Outcome(
+                    probability * result.probability / len(fines),
+                    {
+                        'fine': fine,
+                        'impound_time': effects.get('time', 0),
+                        'impound_truck_condition': effects.get('truck_condition', 0),
+                    },
+                    policeman['id'],
+                ))
+    return Distribution(outcomes)
+
+
+def road_traffic(engine: Engine, location: str, destination: str, arrival: int) -> Distribution:
+    """
+    Vehicles stopping the hero on the road (see Engine.randomize_encounter_on_road).
+
+    Vehicles met on the road are known from the traffic, every one stops the hero
+    with the chance of the road table, so a later vehicle needs all earlier ones to pass by.
+    """
+    table = engine.encounters.get('road')
+    if table is None:
+        return Distribution.certain()
+    outcomes = []
+    nothing = 1.0
+    for vehicle in engine.vehicles_on_road(location, destination, arrival):
+        probability = nothing * table.chance
+        outcomes.append(Outcome(probability, {}, vehicle.kind))
+        nothing -= probability
+    outcomes.append(Outcome(nothing, {}))
+    return Distribution(outcomes)
+
+
+def ride_offers(engine: Engine, location: str, option_id: str) -> Distribution:
+    """
+    Ride offers when the hero leaves the location (see Engine.offer_contract).
+
+    Offers are checked one by one, so a later offer needs all earlier ones to fail.
+    Outcomes carry the reward of the contract, nothing happens is not labeled.
+    """
+    outcomes = []
+    nothing = 1.0
+    for contract in engine.contracts.offers_for(location, option_id):
+        if not engine.can_take_contract(contract):
+            continue
+        probability = nothing * contract.offer['chance']
+        outcomes.append(Outcome(probability, dict(contract.reward), f'offer {contract.id}'))
+        nothing -= probability
+    outcomes.append(Outcome(nothing, {}))
+    return Distribution(outcomes)
+
+
+class Odds:
+    """
+    Analytic distributions of option results in the current game state.
+
+    Random parts depend on a few values only (hour, biker mood, free seats,
+    vehicles on the road...), so they are cached by these values: planners and balance
+    tools get numbers without playing thousands of games. The cache keeps CACHE_SIZE
+    buckets and is cleared when the content or the traffic of the game changes
+    (reloaded locations, a restored game with another traffic seed).
+    """
+
+    def __init__(self, engine: Engine, size: int = CACHE_SIZE) -> None:
+        """Initialize with the engine, whose state and tables are used."""
+        self.engine = engine
+        self.state = engine.state
+        self.size = size
+        # Bucket of the state -> distribution of random results, in the order of use
+        self.cache = OrderedDict()
+        # Content and traffic the cached results were computed with
+        self._source = None
+
+    def clear(self) -> None:
+        """Forget cached results."""
+        self.cache.clear()
+
+    def _find(self, location: str, path: tuple) -> dict | None:
+        """Helper: option in the location by options_stack + option id."""
+        option = {'options': self.state.locations.get(location, {}).get('options') or {}}
+        for option_id in path:
+            option = (option.get('options') or {}).get(option_id)
+            if option is None:
+                return None
+        return option
+
+    def _static(self, option: dict) -> dict:
+        """Helper: changes made by option effects (see Engine.apply_effect)."""
+        effects = option.get('effects')
+        if not effects:
+            return {'time': 1}
+
+        static = {}
+        time = effects.get('time', 0)
+        if 'distance' in effects:
+            time += self.engine.drive_cost(effects['distance'])[1]
+        if time:
+            static['time'] = time
+        if 'cash' in effects:
+            static['cash'] = effects['cash']
+        # Hero health max level is 100
+        if 'health' in effects:
+            health = self.state.hero.health
+            static['health'] = min(health + effects['health'], 100) - health
+        return static
+
+    def _bucket(self, location: str, path: tuple, option: dict, hour: int, arrival: int) -> tuple:
+        """Helper: all values random results of the option depend on (vehicles met for roads)."""
+        world = self.state.world
+        takeable = tuple(
+            contract.id for contract in self.engine.contracts.offers_for(location, path[-1])
+            if self.engine.can_take_contract(contract)
+        )
+        vehicles = None
+        if 'goto' in option and not world.active_encounter:
+            vehicles = tuple(vehicle.kind for vehicle in
+                             self.engine.vehicles_on_road(location, option['goto'], arrival))
+        return location, path, hour, vehicles, world.biker_mood, world.active_encounter, takeable
+
+    def _random(self, location: str, path: tuple, option: dict, hour: int, arrival: int) -> Distribution:
+        """Helper: random results of the option, in the order Session.select meets them."""
+        option_id = path[-1]
+        world = self.state.world
+        encounters = self.engine.encounters
+        result = Distribution.certain()
+
+        if option_id == SLOT_MACHINE_OPTION:
+            result = slot_machine()
+        elif option_id == MINE_WORK_OPTION:
+            result = mine_work()
+        elif option_id == CITY_EXPLORATION_OPTION:
+            result = encounter(encounters.get('city_exploration'), location, hour)
+        elif option_id in ('do_nothing_against_biker', 'hit_head', 'hit_stomach'):
+            mood = world.biker_mood
+            # Hit in the stomach worsens the biker's mood before he answers
+            if option_id == 'hit_stomach' and mood is not None and mood <= 3:
+                mood += 1
+            if option_id == 'hit_head' or (mood is not None and mood < 3):
+                result = biker_attack()
+
+        # A ride offer stops the hero before the road
+        offers = ride_offers(self.engine, location, option_id)
+        if 'goto' not in option:
+            travel = Distribution.certain()
+        elif option['goto'] == 'Marshal' and not world.active_encounter:
+            travel = police_stop(encounters, location, hour)
+        elif not world.active_encounter:
+            travel = road_traffic(self.engine, location, option['goto'], arrival)
+        else:
+            travel = Distribution.certain()
+
+        nothing = offers.outcomes[-1].probability
+        outcomes = offers.outcomes[:-1] + [
+            Outcome(nothing * outcome.probability, outcome.effects, outcome.label)
+            for outcome in travel.outcomes
+        ]
+        return result.then(Distribution(outcomes))
+
+    def option(self, location: str, path: tuple) -> Distribution:
+        """
+        Distribution of results of the option in the current game state.
+
+        Covers option effects and random mechanics, not actions with fixed results
+        (selling cargo, repairs...).
+
+        :param path: options_stack + option id (names).
+        """
+        option = self._find(location, path)
+        if option is None:
+            return Distribution.certain()
+
+        static = self._static(option)
+        arrival = self.state.world.current_time + static.get('time', 0)
+        hour = (arrival // 60) % 24
+        source = (self.state.locations, self.state.world.traffic_seed)
+        if self._source is None or self._source[0] is not source[0] or self._source[1] != source[1]:
+            self.clear()
+            self._source = source
+
+        key = self._bucket(location, path, option, hour, arrival)
+        random_part = self.cache.get(key)
+        if random_part is None:
+            random_part = self._random(location, path, option, hour, arrival)
+            self.cache[key] = random_part
+            if len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return Distribution.certain(static).then(random_part)
+
+
+def _walk(options: dict, stack: tuple = ()):
+    """Helper: paths of all options (options_stack + option id)."""
+    for option_id, option in options.items():
+        path = stack + (option_id,)
+        yield path
+        if option.get('options'):
+            yield from _walk(option['options'], path)
+
+
+def main(argv=None) -> None:
+    """Print expected results of all random options from the command line."""
+    parser = argparse.ArgumentParser(description='Expected results of random options of Space Saga.')
+    parser.add_argument('--hour', type=int, default=8, help='hour of the day')
+    args = parser.parse_args(argv)
+
+    state = GameState()
+    state.locations = load_locations()
+    state.world.current_time = args.hour * 60
+    engine = Engine(state)
+    odds = Odds(engine)
+
+    for location, data in state.locations.items():
+        for path in _walk(data.get('options') or {}):
+            distribution = odds.option(location, path)
+            if distribution.is_certain():
+                continue
+            numbers = '  '.join(
+                f'{field} {mean:+.3f} (sd {math.sqrt(variance):.3f})'
+                for field, (mean, variance) in distribution.summary().items()
+            )
+            events = ', '.join(
+                f'{label} {probability:.1%}' for label, probability in distribution.labels().items() if label
+            )
+            print(f'{location}: {" > ".join(path)}\n    {numbers}\n    {events}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+from typing import NamedTuple
+
+
+class Interner:
+    """
+    Assigns small integer ids to names (option ids, location names).
+
+    Ids are given in order of first use and never change during the game,
+    so they can be used as bit positions of BitSet.
+    """
+
+    def __init__(self, kind: str) -> None:
+        """Initialize empty interner for the kind of names."""
+        self.kind = kind
+        self.ids = {}
+        self.names = []
+        _INTERNERS[kind] = self
+
+    def intern(self, name: str) -> int:
+        """Id of the name (a new id is given to a new name)."""
+        i = self.ids.get(name)
+        if i is None:
+            i = len(self.names)
+            self.ids[name] = i
+            self.names.append(name)
+        return i
+
+    def name(self, i: int) -> str:
+        """Name by its id."""
+        return self.names[i]
+
+
+class OptionInfo(NamedTuple):
+    """
+    Attributes of the option parsed once from its id.
+
+    - kind: option id without the amount ('buy_corn' for 'buy_corn_10');
+    - amount: number at the end of the option id (None if there is no number);
+    - is_back: option returns to the previous dialogue level;
+    - target: location the option leads to (None if unknown or different in different places).
+    """
+    id: int
+    name: str
+    kind: str
+    amount: int | None
+    is_back: bool
+    target: str | None
+
+
+class OptionRegistry(Interner):
+    """Interner of option ids, which also keeps pre-parsed attributes of every option."""
+
+    def __init__(self) -> None:
+        """Initialize empty registry."""
+        super().__init__('options')
+        self.infos = []
+        self._ambiguous_targets = set()
+
+    @staticmethod
+    def _parse(i: int, name: str) -> OptionInfo:
+        """Helper: parse option attributes from its id."""
+        kind, _, tail = name.rpartition('_')
+        if kind and tail.isdigit():
+            amount = int(tail)
+        else:
+            kind = name
+            amount = None
+        return OptionInfo(i, name, kind, amount, name.startswith('back'), None)
+
+    def intern(self, name: str) -> int:
+        """Id of the option (a new option is registered with parsed attributes)."""
+        i = self.ids.get(name)
+        if i is None:
+            i = super().intern(name)
+            self.infos.append(self._parse(i, name))
+        return i
+
+    def info(self, option: int | str) -> OptionInfo:
+        """Attributes of the option by its id or name."""
+        if isinstance(option, str):
+            option = self.intern(option)
+        return self.infos[option]
+
+    def add_target(self, name: str, target: str) -> None:
+        """
+        Remember the location the option leads to.
+
+        If the same option id leads to different locations, the target stays unknown.
+        """
+        i = self.intern(name)
+        if name in self._ambiguous_targets:
+            return
+        known = self.infos[i].target
+        if known is None:
+            self.infos[i] = self.infos[i]._replace(target=target)
+        elif known != target:
+            self._ambiguous_targets.add(name)
+            self.infos[i] = self.infos[i]._replace(target=None)
+
+
+_INTERNERS = {}
+
+OPTION_IDS = OptionRegistry()
+LOCATION_IDS = Interner('locations')
+
+
+def _restore_bitset(kind: str, names: tuple) -> 'BitSet':
+    """Helper: rebuild a BitSet from names (ids may differ in another process)."""
+    return BitSet(_INTERNERS[kind], names)
+
+
+class BitSet:
+    """
+    Set of interned names kept as bits of one integer.
+
+    Works like a set of strings (add, discard, in),
+    but membership tests are a bit check and a copy is a single int.
+    """
+
+    __slots__ = ('interner', 'bits')
+
+    def __init__(self, interner: Interner, names=()) -> None:
+        """Initialize the set with names."""
+        self.interner = interner
+        self.bits = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        """Add the name to the set."""
+        self.bits |= 1 << self.interner.intern(name)
+
+    def discard(self, name: str) -> None:
+        """Remove the name from the set if it is present."""
+        i = self.interner.ids.get(name)
+        if i is not None:
+            self.bits &= ~(1 << i)
+
+    def __contains__(self, name: str) -> bool:
+        i = self.interner.ids.get(name)
+        return i is not None and (self.bits >> i) & 1 == 1
+
+    def has_id(self, i: int) -> bool:
+        """Checks if the interned id is in the set (no name lookup)."""
+        return (self.bits >> i) & 1 == 1
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield self.interner.name(low.bit_length() - 1)
+            bits ^= low
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BitSet):
+            return self.interner is other.interner and self.bits == other.bits
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'BitSet({self.interner.kind}, {sorted(self)})'
+
+    def copy(self) -> 'BitSet':
+        """Snapshot of the set (interner is shared)."""
+        other = BitSet(self.interner)
+        other.bits = self.bits
+        return other
+
+    def __copy__(self) -> 'BitSet':
+        return self.copy()
+
+    def __deepcopy__(self, memo) -> 'BitSet':
+        return self.copy()
+
+    def __reduce__(self):
+        return _restore_bitset, (self.interner.kind, tuple(self))
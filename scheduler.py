@@ -0,0 +1,58 @@
+import heapq
+
+
+class Scheduler:
+    """
+    Events of the world in game minutes.
+
+    Events are kept in a heap by their time, so moving the clock costs
+    one look at the top of the heap when nothing is due.
+    A periodic event missed several times during a long jump (sleep, repairs)
+    is run once with the number of missed periods, so a 12-hour sleep
+    costs one heap pop per event, not one per period or minute.
+
+    Events are names (e.g. 'mine.restock'), not functions,
+    so the scheduler can be copied and pickled with the game state.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the scheduler without events."""
+        # Heap of (time, order of scheduling, event, period in minutes or 0)
+        self.queue = []
+        self.counter = 0
+
+    def schedule(self, time: int, event: str, period: int = 0) -> None:
+        """Schedule the event at the game minute (repeated every period minutes, if given)."""
+        heapq.heappush(self.queue, (time, self.counter, event, period))
+        self.counter += 1
+
+    def next_time(self) -> int | None:
+        """Game minute of the nearest event (None if there are no events)."""
+        return self.queue[0][0] if self.queue else None
+
+    def run_until(self, time: int, handler) -> int:
+        """
+        Run all events due by the game minute.
+
+        Events run in the order of their last due minute, events due
+        at the same minute run in the order they were scheduled first
+        (e.g. restocks of stations in the order the stations were created).
+
+        :param handler: function (event, times), times is how many periods have passed.
+        :return: number of events run.
+        """
+        due_events = []
+        queue = self.queue
+        while queue and queue[0][0] <= time:
+            due, order, event, period = heapq.heappop(queue)
+            times = 1
+            if period:
+                times += (time - due) // period
+                # Repeated event keeps its order among events of the same minute
+                heapq.heappush(queue, (due + times * period, order, event, period))
+            due_events.append((due + (times - 1) * period, order, event, times))
+
+        due_events.sort()
+        for _, _, event, times in due_events:
+            handler(event, times)
+        return len(due_events)
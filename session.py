@@ -0,0 +1,950 @@
+import io
+import pickle
+import time
+from typing import NamedTuple
+
+from content import ContentReloader, valid_options_path
+from engine import Engine
+from history import FINISH_OPTION, run_of
+from options import OPTION_IDS
+from zobrist import untracked_reduce
+
+
+class OptionError(ValueError):
+    """Selected option is not shown to the player or is disabled."""
+
+
+class ShownOption(NamedTuple):
+    """Option available to the player: option id, text and whether it can be selected."""
+    id: str
+    text: str
+    disabled: bool
+
+
+class QuestRoute(NamedTuple):
+    """Engine action (interned option id) of the quest option and the location shown after it."""
+    action: int | None
+    location: str
+
+
+def quest_routes(contracts) -> dict:
+    """
+    Options of delivery quests, which are created in the game (not in location_actions.json).
+
+    Randomly offered contracts have options to take and to refuse them,
+    every contract has an option to finish it.
+    So a new delivery quest only needs its entry in delivery_contracts.json.
+
+    :return: interned option id -> QuestRoute.
+    """
+    routes = {}
+
+    def add(option_name: str, action: int | None, location: str) -> None:
+        routes[OPTION_IDS.intern(option_name)] = QuestRoute(action, location)
+        OPTION_IDS.add_target(option_name, location)
+
+    for contract in contracts.contracts.values():
+        add(f'{contract.id}_delivered', None, contract.destination)
+        if not contract.offer:
+            continue
+        take = f'take_{contract.id}'
+        add(take, OPTION_IDS.intern(take), contract.origin)
+        add(f'refuse_{contract.id}', None, contract.origin)
+    return routes
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickler which leaves out game content (it is the same in every snapshot) and hashing data."""
+
+    def __init__(self, file, locations: dict) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.locations = locations
+
+    def persistent_id(self, obj):
+        if obj is self.locations:
+            return 'locations'
+        return None
+
+    def reducer_override(self, obj):
+        return untracked_reduce(obj)
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Unpickler which puts the current game content back into the snapshot."""
+
+    def __init__(self, file, locations: dict) -> None:
+        super().__init__(file)
+        self.locations = locations
+
+    def persistent_load(self, pid):
+        if pid == 'locations':
+            return self.locations
+        raise pickle.UnpicklingError(f'Unknown object in the snapshot: {pid}')
+
+
+class GameSession:
+    """
+    The game without the user interface.
+
+    Session moves the hero between locations and dialogue levels,
+    handles option selection with the engine and forms
+    what the player sees: quest text and available options.
+    SpaceSaga renders it in the terminal, but the session can also be
+    played directly (simulations, benchmarks, bots).
+    """
+
+    def __init__(self, state, history=None, player: str = 'player', telemetry=None) -> None:
+        """
+        Initialize the session with the game state and load locations.
+
+        :param history: RunHistory which records the run when the hero leaves the planet.
+        :param telemetry: Telemetry which records every selected option.
+        """
+        self.state = state
+        self.engine = Engine(state)
+        self.history = history
+        self.player = player
+        self.telemetry = telemetry
+
+        # What the player sees, version grows with every change
+        self.text = ''
+        self.options = []
+        self.version = 0
+
+        self.content = ContentReloader(state, compiler=self.engine.compile_locations)
+        self.content.load()
+
+        self.quest_routes = quest_routes(self.engine.contracts)
+
+        # Interned option id -> preparation of the game state before the option is shown
+        self.option_preparations = {
+            OPTION_IDS.intern('discover_city'): self.engine.randomize_city_exploration_event,
+            OPTION_IDS.intern('go_to_restaurant'): self._prepare_restaurant,
+        }
+
+    @property
+    def options_stack(self) -> list:
+        """Dialogue level of the current location, kept in the game state."""
+        return self.state.options_stack
+
+    @options_stack.setter
+    def options_stack(self, value: list) -> None:
+        self.state.options_stack = value
+
+    def _set_text(self, text: str) -> None:
+        """Helper: change the quest text."""
+        self.text = text
+        self.version += 1
+
+    def _set_options(self, options: list) -> None:
+        """Helper: change available options (list of ShownOption)."""
+        self.options = options
+        self.version += 1
+
+    def reload_locations(self) -> bool:
+        """
+        Apply changes of location_actions.json without restarting the game.
+
+        The player stays on the same dialogue level if it still exists,
+        otherwise returns to the nearest existing parent level.
+
+        :return: True if the current location was changed.
+        :raise ContentError: if the file is broken or has a mistake (the game keeps the previous content).
+        """
+        if not self.content.has_changed():
+            return False
+        changed = self.content.reload()
+        if self.state.world.current_location not in changed:
+            return False
+
+        location = self.state.locations.get(self.state.world.current_location)
+        if not location:
+            return False
+
+        self.options_stack = valid_options_path(location, self.options_stack)
+        options = location.get('options')
+        description = location.get('description')
+        for el in self.options_stack:
+            parent = options.get(el)
+            options = parent.get('options')
+            description = parent.get('description', description)
+
+        # Dynamic descriptions may have side effects (e.g. slot machine),
+        # so current text is kept for them
+        if description != 'dynamic':
+            self._set_text(description)
+        self._show_options(options)
+        return True
+
+    def snapshot(self) -> bytes:
+        """Compact copy of the game: the state and what the player sees (without content)."""
+        buffer = io.BytesIO()
+        _SnapshotPickler(buffer, self.state.locations).dump((self.state, self.text, self.options))
+        return buffer.getvalue()
+
+    def restore(self, data: bytes) -> None:
+        """Return the game to the snapshot (content stays current)."""
+        state, text, options = _SnapshotUnpickler(io.BytesIO(data), self.state.locations).load()
+        self.state.assign(state)
+        self._set_text(text)
+        self._set_options(options)
+
+    def show_location(self, location_name: str) -> None:
+        """Move the hero to the location: show its description and options."""
+        self.state.world.current_location = location_name
+        self.state.visited_locations.add(location_name)
+        if not self.state.route or self.state.route[-1] != location_name:
+            self.state.route.append(location_name)
+        self.options_stack = []
+
+        location = self.state.locations.get(location_name)
+        if not location:
+            return
+
+        self._set_text(location.get('description'))
+
+        options = location.get('options')
+        self._show_options(options)
+
+    def _prepare_restaurant(self) -> None:
+        """Restaurant is open from 9:00 until the last visitor after 23:59."""
+        if self.engine._is_time_in_range('09:00', '23:59'):
+            self.state.invisible_options.discard('order_root')
+            self.state.invisible_options.discard('order_wine')
+            self.state.invisible_options.discard('order_tail')
+            self.state.invisible_options.discard('order_beaver')
+            self.state.invisible_options.discard('order_cactus')
+        else:
+            self.state.invisible_options.discard('wait_restaurant_opening')
+
+    def _show_options(self, options: dict) -> None:
+        """Helper: form available options of the dialogue level (hidden ones are skipped)."""
+        shown = []
+        for opt_id, opt in options.items():
+            info = OPTION_IDS.info(opt_id)
+
+            disabled = False
+
+            if self.state.invisible_options.has_id(info.id):
+                continue
+
+            # Show options for corn farm location
+            if self.state.world.current_location == "Corn Farm":
+                if info.kind == 'buy_corn':
+                    if not self.state.world.corn_farm.can_buy_corn(info.amount,
+                                                                   self.state.hero,
+                                                                   self.state.truck):
+                        disabled = True
+
+            # Show options for the Stingray bar location
+            if self.state.world.current_location == 'The Stingray Bar':
+                if opt_id == 'drink_port_wine' and self.state.hero.cash < 3:
+                    disabled = True
+                if opt_id == 'drink_cocktail' and self.state.hero.cash < 4:
+                    disabled = True
+                if opt_id == 'treat_everyone' and self.state.hero.cash < 50:
+                    disabled = True
+                if opt_id == 'eat_mushrooms_with_meat' and self.state.hero.cash < 6:
+                    disabled = True
+                if opt_id == 'sleep_in_bar':
+                    if (not self.state.hero.stingrays_member and self.state.hero.cash < 10 or
+                            (self.state.hero.stingrays_member and self.state.hero.cash < 5)):
+                        disabled = True
+
+            # Show options for Gruber's gas station
+            if self.state.world.current_location == 'Gruber\'s Fuel Station':
+                if info.kind == 'gruber_fill_up':
+                    if not self.state.world.gruber_gas_station.can_fill_up(info.amount,
+                                                                           self.state.hero,
+                                                                           self.state.truck):
+                        disabled = True
+
+            # Show options for Bolt's garage
+            if self.state.world.current_location == 'Bolt\'s Garage':
+                if opt_id == 'fix_truck' and self.state.truck.truck_condition == 100:
+                    disabled = True
+                if opt_id == 'extend_trunk' and self.state.hero.cash < 50:
+                    disabled = True
+                if opt_id == 'extend_trunk' and self.state.truck.upgrade_load_capacity:
+                    disabled = True
+                if opt_id == 'upgrade_truck' and not self.engine.has_scrap_for_truck_upgrade():
+                    disabled = True
+                if opt_id == 'upgrade_truck' and self.state.truck.blades_on_wheels:
+                    disabled = True
+
+            # Show options for town
+            if self.state.world.current_location == 'Brackenbridge':
+                if opt_id == 'sell_all_coal' and self.state.truck.cargo.get('coal') == 0:
+                    disabled = True
+                if opt_id == 'sell_all_scrap' and self.state.truck.cargo.get('scrap') == 0:
+                    disabled = True
+                if opt_id == 'energy_treatment' and self.state.hero.cash < 50:
+                    disabled = True
+                if opt_id == 'energy_treatment' and self.state.hero.health == 100:
+                    disabled = True
+                if opt_id == 'rest' and self.state.hero.fatigue == 100:
+                    disabled = True
+                if opt_id == 'take_girl':
+                    if self.state.hero.health == 100 and self.state.hero.fatigue == 100:
+                        disabled = True
+                if opt_id == 'coins_for_beggar' and self.state.hero.cash < 4:
+                    disabled = True
+                if opt_id == 'order_root' and self.state.hero.cash < 7:
+                    disabled = True
+                if opt_id == 'order_wine' and self.state.hero.cash < 9:
+                    disabled = True
+                if opt_id == 'order_tail' and self.state.hero.cash < 10:
+                    disabled = True
+                if opt_id == 'order_beaver' and self.state.hero.cash < 20:
+                    disabled = True
+                if opt_id == 'order_cactus' and self.state.hero.cash < 23:
+                    disabled = True
+
+            # Show option for wreckyard
+            if self.state.world.current_location == 'Wreckyard':
+                if info.kind == 'buy_scrap':
+                    if not self.state.world.wreckyard.can_buy_scrap(info.amount,
+                                                                    self.state.hero,
+                                                                    self.state.truck):
+                        disabled = True
+
+            # Show option for trading house in the mining settlement
+            if self.state.world.current_location == 'Mining Settlement':
+                if info.kind == 'buy_coal':
+                    if not self.state.world.mine.can_buy_coal(info.amount,
+                                                              self.state.hero,
+                                                              self.state.truck):
+                        disabled = True
+                if opt_id == 'sell_all_corn' and self.state.truck.cargo.get('corn') == 0:
+                    disabled = True
+                if opt_id == 'buy_porridge' and self.state.hero.cash == 0:
+                    disabled = True
+                if opt_id == 'sleep' and self.state.hero.fatigue == 100:
+                    disabled = True
+
+            # Show options for Dex's gas station
+            if self.state.world.current_location == 'Dex\'s Fuel Station':
+                if opt_id == 'about_fixing' and self.state.truck.truck_condition >= 75:
+                    disabled = True
+                if opt_id == 'back_dex_fix_truck':
+                    if self.engine.dex_repair_cost() > self.state.hero.cash:
+                        disabled = True
+                if info.kind == 'dex_fill_up':
+                    if not self.state.world.gruber_gas_station.can_fill_up(info.amount,
+                                                                           self.state.hero,
+                                                                           self.state.truck):
+                        disabled = True
+
+            # Show options for road healer
+            if self.state.world.current_location == 'Road - healer':
+                if opt_id == 'buy_legs' and self.state.hero.cash < 30:
+                    disabled = True
+                if opt_id == 'buy_eye' and self.state.hero.cash < 15:
+                    disabled = True
+                if opt_id == 'buy_broth' and self.state.hero.cash < 20:
+                    disabled = True
+                if opt_id == 'buy_fly' and self.state.hero.cash < 5:
+                    disabled = True
+
+            # Show options for fuel truck on the road
+            if self.state.world.current_location == 'Road - fuel truck':
+                if opt_id == 'buy_fuel' and self.state.hero.cash < 8:
+                    disabled = True
+
+            # Show options for damage truck on the road
+            if self.state.world.current_location == 'Road - damage truck':
+                if opt_id == 'back_after_buy_fuel' and self.state.hero.cash < 25:
+                    disabled = True
+
+            # Show options for mustang on the road
+            if self.state.world.current_location == 'Road - mustang':
+                if opt_id == 'back_after_buy_fuel' and self.state.hero.cash < 22:
+                    disabled = True
+
+            # Show options for pickup on the road
+            if self.state.world.current_location == 'Road - pickup':
+                if opt_id == 'back_after_sell_fuel' and self.state.truck.fuel < 21:
+                    disabled = True
+
+            # Show options for empty mustang on the road
+            if self.state.world.current_location == 'Road - empty mustang':
+                if opt_id == 'back_after_buy_fuel' and self.state.hero.cash < 18:
+                    disabled = True
+                if opt_id == 'back_after_buy_shell' and self.state.hero.cash < 1:
+                    disabled = True
+
+            # Show options for paying fine in road - policeman location
+            if self.state.world.current_location == 'Road - policeman':
+                if opt_id == 'pay_fine' and self.state.hero.cash < self.state.world.police_event['fine']:
+                    disabled = True
+
+            shown.append(ShownOption(opt_id, opt.get('text'), disabled))
+
+        self._set_options(shown)
+
+    def select(self, option_id: str) -> None:
+        """
+        Handle option selection.
+
+        World events due by the new game time run before the text and options are shown
+        (see Engine.select_option).
+
+        :raise OptionError: if the option is not shown or is disabled.
+        """
+        if not any(option.id == option_id and not option.disabled for option in self.options):
+            raise OptionError(f'Option is not available: {option_id}')
+        started = time.perf_counter()
+        # The run is finished once, leaving the planet again doesn't make another run
+        finishing = option_id == FINISH_OPTION and FINISH_OPTION not in self.state.visited_options
+        self._select(option_id)
+        if self.telemetry is not None:
+            self.telemetry.record(option_id, self.state, time.perf_counter() - started)
+        if self.history is not None and finishing:
+            self.history.add(run_of(self.state, self.player))
+            self.history.flush()
+
+    def destination(self, option_id: str) -> str | None:
+        """Location the shown option leads to (None if the option doesn't lead to another location)."""
+        location = self.state.locations.get(self.state.world.current_location) or {}
+        options = location.get('options') or {}
+        for el in self.options_stack:
+            options = (options.get(el) or {}).get('options') or {}
+        target = (options.get(option_id) or {}).get('goto')
+        if target == 'next':
+            return self.state.world.next_location
+        return target
+
+    def _select(self, option_id: str) -> None:
+        """Helper: handle option selection."""
+        selected = OPTION_IDS.info(option_id)
+
+        # Quest options are not part of the locations, they lead to a fixed location
+        route = self.quest_routes.get(selected.id)
+        if route:
+            self.engine.run_action(route.action, {})
+            self.show_location(route.location)
+            return
+
+        # Some options prepare the game state before they are shown
+        prepare = self.option_preparations.get(selected.id)
+        if prepare:
+            prepare()
+
+        location = self.state.locations.get(self.state.world.current_location)
+        if not location:
+            return
+
+        options = location.get('options')
+
+        for el in self.options_stack:
+            parent = options.get(el)
+            if not parent:
+                return
+            options = parent.get('options')
+
+        option = options.get(option_id)
+        if not option:
+            return
+
+        # Handle game state changes and specific game action
+        self.engine.select_option(self.state.world.current_location,
+                                  (*self.options_stack, selected.id))
+
+        self._show_options(options)
+
+        # Somebody can ask the hero for a ride when he leaves the location
+        contract = self.engine.offer_contract(self.state.world.current_location, option_id)
+        if contract:
+            self._set_text(contract.offer['text'])
+            self._set_options([
+                ShownOption(f'take_{contract.id}', 'Sure', False),
+                ShownOption(f'refuse_{contract.id}', 'I have more important things to do', False),
+            ])
+            return
+
+        if 'goto' in option:
+            destination = option['goto']
+
+            # When the hero goes to the marshal, he can be detained by the police
+            if destination == "Marshal" and not self.state.world.active_encounter:
+                self.state.world.active_encounter = True
+                police_encounter = self.engine.randomize_police_event()
+                if police_encounter:
+                    self.state.world.next_location = destination
+                    self.state.world.active_encounter = True
+                    self.show_location('Road - policeman')
+                    return
+
+            # When there is a random encounter on the road,
+            # record the initial destination of the journey.
+            if destination == 'next':
+                destination = self.state.world.next_location
+                self.state.world.next_location = None
+            # Check if a random meeting can generate
+            # and if there isn't already have an active meeting
+            encounter_event = self.engine.randomize_encounter_on_road(self.state.world.current_location, destination)
+            if encounter_event and not self.state.world.active_encounter:
+                self.state.world.next_location = destination
+                self.show_location(encounter_event)
+                self.state.world.active_encounter = True
+                return
+
+            self.show_location(destination)
+            # Reset flags of active encounter after the meeting is over
+            self.state.world.active_encounter = False
+            self.state.world.next_location = None
+            self.state.invisible_options.discard('ask_about_news')
+            self.state.invisible_options.discard('ask_about_fuel')
+
+            # Delivery quests are completed on arrival to the destination
+            delivered = self.engine.deliver_contracts(destination)
+            if delivered:
+                self._set_text('\n\n'.join(contract.delivery_text for contract in delivered))
+                self._set_options([ShownOption(f'{delivered[0].id}_delivered', 'Next', False)])
+                return
+
+        # Check whether the description is generated dynamically
+        if 'description' in option:
+            if option['description'] == 'dynamic':
+                self._set_text(self._get_dynamic_description(option_id))
+            else:
+                self._set_text(option['description'])
+
+        if 'options' in option:
+            self.options_stack.append(option_id)
+            self._show_options(option['options'])
+            return
+
+        if selected.is_back:
+            if self.options_stack:
+                self.options_stack.pop()
+
+                options = location.get('options')
+                parent_option = None
+
+                for el in self.options_stack:
+                    parent_option = options.get(el)
+                    options = parent_option.get('options')
+
+                if parent_option and 'description' in parent_option:
+                    if parent_option['description'] == 'dynamic':
+                        self._set_text(self._get_dynamic_description(self.options_stack[-1]))
+                    else:
+                        self._set_text(parent_option['description'])
+                else:
+                    self._set_text(location.get('description'))
+
+                self._show_options(options)
+
+            else:
+                self._set_text(location.get("description"))
+                self._show_options(location.get('options'))
+            return
+
+    def _get_dynamic_description(self, option_name: str) -> str:
+        """Helper: generate a context-sensitive description text for the quest panel."""
+        option = OPTION_IDS.info(option_name)
+
+        # Dynamic quest text depending on the quantity and price of corn.
+        if option_name == 'approach_farm':
+            return (
+                'Your car was parked right in front of the gate of the farmhouse. '
+                'A young man in a hat with a cane in his teeth was looking at you from the window:\n\n'
+                f'– We currently have [green]{self.state.world.corn_farm.offer} tonnes[/green] '
+                'of corn, packed in barrels, one tonne each. '
+                f'We sell them for [green]{self.state.world.corn_farm.price} credits per barrel[/green]. '
+                'And if you want to sell something yourself, sorry, '
+                'we\'re not buying anything. We have everything we need.'
+            )
+
+        if option.kind == 'buy_corn':
+            return (
+                f'– We currently have [green]{self.state.world.corn_farm.offer} tonnes[/green] '
+                'of corn, packed in barrels, one tonne each. '
+                f'We sell them for [green]{self.state.world.corn_farm.price} credits per barrel[/green]. '
+                'And if you want to sell something yourself, sorry, '
+                'we\'re not buying anything. We have everything we need.'
+            )
+
+        # The bartender's greeting depends on whether the hero is a member of the gang.
+        if option_name == 'go_to_barman':
+            if self.state.hero.stingrays_member:
+                text = 'What do you want, our little stingray? – asked the barman, smiling from ear to ear.'
+            else:
+                text = '– Did you want something? – the bartender asked.'
+            return (
+                f'{text}\n\n'
+                'Behind him you notice a sign:\n'
+                '\"[green]Fried meat with mushrooms – 6 credits[/green]. '
+                '[green]A bed for 6 hours – 10 credits (for Stingrays: 5 credits)[/green]\"'
+            )
+
+        # Hero play slot machine in the bar
+        if option_name == 'play_slot_machine':
+            result = self.engine.play_slot_machine()
+            return (
+                'The reels spun wildly and stopped at the combination:\n\n'
+                f'{result}'
+            )
+
+        # Fight with biker. Hero does not take any action against the opponent.
+        # If the biker is afraid of the hero, he waits; otherwise, he attacks.
+        if option_name == 'do_nothing_against_biker':
+            if self.state.world.biker_mood < 3:
+                biker_attack_result = self.engine._biker_attacks()
+                return (
+                    f'{biker_attack_result}\n\n'
+                    'You stand in front of a drunk biker. He looks unfriendly. '
+                    'If you have the strength, maybe it’s time to punch that arrogant face.'
+                )
+            else:
+                return 'The biker did nothing. It looked like he was waiting for your move.'
+
+        # Fight with biker. Hero  hits the biker on the head, but to no avail.
+        # Hero receives a blow in return.
+        # If biker is afraid, he waits for hero's reaction.
+        if option_name == 'hit_head':
+            biker_attack_result = self.engine._biker_attacks()
+            if self.state.world.biker_mood < 3:
+                return (
+                    'You tried to hit your opponent, but your poor condition betrayed you. '
+                    'Your hand missed his ear, and you stumbled onto him instead. '
+                    'The biker quickly used this chance and threw you to the ground, '
+                    'while everyone laughed. Not wanting things to '
+                    'get worse, you stood back up.\n\n'
+                    f'{biker_attack_result}'
+                )
+            else:
+                return (
+                    'You tried to hit your opponent, but your poor condition betrayed you. '
+                    'Your hand missed his ear, and you stumbled onto him instead. '
+                    'The biker quickly used this chance and threw you to the ground, '
+                    'while everyone laughed. Not wanting things to '
+                    'get worse, you stood back up.\n\n'
+                    'The biker did nothing. It looked like he was waiting for your move.'
+                )
+
+        # Fight with biker. Hero  hits the biker on the stomach -
+        # biker's fighting spirit is waning.
+        # Hero receives a blow in return.
+        # If biker is afraid, he waits for hero's reaction.
+        if option_name == 'hit_stomach':
+            if self.state.world.biker_mood < 3:
+                biker_attack_result = self.engine._biker_attacks()
+                return (
+                    'You hit the biker in the stomach. Not as strong as a punch to the head, '
+                    'but at least hard to miss.\n\n'
+                    f'{biker_attack_result}'
+                )
+            elif self.state.world.biker_mood == 3:
+                return (
+                    'You hit the biker in the stomach. Not as strong as a punch to the head, '
+                    'but at least hard to miss.\n\n'
+                    'The biker did nothing. It looked like he was waiting for your move.'
+                )
+            else:
+                self.engine.defeat_biker()
+                self.state.invisible_options.add('back_to_fight')
+                return ('– Alright, alright. Good job, – said the biker, raising his hands. '
+                        'The crowd rushed to you and started tossing you up in the air. '
+                        'Suddenly, you blacked out again… '
+                        'You woke up at the entrance of the bar. '
+                        'Your right shoulder hurt badly. Looking at it, you saw '
+                        'a fresh tattoo of a scorpion. Looks like you’re in the gang now!'
+                        )
+
+        # Dynamic car repair pricing
+        if option_name == 'fix_truck' and self.state.world.current_location == 'Bolt\'s Garage':
+            return ('Bolt quickly looked over the car and said: '
+                    f'– So, here the repair will cost [green]{self.engine.bolt_repair_cost()}[/green] credits. '
+                    'You understand, I don’t use cheap parts like Dex, '
+                    'so my prices are real. But your car will be like new! Well, do we fix it?'
+                    )
+
+        # Hero's exploration of the city
+        if self.state.world.current_location == 'Brackenbridge' and option_name == 'discover_city':
+            if self.state.discover_city_event == 'back_stolen_money':
+                return (
+                    'You walked around for a long time but found nothing except old houses. '
+                    'It seemed that all the interesting places were near the main square. '
+                    'With that thought, you went back. When you put your hand in your pocket, '
+                    'you saw that someone [green]had stolen a few credits[/green] '
+                    'This did not make your mood any better.'
+                )
+            if self.state.discover_city_event == 'back_nothing_interesting':
+                return (
+                    'You wandered for a long time but found only old houses. '
+                    'It seemed all the interesting places were near the main square. '
+                    'With that thought, you went back to where your trip began.'
+                )
+            if self.state.discover_city_event == 'meet_beggar':
+                return (
+                    'You wandered for a long time but found only old shabby houses. '
+                    'It seemed all the real life was near the main square. '
+                    'Just as you were about to head back, you noticed a beggar '
+                    'sitting on the sidewalk, asking for coins.'
+                )
+            if self.state.discover_city_event == 'back_conflict_with_hooligans':
+                return (
+                    'You walked around but found only old houses. '
+                    'On the way back, someone hit you from behind and you fell.\n'
+                    'Three teenage punks stood over you. They looked tough together.\n'
+                    'You got up, kicked one in the legs, broke another\'s nose, '
+                    'and the gang ran off. You [green]were hurt[/green] too. '
+                    'Better not to walk here at twilight – it’s their time.'
+                )
+
+        # Restaurant is open from 9:00 until the last visitor after 23:59
+        if self.state.world.current_location == 'Brackenbridge' and option_name == 'go_to_restaurant':
+            if self.engine._is_time_in_range('09:00', '23:59'):
+                return (
+                    'Grabbing the restaurant door handle, you noticed a sign on the glass:\n'
+                    '\"Open. The restaurant operates daily: '
+                    'from 9:00 until the last visitor after 23:59.\"\n\n'
+                    'Noting this, you went inside.There weren’t many people, so you easily '
+                    'found a table.\n'
+                    '– Shall we order something? – asked the waiter, dressed in a neat suit, '
+                    'handing you the menu.\nYou quickly looked through the options, '
+                    'noting what you could afford and what was too expensive.'
+                )
+            else:
+                return (
+                    'A sign hangs on the door:\n'
+                    '\"[green]Closed[/green].\n'
+                    'The restaurant is open daily:\n'
+                    '[green]from 9:00 until the last guest after 23:59[/green].\"'
+                )
+
+        # Dynamic quest text depending on the quantity and price of scrap
+        if option_name == 'go_wreckyard':
+            return (
+                'The vehicle skillfully entered the scrapyard. You were about to '
+                'delve deeper into the trash maze, but a three-meter-tall robot blocked '
+                'your way. Rusty as it was, it looked impressive…\n\n'
+                '– You’re in the Varnock brothers’ territory, gringo! – said the man '
+                'inside the robot. – If you’re here on business, know this: we '
+                f'currently have [green]{self.state.world.wreckyard.offer} tons[/green] '
+                f'of scrap metal. '
+                f'[green]{self.state.world.wreckyard.price} credits per ton[/green]. '
+                'The scrap is pressed and neatly packed—top quality stuff.'
+            )
+
+        if option.kind == 'buy_scrap':
+            return (
+                '– If you’re here on business, know this: we '
+                f'currently have [green]{self.state.world.wreckyard.offer} tons[/green] of scrap metal. '
+                f'[green]{self.state.world.wreckyard.price} credits per ton[/green]. '
+                'The scrap is pressed and neatly packed—top quality stuff.'
+            )
+
+        # Hero swims in forrest lake
+        if option_name == 'swim_more':
+            if self.state.hero.swims_qty == 3 and self.state.hero.health <= 40:
+                return (
+                    'You kept swimming in the lake when suddenly you [green]felt energy[/green] '
+                    'filling your body and your [green]wounds healing[/green]. Looks like '
+                    'this pond has healing powers!\n'
+                    'After a few minutes, the effect faded. In your current state, '
+                    'the pond couldn’t help you any further. Realizing this, '
+                    'you climbed out, dried off, got into your truck, and headed '
+                    'back to the road.'
+                )
+            elif self.state.hero.swims_qty == 3 and self.state.hero.health > 40:
+                return (
+                    'You went swimming again. Mosquitoes buzzed over your head, '
+                    'weeds got into your mouth — enough was enough! Tired of it all, '
+                    'you climbed out, dried off, got into your truck, and drove '
+                    'back to the road.'
+                )
+            else:
+                return (
+                    'You swam in the water for [green]five minutes.[/green] In such water, '
+                    'it didn’t give you much pleasure. Only made you [green]feel more tired[/green].'
+                )
+
+        # Fuel prices follow the fuel bought by the hero
+        if option_name == 'go_gas_station':
+            return (
+                'You drove along a country road and stopped right in front of a building. '
+                'A boy with a rifle on his shoulder quickly came out. Coming to your truck window, he said:\n\n'
+                '– You are at Gruber\'s Fuel Station. '
+                f'[green]5 liters of fuel cost {self.state.world.gruber_gas_station.price} credits[/green]. '
+                'Will you buy some?'
+            )
+
+        if option.kind == 'gruber_fill_up':
+            return (
+                f'You bought [green]{option.amount} liters of fuel[/green].\n\n'
+                '– You are at Gruber\'s Gas Station. '
+                f'Five liters of fuel cost {self.state.world.gruber_gas_station.price} credits. Do you want more?'
+            )
+
+        if option_name == 'go_dex':
+            return (
+                'A steel building with cannons everywhere looked very serious.\n\n'
+                f'– [green]1 liter of fuel costs {self.state.world.dex_gas_station.price} credits[/green], '
+                '– said a metallic voice. – Give money to the robot, and it will do everything.\n\n'
+                'Looking around, you noticed a fat woman sitting inside a spherical defense gun attached to the ceiling.'
+            )
+
+        if option.kind == 'dex_fill_up':
+            return (
+                f'You [green]bought {option.amount} liters of fuel[/green].\n\n'
+                f'– [green]1 liter of fuel costs {self.state.world.dex_gas_station.price} credits[/green], '
+                '– the metallic voice said. – Give money to the robot, and it will do everything.\n\n'
+                'Maybe buy more?'
+            )
+
+        # Factory prices fall when the hero sells a lot
+        if option_name == 'go_to_factory':
+            return (
+                'A dirty man leans out of the booth at the factory entrance and looks at you closely:\n\n'
+                '- As usual, we don’t sell anything, only buy. Prices depend on how much we bought lately.\n'
+                f'[green]1 ton of scrap metal – {self.state.world.factory.scrap_price} credits\n'
+                f'1 ton of coal – {self.state.world.factory.coal_price} credits[/green]'
+            )
+
+        # Dynamic quest text depending on the quantity and price of scrap
+        if option_name == 'go_to_trading_house' or option.kind == 'buy_coal':
+            return (
+                'You are in a room full of coal bags. A man in a helmet sits on '
+                'a small chair near the door.\n'
+                f'– Here\'s the deal. We sell coal for [green]{self.state.world.mine.price} '
+                'credits per ton[/green]. The coal is clean and ready to use, so no problems. '
+                f'Right now, we have [green]{self.state.world.mine.offer} tons[/green] of coal in stock.'
+                'Also, we buy food. Especially [green]corn. '
+                f'We pay {self.state.world.trading_house.corn_price} credits per ton[/green]. '
+                'Miners eat corn with great appetite!'
+            )
+
+        # Dynamic quest text depending on the quantity of mined coal
+        if option_name == 'work_in_mine':
+            earned_money = self.engine.work_in_mine()
+            text = (
+                '– That’s it! One hour is over, – the huge miner shouted behind you. '
+                'He wrote your name on the bag, put it on the lift, and said:\n'
+                '– Go upstairs for your pay. '
+                'At the mine exit, a dirty man with a notebook was already waiting.\n'
+            )
+            if earned_money == 3:
+                text += '– I weighed the bag. About one and a half tons. Good! You [green]earned 3 credits[/green].'
+            elif earned_money == 2:
+                text += '– I weighed the bag. About one ton. Good! You [green]earned 2 credits[/green].'
+            elif earned_money == 0:
+                text = (
+                    'You were calmly mining coal when suddenly a pile of rocks fell '
+                    'from above. The miners rushed to dig you out…\n'
+                    'You woke up outside. Your body hurt — the rockfall [green]hit you hard[/green].\n'
+                    'But hooray! You managed to stand up. Even better, nothing was '
+                    'broken. Looks like you got away quite lightly…'
+                )
+
+            return text
+
+        # Dynamic quest text depending on the quantity of mined coal
+        if option_name == 'about_fixing':
+            return (
+                'Go to the garage. Dex will check your wreck, – the woman said.\n'
+                'In a moment, the garage doors lifted, and you drove inside. '
+                'The place was full of metal junk—mufflers, engines, tanks, springs. '
+                'Among it all worked a man in coveralls. That must be Dex.\n'
+                '– Let’s see, – the mechanic said, checking your vehicle.\n'
+                f'– Well, – he concluded, – that’s [green]{self.engine.dex_repair_cost()} '
+                'credits[/green] of work. Are you paying?'
+            )
+
+        # Dynamic quest text for buying porridge in mining settlement
+        # depending on the hanger level
+        if option_name == 'buy_porridge' and self.state.hero.hanger >= 39:
+            return (
+                'The drox took the money, pressed a lever on some machine, '
+                'and half a minute later the device spat out a portion of brown mush. '
+                'Dropping THIS onto a plate, the drox stuck a metal spoon in and handed '
+                'it to you.\n'
+                '– Bring the dish back, – he muttered.\n'
+                'You nodded.\n'
+                'The taste was even worse than the look. You managed a couple of spoons, '
+                'but with each one it was harder to fight the urge to vomit. '
+                'Finally, your stomach rebelled, and you threw up. '
+                'Seems you weren’t [green]hungry enough[/green] to finish that yellow substance.'
+            )
+        if option_name == "buy_porridge":
+            return (
+                'The drox took your money, pulled a lever on the machine, '
+                'and soon it gave out some green mush. It tasted worse than it looked. '
+                'But you were too hungry, so you ate it all, trying not to throw up.'
+            )
+
+        # Dynamic quest text for dealer on the road
+        if self.state.world.current_location == "Road - healer":
+            text = (
+                '– Hind legs of the critter, soaked in milk. '
+                '[green]Heals wounds. 30 credits[/green].\n'
+                '– Raw eye of an arthropod. Clears the mind, [green]gives strong energy[/green], '
+                'and cleans toxins, causing vomiting. Only [green]15 credits[/green].\n'
+                '– Frog skin broth with sour cilantro sauce. [green]Fills hunger[/green] and '
+                'raises endurance. [green]20 credits[/green].\n'
+                '- Dead jug-fly. [green]Boosts male power[/green] to the third chi sphere. '
+                'One fly – [green]5 credits[/green].'
+            )
+            if option_name == 'stop':
+                return (
+                    'You quickly pulled your truck to the side, but the wheel-baobab car '
+                    'bounced toward you for a while. Finally, it stopped next to your '
+                    'vehicle, puffing black smoke from its exhaust. The door opened, '
+                    'and a thin old man approached your window—bald.\n'
+                    '– I bring nirvana to this gray world, – the old man said in '
+                    'a trembling voice. – Your eyes show weariness from something dark and'
+                    ' vast. I think my remedies will help you:\n'
+                    ) + text
+            elif option_name == 'buy_legs':
+                text = (
+                        'The legs turned out to be quite tasty. '
+                        'Suddenly you started shaking, and you felt your [green]wounds slowly closing[/green].'
+                        '– Anything else? – the old man asked.\n'
+                        'You tried to recall what other remedies he had mentioned. '
+                        'The list went something like this:\n'
+                       ) + text
+            elif option_name == 'buy_eye':
+                text = (
+                        'The healer pulled a huge bluish eye from a three-liter jar.'
+                        'Without thinking too much, you grabbed it and swallowed it in one go. '
+                        'The eye burst in your mouth, spreading bitter liquid across your tongue...\n'
+                        'In the window you saw the healer’s satisfied face. '
+                        'You stood up, feeling [green]incredible energy[/green], though now your head '
+                        'hurt badly and your bones ached.'
+                        '– Anything else? – the old man asked.\n'
+                        'You tried to recall what other remedies he had mentioned. '
+                        'The list went something like this:\n'
+                       ) + text
+            elif option_name == 'buy_broth':
+                text = (
+                        'The broth was very thick, and you had to drink it slowly. '
+                        'But it [green]filled you well[/green] and gave '
+                        'you [green]extra energy[/green].\n'
+                        '– Anything else? – the old man asked.\n'
+                        'You tried to recall what other remedies he had listed. '
+                        'The list went something like this:\n'
+                       ) + text
+            elif option_name == 'buy_fly':
+                text = (
+                        'You ate the fly but [green]felt nothing[/green].\n'
+                        'What did you give me?!” you shouted angrily.\n'
+                        '– What did you expect, driver? – the healer replied. – The male '
+                        'chi power does not show up instantly. It needs the right situation, '
+                        'you understand?'
+                        'Well, that sounded convincing enough. Only one way to '
+                        'test his words in practice.'
+                        '– Anything else? – the old man asked.'
+                       ) + text
+            return text
+
+        # Dynamic quest text for dealer on the road
+        if self.state.world.current_location == 'Road - policeman':
+            if option_name == 'wait_policeman':
+                if self.state.world.police_event:
+                    return self.state.world.police_event['policeman']
+            if option_name == 'go_to_impound':
+                if self.state.world.police_event:
+                    return self.state.world.police_event['marshal']
+        return ''
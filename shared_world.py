@@ -0,0 +1,95 @@
+import sqlite3
+import threading
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS stock (
+    station TEXT PRIMARY KEY,
+    offer INTEGER NOT NULL,
+    period INTEGER NOT NULL
+)
+'''
+
+
+class SharedWorld:
+    """
+    Stocks of stations shared by all players of the planet, kept in a SQLite file.
+
+    Every change is one conditional UPDATE (compare and swap on the stock):
+    a purchase succeeds only if the stock still has the goods, so players never
+    read the stock, check it and write it back while others wait behind a lock.
+    Restocks are counted by periods of the game time, every period is added once,
+    whichever player's clock reaches it first.
+
+    Connections are opened per thread in autocommit and WAL mode, so readers
+    don't wait for writers. Copies and pickles of the game keep only the path
+    (e.g. 'planet.db', or 'file:planet?mode=memory&cache=shared' for players in one process).
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the store in the SQLite database (created on the first use)."""
+        self.path = path
+        self._local = threading.local()
+
+    def __reduce__(self):
+        return SharedWorld, (self.path,)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Helper: connection of the current thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         uri=self.path.startswith('file:'), check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def add(self, station: str, offer: int, period: int) -> None:
+        """Put the station to the planet, if nobody has done it yet (the first player sets the stock)."""
+        self._connection().execute(
+            'INSERT OR IGNORE INTO stock (station, offer, period) VALUES (?, ?, ?)',
+            (station, offer, period),
+        )
+
+    def offer(self, station: str) -> int:
+        """Current stock of the station."""
+        row = self._connection().execute('SELECT offer FROM stock WHERE station = ?', (station,)).fetchone()
+        return row[0] if row else 0
+
+    def offers(self) -> dict:
+        """Current stocks of all stations (station -> offer)."""
+        return dict(self._connection().execute('SELECT station, offer FROM stock'))
+
+    def take(self, station: str, amount: int) -> tuple[bool, int]:
+        """
+        Take goods from the stock, if there are enough of them.
+
+        :return: (whether the goods are taken, the stock after the attempt).
+        """
+        rows = self._connection().execute(
+            'UPDATE stock SET offer = offer - ? WHERE station = ? AND offer >= ? RETURNING offer',
+            (amount, station, amount),
+        ).fetchall()
+        if rows:
+            return True, rows[0][0]
+        return False, self.offer(station)
+
+    def restock(self, station: str, period: int, amount: int, max_offer: int) -> int:
+        """
+        Bring goods for periods up to the given one, which are not counted yet (up to the full stock).
+
+        :return: the stock after the restock.
+        """
+        self._connection().execute(
+            'UPDATE stock SET offer = MAX(offer, MIN(offer + ? * (? - period), ?)), period = ? '
+            'WHERE station = ? AND period < ?',
+            (amount, period, max_offer, period, station, period),
+        )
+        return self.offer(station)
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
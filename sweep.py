@@ -0,0 +1,262 @@
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+
+from bots import TRADE_LOOP, RandomBot, ScriptedBot, play
+from game_state import GameState
+from session import GameSession
+
+# Files which change results of the game: the cache is dropped when any of them changes
+ENGINE_FILES = (
+    'bots.py', 'content.py', 'contracts.py', 'effects.py', 'encounters.py', 'engine.py',
+    'game_state.py', 'options.py', 'scheduler.py', 'session.py', 'trade.py', 'traffic.py',
+    'location_actions.json', 'encounters.json', 'delivery_contracts.json',
+)
+
+CACHE_DIR = '.sweep_cache'
+
+# Policy name -> function making the bot for the seed
+POLICIES = {
+    'trade': lambda seed: ScriptedBot(TRADE_LOOP),
+    'random': RandomBot,
+}
+
+# Results of every game, in the order of output columns
+METRICS = ('steps', 'finished', 'cash', 'time', 'fuel', 'health', 'truck_condition')
+
+
+def engine_version(files=ENGINE_FILES) -> str:
+    """Digest of the game rules and content (missing files count as empty)."""
+    digest = hashlib.sha256()
+    for name in files:
+        digest.update(name.encode())
+        try:
+            with open(name, 'rb') as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            pass
+    return digest.hexdigest()[:16]
+
+
+def _resolve(state: GameState, name: str) -> tuple:
+    """
+    Helper: object and attribute of the dotted parameter name (e.g. world.corn_farm.price).
+
+    :raise AttributeError: if there is no such parameter.
+    """
+    *path, field = name.split('.')
+    target = state
+    for part in path:
+        target = getattr(target, part)
+    if not hasattr(target, field):
+        raise AttributeError(f'{name}: no such parameter')
+    return target, field
+
+
+def check_params(grid: dict) -> None:
+    """
+    Checks that all parameters of the grid exist in the game state.
+
+    :raise AttributeError: with the wrong parameter name.
+    """
+    state = GameState()
+    for name in grid:
+        _resolve(state, name)
+
+
+def play_point(params: dict, policy: str, seed: int, max_steps: int) -> dict:
+    """
+    Play one game with the parameters and return its results (see METRICS).
+
+    Random events and the bot are seeded, so the result is the same in any process.
+    """
+    random.seed(seed)
+    state = GameState(traffic_seed=seed)
+    for name, value in params.items():
+        target, field = _resolve(state, name)
+        setattr(target, field, value)
+
+    session = GameSession(state)
+    session.show_location('Spaceport')
+    steps = play(session, POLICIES[policy](seed), max_steps)
+    return {
+        'steps': steps,
+        'finished': 'leave_planet' in state.visited_options,
+        'cash': state.hero.cash,
+        'time': state.world.current_time,
+        'fuel': state.truck.fuel,
+        'health': state.hero.health,
+        'truck_condition': state.truck.truck_condition,
+    }
+
+
+def _play(task: tuple) -> tuple:
+    """Helper: pool task, the key comes back with the results."""
+    key, params, policy, seed, max_steps = task
+    return key, play_point(params, policy, seed, max_steps)
+
+
+def grid_points(grid: dict) -> list:
+    """All combinations of parameter values (parameter name -> list of values)."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_key(params: dict, policy: str, seed: int, max_steps: int, version: str) -> str:
+    """Cache key of one game."""
+    data = json.dumps([params, policy, seed, max_steps, version], sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class ResultCache:
+    """Results of played games on disk, one small json file per game."""
+
+    def __init__(self, path: str = CACHE_DIR) -> None:
+        """Initialize the cache in the directory (created on the first save)."""
+        self.path = path
+
+    def _file(self, key: str) -> str:
+        """Helper: file of the key."""
+        return os.path.join(self.path, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> dict | None:
+        """Saved results or None (a broken file is the same as a missing one)."""
+        try:
+            with open(self._file(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, result: dict) -> None:
+        """Save results, the file is replaced atomically."""
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        temp = f'{file}.{os.getpid()}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(temp, file)
+
+
+def sweep(grid: dict, policy: str = 'trade', seeds=range(10), max_steps: int = 1000,
+          workers: int = 1, cache: ResultCache | None = None, report=print) -> dict:
+    """
+    Play every point of the grid with every seed, cached games are not played again.
+
+    :return: columns: parameters, policy, seed and METRICS, one row per game.
+    """
+    cache = cache or ResultCache()
+    version = engine_version()
+    tasks = []
+    rows = []
+    for params in grid_points(grid):
+        for seed in seeds:
+            key = run_key(params, policy, seed, max_steps, version)
+            rows.append((key, params, seed))
+            if cache.get(key) is None:
+                tasks.append((key, params, policy, seed, max_steps))
+
+    report(f'{len(rows)} games, {len(rows) - len(tasks)} cached, {len(tasks)} to play')
+    if workers <= 1:
+        for key, result in map(_play, tasks):
+            cache.put(key, result)
+    elif tasks:
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(workers) as pool:
+            for key, result in pool.imap_unordered(_play, tasks, chunksize=4):
+                cache.put(key, result)
+
+    columns = {name: [] for name in grid}
+    columns.update({'policy': [], 'seed': []})
+    columns.update({metric: [] for metric in METRICS})
+    for key, params, seed in rows:
+        result = cache.get(key)
+        for name, value in params.items():
+            columns[name].append(value)
+        columns['policy'].append(policy)
+        columns['seed'].append(seed)
+        for metric in METRICS:
+            columns[metric].append(result[metric])
+    return columns
+
+
+def save_columns(path: str, columns: dict, version: str) -> None:
+    """
+    Save columns as gzipped json: {"engine_version": ..., "columns": {name: [values]}}.
+
+    Columns load straight into a data frame, e.g. pandas.DataFrame(data['columns']).
+    """
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({'engine_version': version, 'columns': columns}, f, separators=(',', ':'))
+
+
+def summary(columns: dict, params: list) -> list:
+    """Lines with mean results for every point of the grid."""
+    points = {}
+    for i in range(len(columns['seed'])):
+        point = tuple(columns[name][i] for name in params)
+        points.setdefault(point, []).append(i)
+
+    lines = []
+    for point, rows in points.items():
+        means = '  '.join(
+            f'{metric} {statistics.fmean(float(columns[metric][i]) for i in rows):.1f}'
+            for metric in METRICS
+        )
+        name = ', '.join(f'{name}={value}' for name, value in zip(params, point)) or 'defaults'
+        lines.append(f'{name}: {means}')
+    return lines
+
+
+def _parse_param(text: str) -> tuple:
+    """Helper: NAME=V1,V2,... from the command line (values are json, plain strings otherwise)."""
+    name, _, values = text.partition('=')
+    if not name or not values:
+        raise argparse.ArgumentTypeError(f'expected NAME=V1,V2,...: {text}')
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(json.loads(value))
+        except json.JSONDecodeError:
+            parsed.append(value)
+    return name, parsed
+
+
+def main(argv=None) -> None:
+    """Run the parameter sweep from the command line."""
+    parser = argparse.ArgumentParser(description='Play Space Saga with bots over a grid of game parameters.')
+    parser.add_argument('-p', '--param', type=_parse_param, action='append', default=[],
+                        metavar='NAME=V1,V2', help='parameter values, e.g. world.corn_farm.price=20,25,30')
+    parser.add_argument('--grid', metavar='PATH', help='json file with the grid: {"name": [values]}')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='trade')
+    parser.add_argument('--seeds', type=int, default=10, help='games for every point')
+    parser.add_argument('--max-steps', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--cache', default=CACHE_DIR, help='directory with results of played games')
+    parser.add_argument('--out', metavar='PATH', default='sweep.json.gz', help='columnar results')
+    args = parser.parse_args(argv)
+
+    grid = {}
+    if args.grid:
+        with open(args.grid, 'r', encoding='utf-8') as f:
+            grid.update(json.load(f))
+    grid.update(dict(args.param))
+    try:
+        check_params(grid)
+    except AttributeError as e:
+        parser.error(str(e))
+
+    columns = sweep(grid, args.policy, range(args.seeds), args.max_steps, args.workers, ResultCache(args.cache))
+    save_columns(args.out, columns, engine_version())
+    for line in summary(columns, list(grid)):
+        print(line)
+    print(f'Results: {args.out}')
+
+
+if __name__ == '__main__':
+    main()
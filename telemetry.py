@@ -0,0 +1,245 @@
+import argparse
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+from options import LOCATION_IDS, OPTION_IDS
+
+TELEMETRY_DIR = 'telemetry'
+# Records in the ring buffer (a power of two)
+CAPACITY = 1 << 14
+# Seconds between flushes of the buffer
+FLUSH_INTERVAL = 1.0
+
+# Columns of a record: name and array type code
+COLUMNS = (
+    ('wall_time', 'd'),
+    ('option', 'I'),
+    ('location', 'I'),
+    ('game_time', 'i'),
+    ('cash', 'i'),
+    ('fuel', 'i'),
+    ('latency_us', 'f'),
+)
+# Columns with interned ids and their interners, blocks keep names of the ids
+NAMED = {'option': OPTION_IDS, 'location': LOCATION_IDS}
+
+MAGIC = b'TLM1'
+_HEADER = struct.Struct('<4sI')
+_SIZE = struct.Struct('<I')
+
+
+class Telemetry:
+    """
+    Per-action telemetry of the game: option, location, game time, cash, fuel and latency.
+
+    Records are written into preallocated columns of a ring buffer,
+    so recording an action is a few array assignments without locks or I/O.
+    A background thread takes filled records in batches and appends them
+    to the file of the day as a columnar block (see write_block).
+    When the buffer is full new records are dropped and counted,
+    the game never waits for the disk.
+    """
+
+    def __init__(self, directory: str = TELEMETRY_DIR, capacity: int = CAPACITY,
+                 interval: float = FLUSH_INTERVAL) -> None:
+        """Allocate the buffer and start the flushing thread."""
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.capacity = capacity
+        self.columns = {name: array(code, [0]) * capacity for name, code in COLUMNS}
+        # Records are numbered from the start: head is the next record to write,
+        # tail is the next one to flush (only the flushing thread moves it)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def record(self, option_id: str, state, latency: float) -> None:
+        """Record the selected option with the game state after it and the latency in seconds."""
+        head = self.head
+        used = head - self.tail
+        if used >= self.capacity:
+            self.dropped += 1
+            return
+        i = head % self.capacity
+        world = state.world
+        columns = self.columns
+        columns['wall_time'][i] = time.time()
+        columns['option'][i] = OPTION_IDS.intern(option_id)
+        columns['location'][i] = LOCATION_IDS.intern(world.current_location)
+        columns['game_time'][i] = world.current_time
+        columns['cash'][i] = int(state.hero.cash)
+        columns['fuel'][i] = int(state.truck.fuel)
+        columns['latency_us'][i] = latency * 1e6
+        # The record is visible to the flushing thread only when it is complete
+        self.head = head + 1
+        if used + 1 == self.capacity // 2:
+            self._wake.set()
+
+    def _take(self) -> dict | None:
+        """Helper: copies of filled records (None if there are none), their place is freed."""
+        head = self.head
+        tail = self.tail
+        if head == tail:
+            return None
+        start = tail % self.capacity
+        end = start + (head - tail)
+        batch = {}
+        for name, column in self.columns.items():
+            if end <= self.capacity:
+                batch[name] = column[start:end]
+            else:
+                batch[name] = column[start:] + column[:end - self.capacity]
+        self.tail = head
+        return batch
+
+    def flush(self) -> None:
+        """Write filled records to the file of the day (called by the flushing thread)."""
+        batch = self._take()
+        if batch is None:
+            return
+        day = datetime.fromtimestamp(batch['wall_time'][0], timezone.utc).date().isoformat()
+        with open(day_file(self.directory, day), 'ab') as f:
+            write_block(f, batch)
+
+    def _run(self) -> None:
+        """Helper: flush the buffer every interval or when it is half full."""
+        while not self._stop:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the thread and write the rest of records."""
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+
+def day_file(directory: str, day: str) -> str:
+    """File with telemetry of the day (YYYY-MM-DD, UTC)."""
+    return os.path.join(directory, f'{day}.tlm')
+
+
+def write_block(f, batch: dict) -> None:
+    """
+    Append the block of records: the header (magic, number of records),
+    names of interned ids in NAMED columns, then every column of COLUMNS
+    as compressed raw values in the native byte order.
+    """
+    count = len(batch['wall_time'])
+    parts = [_HEADER.pack(MAGIC, count)]
+    for name, interner in NAMED.items():
+        ids = array('I', sorted(set(batch[name])))
+        names = '\0'.join(interner.names[i] for i in ids).encode()
+        parts += [_SIZE.pack(len(ids)), ids.tobytes(), _SIZE.pack(len(names)), names]
+    for name, _ in COLUMNS:
+        data = zlib.compress(batch[name].tobytes(), 1)
+        parts += [_SIZE.pack(len(data)), data]
+    f.write(b''.join(parts))
+
+
+def _read(data: bytes, offset: int, size: int) -> tuple[bytes, int]:
+    """Helper: bytes of the size at the offset and the offset after them."""
+    if offset + size > len(data):
+        raise ValueError('Telemetry block is cut off')
+    return data[offset:offset + size], offset + size
+
+
+def read_blocks(data: bytes):
+    """
+    Blocks of the telemetry file: (columns, names) for every block.
+
+    A block cut off by a crash ends the reading.
+    """
+    offset = 0
+    while offset < len(data):
+        try:
+            header, offset = _read(data, offset, _HEADER.size)
+            magic, count = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError('Not a telemetry block')
+            names = {}
+            for name in NAMED:
+                size, offset = _read(data, offset, _SIZE.size)
+                ids = array('I')
+                raw, offset = _read(data, offset, _SIZE.unpack(size)[0] * ids.itemsize)
+                ids.frombytes(raw)
+                size, offset = _read(data, offset, _SIZE.size)
+                text, offset = _read(data, offset, _SIZE.unpack(size)[0])
+                names[name] = dict(zip(ids, text.decode().split('\0'))) if ids else {}
+            columns = {}
+            for name, code in COLUMNS:
+                size, offset = _read(data, offset, _SIZE.size)
+                raw, offset = _read(data, offset, _SIZE.unpack(size)[0])
+                columns[name] = array(code, zlib.decompress(raw))
+        except (ValueError, struct.error, zlib.error) as e:
+            print(f'Telemetry file is damaged, the rest is skipped: {e}')
+            return
+        if any(len(column) != count for column in columns.values()):
+            print('Telemetry block has columns of different lengths, the rest is skipped')
+            return
+        yield columns, names
+
+
+def load_day(day: str, directory: str = TELEMETRY_DIR) -> dict:
+    """
+    Telemetry of the day as arrays: one array per column of COLUMNS.
+
+    Option and location columns hold codes of names in the lists
+    'option_names' and 'location_names' (codes are the same for the whole day).
+    """
+    result = {name: array(code) for name, code in COLUMNS}
+    codes = {name: {} for name in NAMED}
+    try:
+        with open(day_file(directory, day), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        print(f'No telemetry for {day}.')
+        data = b''
+
+    for columns, names in read_blocks(data):
+        for name, column in columns.items():
+            if name in NAMED:
+                day_codes = codes[name]
+                recode = {i: day_codes.setdefault(text, len(day_codes)) for i, text in names[name].items()}
+                column = array('I', (recode[i] for i in column))
+            result[name].extend(column)
+    for name in NAMED:
+        result[f'{name}_names'] = list(codes[name])
+    return result
+
+
+def main(argv=None) -> None:
+    """Print the summary of a day's telemetry from the command line."""
+    parser = argparse.ArgumentParser(description='Summary of Space Saga telemetry.')
+    parser.add_argument('day', nargs='?', default=datetime.now(timezone.utc).date().isoformat(),
+                        help='YYYY-MM-DD (UTC, today by default)')
+    parser.add_argument('--dir', default=TELEMETRY_DIR)
+    args = parser.parse_args(argv)
+
+    data = load_day(args.day, args.dir)
+    latencies = sorted(data['latency_us'])
+    print(f'{len(latencies)} actions')
+    if latencies:
+        print(f'latency: median {latencies[len(latencies) // 2]:.0f} us, '
+              f'p99 {latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]:.0f} us')
+        counts = {}
+        for code in data['option']:
+            counts[code] = counts.get(code, 0) + 1
+        for code, count in sorted(counts.items(), key=lambda item: -item[1])[:10]:
+            print(f'{count:8}  {data["option_names"][code]}')
+
+
+if __name__ == '__main__':
+    main()
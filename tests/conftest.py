@@ -0,0 +1,26 @@
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def game_directory(monkeypatch):
+    """Content files are read relative to the game directory, random events are seeded."""
+    monkeypatch.chdir(ROOT)
+    random.seed(0)
+
+
+@pytest.fixture
+def session():
+    """New game at the spaceport."""
+    from game_state import GameState
+    from session import GameSession
+
+    game = GameSession(GameState(traffic_seed=0))
+    game.show_location('Spaceport')
+    return game
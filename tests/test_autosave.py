@@ -0,0 +1,20 @@
+from autosave import read_save, write_save
+
+
+def test_save_round_trip(tmp_path):
+    path = str(tmp_path / 'game.sav')
+    write_save(path, b'snapshot')
+    write_save(path, b'newer snapshot')
+    assert read_save(path) == b'newer snapshot'
+    assert not (tmp_path / 'game.sav.tmp').exists()
+
+
+def test_missing_or_broken_save(tmp_path):
+    path = tmp_path / 'game.sav'
+    assert read_save(str(path)) is None
+    write_save(str(path), b'snapshot' * 100)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 2])
+    assert read_save(str(path)) is None
+    path.write_bytes(data[:10] + bytes(len(data) - 10))
+    assert read_save(str(path)) is None
@@ -0,0 +1,33 @@
+from benchmarks.harness import Stats, compare, load_baseline, save_baseline
+from bots import TRADE_LOOP, RandomBot, ScriptedBot, play
+
+
+def _stats(name: str, median: float, spread: float = 0.0) -> Stats:
+    return Stats.from_times(name, [median - spread, median, median + spread], 1000)
+
+
+def test_compare_with_the_baseline(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    save_baseline(path, [_stats('drive', 1.0), _stats('render', 1.0), _stats('noisy', 1.0, 0.2)])
+    baseline = load_baseline(path)
+    results = [_stats('drive', 1.5), _stats('render', 0.5), _stats('noisy', 1.2, 0.2), _stats('hash', 1.0)]
+    lines, regressions = compare(baseline, results, threshold=0.1)
+    assert regressions == ['drive']
+    verdicts = [line.split()[-1] for line in lines]
+    assert verdicts == ['SLOWER', 'faster', 'same', 'new']
+
+
+def test_trade_loop_leaves_the_planet(session):
+    steps = play(session, ScriptedBot(TRADE_LOOP))
+    assert 0 < steps < 1000
+    assert 'leave_planet' in session.state.visited_options
+
+
+def test_random_bot_selects_shown_options(session):
+    bot = RandomBot(1)
+    for _ in range(200):
+        option_id = bot.choose(session)
+        if option_id is None:
+            break
+        assert option_id in [option.id for option in session.options if not option.disabled]
+        session.select(option_id)
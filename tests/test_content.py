@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from content import LOCATIONS_FILE, ContentReloader, diff_locations, valid_options_path
+from effects import ContentError
+from game_state import GameState
+from options import LOCATION_IDS, OPTION_IDS
+from session import GameSession
+
+
+@pytest.fixture
+def locations(tmp_path):
+    """Copy of location_actions.json and the function writing its new version."""
+    path = tmp_path / LOCATIONS_FILE
+    with open(LOCATIONS_FILE, encoding='utf-8') as f:
+        content = json.load(f)
+
+    def write(changed: dict) -> None:
+        path.write_text(json.dumps(changed), encoding='utf-8')
+
+    write(content)
+    return str(path), content, write
+
+
+def test_reload_replaces_only_changed_locations(locations):
+    path, content, write = locations
+    state = GameState()
+    reloader = ContentReloader(state, path)
+    reloader.load()
+    assert not reloader.has_changed()
+    # Changes made by the game survive in locations which were not changed in the file,
+    # the game replaces a location instead of changing the shared one
+    state.locations['Brackenbridge'] = dict(state.locations['Brackenbridge'], description='Changed by the game.')
+    content['Spaceport']['description'] = 'Reloaded spaceport.'
+    del content['Erratic Rocks']
+    write(content)
+    assert reloader.has_changed()
+    assert reloader.reload() == {'Spaceport', 'Erratic Rocks'}
+    assert state.locations['Spaceport']['description'] == 'Reloaded spaceport.'
+    assert state.locations['Brackenbridge']['description'] == 'Changed by the game.'
+    assert 'Erratic Rocks' not in state.locations
+    assert not reloader.has_changed()
+
+
+def test_broken_file_keeps_content(locations):
+    path, _, _ = locations
+    state = GameState()
+    reloader = ContentReloader(state, path)
+    reloader.load()
+    loaded = state.locations
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{')
+    with pytest.raises(ContentError):
+        reloader.reload()
+    assert state.locations is loaded
+    assert not reloader.has_changed()
+
+
+def test_wrong_option_keeps_content(locations, session):
+    path, content, write = locations
+    session.content.path = path
+    spaceport = content['Spaceport']['options']
+    spaceport['new_option'] = {'description': 'New', 'effects': {'cash': 1}}
+    next(iter(spaceport.values()))['effects'] = {'no_such_effect': 1}
+    option_ids = len(OPTION_IDS.names)
+    programs = session.engine.programs
+    loaded = session.state.locations
+    write(content)
+    with pytest.raises(ContentError, match='no_such_effect'):
+        session.reload_locations()
+    assert session.engine.programs is programs
+    assert session.state.locations is loaded
+    assert len(OPTION_IDS.names) == option_ids
+    assert 'new_option' not in OPTION_IDS.ids
+    assert not session.reload_locations()
+
+
+def test_compile_checks_every_location_first():
+    game = GameSession(GameState())
+    locations = {
+        'Spaceport': {'options': {'unchecked_option': {'description': 'Fine'}}},
+        'Nowhere': {'options': {'wrong_option': {'goto': 'Spaceport', 'color': 'red'}}},
+    }
+    location_ids = len(LOCATION_IDS.names)
+    with pytest.raises(ContentError, match='color'):
+        game.engine.compile_locations(locations)
+    assert 'unchecked_option' not in OPTION_IDS.ids
+    assert len(LOCATION_IDS.names) == location_ids
+
+
+def test_diff_locations():
+    old = {'A': {'description': 'a'}, 'B': {'description': 'b'}}
+    new = {'A': {'description': 'changed'}, 'C': {}}
+    assert diff_locations(old, new) == ({'A', 'C'}, {'B'})
+    assert diff_locations(old, old) == (set(), set())
+
+
+def test_valid_options_path():
+    location = {'options': {'bar': {'options': {'drink': {'options': {}}, 'dance': {}}}}}
+    assert valid_options_path(location, ['bar', 'drink']) == ['bar', 'drink']
+    assert valid_options_path(location, ['bar', 'dance']) == ['bar']
+    assert valid_options_path(location, ['bar', 'sing']) == ['bar']
+    assert valid_options_path(location, ['casino']) == []
+    assert valid_options_path(None, ['bar']) == []
+
+
+def test_session_stays_on_the_dialogue_level(locations, session):
+    path, content, write = locations
+    session.content.path = path
+    session.select('go_spaceport')
+    session.select('enter_hut')
+    hut = content['Spaceport']['options']['go_spaceport']['options']['enter_hut']
+    hut['description'] = 'Reloaded hut.'
+    hut['options']['about_weather'] = {'text': 'Ask about the weather'}
+    write(content)
+    assert session.reload_locations()
+    assert session.options_stack == ['go_spaceport', 'enter_hut']
+    assert session.text == 'Reloaded hut.'
+    assert 'about_weather' in [option.id for option in session.options]
+    # The level is gone, the player returns to its parent
+    del content['Spaceport']['options']['go_spaceport']['options']['enter_hut']
+    write(content)
+    assert session.reload_locations()
+    assert session.options_stack == ['go_spaceport']
+    assert not session.reload_locations()
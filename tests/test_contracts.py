@@ -0,0 +1,96 @@
+import random
+
+from contracts import parse_contracts
+from engine import Engine
+from game_state import GameState
+
+CONTRACTS = {
+    'miner': {
+        'origin': 'Mining Settlement',
+        'destination': 'Brackenbridge',
+        'offer': {'option': 'back_to_road', 'chance': 0.5, 'text': 'Lift?'},
+        'reward': {'cash': 40},
+    },
+    'boy': {
+        'origin': 'Mining Settlement',
+        'destination': 'The Stingray Bar',
+        'offer': {'option': 'back_to_road', 'chance': 1, 'text': 'Lift?'},
+        'reward': {'cash': 30},
+    },
+    'crate': {
+        'who': 'crate of tools',
+        'origin': 'Brackenbridge',
+        'destination': 'Mining Settlement',
+        'reward': {'cash': 20, 'ammo': 2},
+        'load': 5,
+        'hide_options': ['go_to_warehouse'],
+    },
+}
+
+
+def _engine() -> Engine:
+    engine = Engine(GameState())
+    engine.contracts = parse_contracts(CONTRACTS)
+    return engine
+
+
+def test_offers_are_indexed_by_location_and_option():
+    book = parse_contracts(CONTRACTS)
+    assert [contract.id for contract in book.offers_for('Mining Settlement', 'back_to_road')] == ['miner', 'boy']
+    assert book.offers_for('Brackenbridge', 'back_to_road') == []
+    crate = book.get('crate')
+    assert crate.who == 'crate of tools' and not crate.is_passenger
+    assert book.get('miner').who == 'miner' and book.get('miner').is_passenger
+
+
+def test_one_passenger_seat():
+    engine = _engine()
+    miner, boy = (engine.contracts.get(contract_id) for contract_id in ('miner', 'boy'))
+    assert engine.can_take_contract(miner)
+    engine.take_contract('miner')
+    assert not engine.can_take_contract(miner)
+    assert not engine.can_take_contract(boy)
+    # The only passenger who could take the seat has taken it
+    assert engine.offer_contract('Mining Settlement', 'back_to_road') is None
+
+
+def test_offers_are_checked_in_order():
+    engine = _engine()
+    random.seed(0)
+    offers = [engine.offer_contract('Mining Settlement', 'back_to_road').id for _ in range(200)]
+    assert set(offers) == {'miner', 'boy'}
+    assert 60 < offers.count('miner') < 140
+    assert engine.offer_contract('Mining Settlement', 'go_to_mine') is None
+
+
+def test_cargo_takes_space_until_delivered():
+    engine = _engine()
+    state = engine.state
+    space = state.truck.truck_space
+    cash = state.hero.cash
+    ammo = state.hero.ammo
+    engine.take_contract('crate')
+    engine.take_contract('miner')
+    assert state.truck.truck_space == space - 5
+    assert 'go_to_warehouse' in state.invisible_options
+    assert engine.deliver_contracts('Brackenbridge') == [engine.contracts.get('miner')]
+    assert engine.deliver_contracts('Brackenbridge') == []
+    assert [contract.id for contract in engine.deliver_contracts('Mining Settlement')] == ['crate']
+    assert state.truck.truck_space == space
+    assert state.hero.cash == cash + 60
+    assert state.hero.ammo == ammo + 2
+    assert not state.truck.contracts
+
+
+def test_cargo_needs_space():
+    engine = _engine()
+    engine.state.truck.truck_space = 4
+    assert not engine.can_take_contract(engine.contracts.get('crate'))
+
+
+def test_game_contracts_are_loaded():
+    engine = Engine(GameState())
+    drox = engine.contracts.get('drox')
+    assert drox.offer is None
+    assert drox.reward['shotgun']
+    assert all(contract.origin != contract.destination for contract in engine.contracts.contracts.values())
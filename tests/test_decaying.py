@@ -0,0 +1,64 @@
+from game_state import Decaying, GameState
+from zobrist import full_hash
+
+
+class Candle:
+    height = Decaying(3, 60, '_now')
+
+    def __init__(self, height: int) -> None:
+        self.time = 0
+        self.height = height
+
+    def _now(self) -> int:
+        return self.time
+
+
+def test_value_falls_with_the_clock():
+    candle = Candle(10)
+    candle.time = 19
+    assert candle.height == 10
+    candle.time = 20
+    assert candle.height == 9
+    candle.time = 60
+    assert candle.height == 7
+    candle.time = 150
+    assert candle.height == 3
+
+
+def test_decay_stops_at_zero():
+    candle = Candle(10)
+    candle.time = 10 ** 6
+    assert candle.height == 0
+    # A value set below zero (e.g. by a fight) is kept, it does not fall further
+    candle.height = -5
+    candle.time *= 2
+    assert candle.height == -5
+
+
+def test_setting_restarts_the_clock():
+    candle = Candle(10)
+    candle.time = 120
+    candle.height = candle.height + 4
+    assert (candle.height_level, candle.height_since) == (8, 120)
+    candle.time = 180
+    assert candle.height == 5
+
+
+def test_needs_and_wear_of_the_game():
+    state = GameState()
+    hero, truck = state.hero, state.truck
+    state.world.current_time += 3 * 60
+    assert hero.fatigue == hero.hanger == 94
+    truck.mileage += 250
+    assert truck.truck_condition == 95
+    state.world.current_time += 10 ** 6
+    assert hero.fatigue == hero.hanger == 0
+
+
+def test_decay_keeps_the_hash():
+    state = GameState()
+    state.state_hash()
+    state.world.current_time += 600
+    state.truck.mileage += 300
+    state.hero.fatigue += 10
+    assert state.state_hash() == full_hash(state)
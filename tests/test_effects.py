@@ -0,0 +1,100 @@
+import copy
+import random
+
+import pytest
+
+from content import ContentReloader, load_locations
+from effects import ContentError, check_option, compile_option
+from engine import Engine
+from game_state import GameState
+
+
+def _paths(options: dict, stack: tuple = ()):
+    for option_id, option in options.items():
+        yield stack + (option_id,), option
+        if option.get('options'):
+            yield from _paths(option['options'], stack + (option_id,))
+
+
+def _plain(value):
+    """Game objects as nested dicts of their fields, for comparison."""
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if hasattr(value, '__dict__'):
+        # Private fields link back to the world
+        return _plain({key: item for key, item in vars(value).items() if not key.startswith('_')})
+    return value
+
+
+def _values(state: GameState) -> dict:
+    return _plain({name: getattr(state, name) for name in ('world', 'hero', 'truck', 'invisible_options')})
+
+
+def _run(fn) -> str | None:
+    """Helper: call with the same random numbers, :return: the name of the raised exception."""
+    random.seed(1)
+    try:
+        fn()
+    except Exception as e:
+        return type(e).__name__
+    return None
+
+
+@pytest.mark.parametrize('option, message', [
+    ({'txt': 'Typo'}, 'unknown option key "txt"'),
+    ({'effects': [1]}, 'effects must be an object'),
+    ({'effects': {'cahs': 5}}, 'unknown effect "cahs"'),
+    ({'effects': {'cash': '5'}}, 'effect "cash" must be a number'),
+    ({'effects': {'fuel': True}}, 'effect "fuel" must be a number'),
+])
+def test_wrong_options(option, message):
+    with pytest.raises(ContentError, match=f'Spaceport > bar > drink: {message}'):
+        check_option(('Spaceport', 'bar', 'drink'), option)
+
+
+def test_right_options():
+    check_option(('Spaceport', 'go'), {'text': 'Go', 'goto': 'Brackenbridge', 'effects': {'distance': 5, 'corn': 1}})
+    check_option(('Spaceport', 'wait'), {'description': 'Wait', 'options': {}})
+
+
+def test_programs_do_what_effects_do():
+    locations = load_locations()
+    for name, location in locations.items():
+        for path, option in _paths(location.get('options') or {}):
+            compiled, interpreted = Engine(GameState(traffic_seed=0)), Engine(GameState(traffic_seed=0))
+            for engine in (compiled, interpreted):
+                engine.state.locations = copy.deepcopy(locations)
+                engine.state.world.current_location = name
+            program = compile_option((name,) + path, option)
+
+            # Engine.select_option and Engine.run_action let the world catch up after them
+            def run_program():
+                program(compiled)
+                compiled.advance_world()
+
+            def interpret():
+                interpreted.apply_effect(option.get('effects'))
+                interpreted.run_action(path[-1], option.get('effects'))
+                interpreted.advance_world()
+
+            # Some actions need the state of their quest and fail in a new game, both in the same way
+            assert _run(run_program) == _run(interpret), (name, path)
+            assert _values(compiled.state) == _values(interpreted.state), (name, path)
+
+
+def test_wrong_location_is_not_compiled():
+    state = GameState()
+    engine = Engine(state)
+    reloader = ContentReloader(state, compiler=engine.compile_locations)
+    reloader.load()
+    programs = engine.programs['Spaceport']
+    locations = {
+        'Spaceport': {'options': {'go_spaceport': {'description': 'Fine'}}},
+        'Nowhere': {'options': {'wrong_option': {'effects': {'color': 1}}}},
+    }
+    with pytest.raises(ContentError, match='Nowhere > wrong_option: unknown effect "color"'):
+        engine.compile_locations(locations)
+    assert engine.programs['Spaceport'] is programs
+    assert 'Nowhere' not in engine.programs
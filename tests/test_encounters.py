@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from encounters import AliasTable, EncounterTable, load_encounters
+
+
+def _probabilities(table: AliasTable) -> dict:
+    """Exact probabilities of outcomes (by id, None for nothing) from the columns of the table."""
+    n = len(table.outcomes)
+    result = {}
+    for i, outcome in enumerate(table.outcomes):
+        for j, share in ((i, table.prob[i]), (table.alias[i], 1 - table.prob[i])):
+            key = table.outcomes[j] and table.outcomes[j]['id']
+            result[key] = result.get(key, 0.0) + share / n
+    return {key: p for key, p in result.items() if p > 1e-12}
+
+
+def _events(*events) -> list:
+    return [dict(id=event_id, **data) for event_id, data in events]
+
+
+def test_alias_table_follows_weights():
+    table = AliasTable(['a', 'b', 'c', 'd'], [1, 2, 3, 0])
+    rng = random.Random(1)
+    samples = [table.sample(rng) for _ in range(60000)]
+    for outcome, weight in (('a', 1), ('b', 2), ('c', 3)):
+        assert samples.count(outcome) / len(samples) == pytest.approx(weight / 6, abs=0.01)
+    assert 'd' not in samples
+
+
+def test_empty_alias_table():
+    assert AliasTable([], []).sample() is None
+    assert AliasTable(['a'], [0]).sample() is None
+
+
+def test_hour_windows():
+    table = EncounterTable('road', _events(
+        ('night', {'hours': [23, 5]}),
+        ('day', {'hours': [5, 23], 'weight': 3}),
+        ('always', {}),
+    ))
+    assert _probabilities(table._default[23]) == pytest.approx({'night': 0.5, 'always': 0.5})
+    assert _probabilities(table._default[4]) == pytest.approx({'night': 0.5, 'always': 0.5})
+    assert _probabilities(table._default[5]) == pytest.approx({'day': 0.75, 'always': 0.25})
+    assert _probabilities(table._default[22]) == pytest.approx({'day': 0.75, 'always': 0.25})
+
+
+def test_location_windows_and_chance():
+    table = EncounterTable('city', _events(
+        ('thief', {'locations': ['Brackenbridge']}),
+        ('beggar', {'weight': 3}),
+    ), chance=0.2)
+    assert _probabilities(table._tables['Brackenbridge', 12]) == pytest.approx(
+        {'thief': 0.05, 'beggar': 0.15, None: 0.8})
+    assert _probabilities(table._default[12]) == pytest.approx({'beggar': 0.2, None: 0.8})
+    random.seed(2)
+    events = [table.sample('Mining Settlement', 12) for _ in range(1000)]
+    assert {event and event['id'] for event in events} == {'beggar', None}
+
+
+def test_nothing_possible():
+    table = EncounterTable('police', _events(('patrol', {'hours': [8, 9]})), chance=0.5)
+    assert table.sample(None, 10) is None
+
+
+def test_game_tables_are_loaded():
+    tables = load_encounters()
+    assert tables
+    for table in tables.values():
+        for hour in range(24):
+            probabilities = _probabilities(table._default[hour])
+            assert not probabilities or sum(probabilities.values()) == pytest.approx(1)
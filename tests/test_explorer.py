@@ -0,0 +1,80 @@
+from explorer import Abstraction, Explorer, _prices, abstract_key
+
+
+def test_mileage_is_not_in_the_key(session):
+    abstraction = Abstraction()
+    key = abstract_key(session, abstraction)
+    truck = session.state.truck
+    truck.mileage += 10
+    assert abstract_key(session, abstraction) == key
+    # The condition worn by the mileage is kept
+    truck.mileage += 100
+    assert abstract_key(session, abstraction) != key
+    truck.truck_condition = 100
+    assert abstract_key(session, abstraction) == key
+
+
+def test_trade_history_is_not_in_the_key(session):
+    market = session.state.world.corn_farm
+    (name, price), *_ = _prices(market)
+    coarse = Abstraction(price_bucket=10 ** 6)
+    exact = Abstraction()
+    coarse_key = abstract_key(session, coarse)
+    exact_key = abstract_key(session, exact)
+    price.trade(market, 0)
+    assert abstract_key(session, coarse) == coarse_key
+    assert abstract_key(session, exact) == exact_key
+    price.trade(market, 50)
+    assert getattr(market, name) != market.price_after(name, -50)
+    assert abstract_key(session, coarse) == coarse_key
+    assert abstract_key(session, exact) != exact_key
+
+
+def test_cash_above_the_cap_is_merged(session):
+    abstraction = Abstraction(cash_cap=200)
+    session.state.hero.cash = 300
+    key = abstract_key(session, abstraction)
+    session.state.hero.cash = 5000
+    assert abstract_key(session, abstraction) == key
+    session.state.hero.cash = 100
+    assert abstract_key(session, abstraction) != key
+
+
+def test_time_of_day_is_bucketed(session):
+    abstraction = Abstraction(time_bucket=60)
+    world = session.state.world
+    world.current_time = 600
+    # Needs decaying with time stay at zero
+    session.state.hero.fatigue = session.state.hero.hanger = 0
+    key = abstract_key(session, abstraction)
+    world.current_time = 659
+    assert abstract_key(session, abstraction) == key
+    world.current_time = 600 + 1440
+    assert abstract_key(session, abstraction) == key
+    world.current_time = 660
+    assert abstract_key(session, abstraction) != key
+
+
+def test_negative_stats_are_merged(session):
+    abstraction = Abstraction()
+    session.state.truck.fuel = 0
+    key = abstract_key(session, abstraction)
+    session.state.truck.fuel = -7
+    assert abstract_key(session, abstraction) == key
+
+
+def test_exploration_is_reproducible():
+    reports = [
+        Explorer(max_states=300, workers=workers).run().report({})
+        for workers in (1, 1, 2)
+    ]
+    assert reports[0]['states'] >= 300
+    assert not reports[0]['complete']
+    assert reports[0] == reports[1] == reports[2]
+
+
+def test_report_finds_unreachable_content():
+    explorer = Explorer(max_states=50).run()
+    report = explorer.report({'Nowhere': {'options': {'wait': {}}}})
+    assert report['unreachable_locations'] == ['Nowhere']
+    assert report['unreachable_options'] == {'Nowhere': ['wait']}
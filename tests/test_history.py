@@ -0,0 +1,38 @@
+from history import Run, RunHistory, simulate
+
+
+def _run(player: str, days: int, cash: int) -> Run:
+    return Run(player, 'game', 0.0, days, days * 1440, cash, ('Spaceport',), ('buy_corn_10',))
+
+
+def test_top_and_rank(tmp_path):
+    history = RunHistory(str(tmp_path / 'runs.db'), batch_size=2)
+    for run in (_run('ann', 5, 100), _run('bob', 3, 50), _run('ann', 3, 200), _run('bob', 7, 900)):
+        history.add(run)
+    history.flush()
+    assert [(run.player, run.days, run.cash) for run in history.top(3)] == [
+        ('ann', 3, 200), ('bob', 3, 50), ('ann', 5, 100),
+    ]
+    assert [run.cash for run in history.best('bob')] == [50, 900]
+    assert history.count() == 4
+    assert history.count('ann') == 2
+    assert history.rank(_run('eve', 3, 100)) == 2
+    assert history.rank(_run('eve', 2, 0)) == 1
+    assert history.top(1)[0].route == ('Spaceport',)
+    history.close()
+
+
+def test_batch_is_written_when_full(tmp_path):
+    path = str(tmp_path / 'runs.db')
+    history = RunHistory(path, batch_size=2)
+    history.add(_run('ann', 5, 100))
+    assert RunHistory(path).count() == 0
+    history.add(_run('ann', 4, 100))
+    assert RunHistory(path).count() == 2
+
+
+
+def test_simulation_is_reproducible():
+    runs = [simulate((seed, 'trade', 1000)) for seed in (3, 3)]
+    assert runs[0] is not None
+    assert runs[0][3:] == runs[1][3:]
@@ -0,0 +1,70 @@
+import threading
+from multiprocessing import Pipe
+
+import pytest
+
+from hosting import HostingError, Router, Worker
+from session import OptionError
+
+
+def test_session_moves_between_workers():
+    first, second = Worker(), Worker()
+    _, options = first.new('ann')
+    text, options = first.select('ann', options[0].id)
+    second.load('ann', first.snapshot('ann'))
+    first.drop('ann')
+    assert first.session_ids() == []
+    assert second.view('ann') == (text, options)
+
+
+def test_errors():
+    worker = Worker()
+    worker.new('ann')
+    with pytest.raises(HostingError):
+        worker.new('ann')
+    with pytest.raises(HostingError):
+        worker.view('bob')
+    with pytest.raises(OptionError):
+        worker.select('ann', 'no_such_option')
+    with pytest.raises(Exception):
+        worker.load('bob', b'broken')
+    assert worker.session_ids() == ['ann']
+
+
+def test_stats():
+    worker = Worker()
+    worker.new('ann')
+    stats = worker.stats()
+    assert stats['sessions'] == 1
+    assert stats['rss_kb'] > 0
+
+
+def test_serve():
+    worker = Worker()
+    master, connection = Pipe()
+    thread = threading.Thread(target=worker.serve, args=(connection,))
+    thread.start()
+    master.send(('new', 'ann'))
+    assert master.recv()[0] == 'ok'
+    master.send(('select', 'ann', 'no_such_option'))
+    assert master.recv()[0] == 'error'
+    master.send(('dance',))
+    assert master.recv() == ('error', 'HostingError: Unknown command: dance')
+    master.send(('stop',))
+    assert master.recv() == ('ok', None)
+    thread.join()
+
+
+def test_restart_of_the_only_worker_keeps_sessions(tmp_path):
+    router = Router(str(tmp_path), 1)
+    try:
+        _, options = router.new_session('ann')
+        view = router.select('ann', options[0].id)
+        with pytest.raises(HostingError):
+            router.drain('worker-0')
+        router.restart('worker-0')
+        assert router.active == ['worker-0']
+        assert router.sessions('worker-0') == ['ann']
+        assert router.view('ann') == view
+    finally:
+        router.close()
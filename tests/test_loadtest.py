@@ -0,0 +1,37 @@
+from bots import option_kinds
+from content import load_locations
+from loadtest import compare, main, percentile, run
+
+
+def test_percentile():
+    times = [0.1 * i for i in range(1, 11)]
+    assert percentile(times, 0.5) == times[5]
+    assert percentile(times, 0.99) == times[-1]
+    assert percentile([], 0.5) == 0.0
+
+
+def test_compare_with_the_baseline():
+    baseline = {'throughput': 1000, 'p50_ms': 1.0, 'p99_ms': 2.0, 'memory_kb_per_session': 0}
+    results = {'throughput': 800, 'p50_ms': 1.05, 'p99_ms': 3.0, 'memory_kb_per_session': 50}
+    regressions = compare(results, baseline, threshold=0.1)
+    assert [line.split(':')[0] for line in regressions] == ['throughput', 'p99_ms']
+
+
+def test_option_kinds():
+    kinds = option_kinds(load_locations())
+    assert kinds['buy_corn_10'] == 'trade'
+    assert kinds['go_farm'] == 'travel'
+    assert set(kinds.values()) == {'travel', 'trade', 'back', 'talk'}
+
+
+def test_local_run():
+    results = run(clients=3, steps=5, report=lambda *_: None)
+    assert results['steps'] == 15
+    assert results['snapshot_bytes'] > 0
+
+
+def test_no_results_outside_the_game_directory(monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert main(['--clients', '1', '--save', 'results.json']) == 2
+    assert 'No locations' in capsys.readouterr().out
+    assert not (tmp_path / 'results.json').exists()
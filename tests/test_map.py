@@ -0,0 +1,21 @@
+from map import CURRENT_STYLE, DESTINATION_STYLE, ROUTE_STYLE, MapFrames
+from traffic import road_graph
+
+
+def test_every_road_is_on_the_map(session):
+    roads = road_graph(session.state.locations)
+    frames = MapFrames(roads)
+    assert roads
+    assert set(frames.paths) == set(roads)
+
+
+def test_frames(session):
+    roads = road_graph(session.state.locations)
+    frames = MapFrames(roads)
+    assert f'[{CURRENT_STYLE}]' in frames.frame('Spaceport')
+    assert frames.frame('Road encounter') == frames.base
+    route = frames.frame('Spaceport', 'Brackenbridge')
+    assert f'[{DESTINATION_STYLE}]' in route and f'[{ROUTE_STYLE}]' in route
+    assert frames.frame('Spaceport', 'Brackenbridge') is route
+    assert frames.frame('Spaceport', 'Spaceport') == frames.frame('Spaceport')
+
@@ -0,0 +1,79 @@
+import pytest
+
+from game_state import GameState, Market, MarketPrice
+from zobrist import full_hash
+
+
+class Stall(Market):
+    price = MarketPrice(0.01, 60)
+    buy_price = MarketPrice(-0.1, 60)
+
+    def __init__(self, world) -> None:
+        super().__init__(world)
+        self.price = 100
+        self.buy_price = 10
+
+
+@pytest.fixture
+def stall():
+    return Stall(GameState().world)
+
+
+def test_trade_pushes_the_price(stall):
+    stall.trade('price', 20)
+    assert stall.price == 120
+    stall.trade('price', 10)
+    assert stall.price == 130
+
+
+def test_price_after_a_trade(stall):
+    stall.trade('price', 20)
+    after = stall.price_after('price', 15)
+    assert after == 135
+    stall.trade('price', 15)
+    assert stall.price == after
+
+
+def test_push_halves_every_half_life(stall):
+    world = stall._world
+    stall.trade('price', 40)
+    world.current_time += 60
+    assert stall.price == 120
+    world.current_time += 60
+    assert stall.price == 110
+    # A new trade adds to what is left of the push
+    stall.trade('price', 10)
+    assert stall.price == 120
+    world.current_time += 60 * 100
+    assert stall.price == 100
+
+
+def test_base_price_keeps_the_push(stall):
+    stall.trade('price', 50)
+    stall.price = 200
+    assert stall.price == 300
+
+
+def test_buyer_price_falls_but_stays_positive(stall):
+    stall.trade('buy_price', 5)
+    assert stall.buy_price == 5
+    stall.trade('buy_price', 100)
+    assert stall.buy_price == 1
+
+
+def test_prices_of_the_game_recover():
+    state = GameState()
+    farm = state.world.corn_farm
+    price = farm.price
+    farm.trade('price', 10)
+    assert farm.price > price
+    state.world.current_time += 30 * 24 * 60
+    assert farm.price == price
+
+
+def test_recovery_keeps_the_hash():
+    state = GameState()
+    state.state_hash()
+    state.world.corn_farm.trade('price', 10)
+    state.world.current_time += 600
+    assert state.state_hash() == full_hash(state)
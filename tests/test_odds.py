@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from engine import Engine
+from game_state import GameState
+from odds import Distribution, Odds, Outcome, _walk, mine_work, slot_machine
+
+
+def _paths(state):
+    for location, content in state.locations.items():
+        for path in _walk(content.get('options') or {}):
+            yield location, path
+
+
+def test_probabilities_sum_to_one(session):
+    odds = Odds(session.engine)
+    for location, path in _paths(session.state):
+        distribution = odds.option(location, path)
+        assert sum(outcome.probability for outcome in distribution.outcomes) == pytest.approx(1)
+
+
+def test_cached_result_is_the_same(session):
+    odds = Odds(session.engine)
+    first = odds.option('Spaceport', ('go_erratic_rock',))
+    assert odds.cache
+    assert odds.option('Spaceport', ('go_erratic_rock',)).summary() == first.summary()
+
+
+def test_cache_is_bounded(session):
+    odds = Odds(session.engine, size=5)
+    for location, path in _paths(session.state):
+        odds.option(location, path)
+        assert len(odds.cache) <= 5
+    assert len(odds.cache) == 5
+
+
+def test_cache_is_cleared_when_content_changes(session):
+    odds = Odds(session.engine)
+    odds.option('Spaceport', ('go_erratic_rock',))
+    odds.option('Spaceport', ('go_spaceport',))
+    assert len(odds.cache) == 2
+    session.state.locations = dict(session.state.locations)
+    odds.option('Spaceport', ('go_spaceport',))
+    assert len(odds.cache) == 1
+    odds.option('Spaceport', ('go_erratic_rock',))
+    session.state.world.traffic_seed += 1
+    odds.option('Spaceport', ('go_spaceport',))
+    assert len(odds.cache) == 1
+
+
+def test_independent_mechanics():
+    coin = Distribution([Outcome(0.5, {'cash': 2}, 'heads'), Outcome(0.5, {})])
+    both = coin.then(Distribution.certain({'cash': 1, 'time': 5}))
+    assert both.mean('cash') == 2
+    assert both.mean('time') == 5
+    assert both.variance('cash') == 1
+    assert both.chance('heads') == 0.5
+    two = coin.then(coin)
+    assert two.labels() == pytest.approx({'heads + heads': 0.25, 'heads': 0.5, '': 0.25})
+
+
+def test_slot_machine():
+    distribution = slot_machine()
+    assert distribution.chance('triple match') == pytest.approx(7 / 7 ** 3)
+    assert distribution.chance('double match') == pytest.approx(3 * 7 * 6 / 7 ** 3)
+    engine = Engine(GameState())
+    cash = engine.state.hero.cash
+    random.seed(3)
+    for _ in range(20000):
+        engine.play_slot_machine()
+    assert (engine.state.hero.cash - cash) / 20000 == pytest.approx(distribution.mean('cash'), rel=0.05)
+
+
+def test_mine_work():
+    distribution = mine_work()
+    assert sum(outcome.probability for outcome in distribution.outcomes) == pytest.approx(1)
+    engine = Engine(GameState())
+    random.seed(4)
+    earned = sum(engine.work_in_mine() for _ in range(20000))
+    assert earned / 20000 == pytest.approx(distribution.mean('cash'), rel=0.05)
@@ -0,0 +1,97 @@
+import copy
+import pickle
+import subprocess
+import sys
+
+import pytest
+
+import options
+
+from engine import Engine
+from game_state import GameState
+from options import OPTION_IDS, BitSet, Interner, OptionRegistry
+
+NAMES = ['test_option_first', 'test_option_second', 'test_option_third']
+
+
+@pytest.fixture(autouse=True)
+def interners(monkeypatch):
+    """New interners replace the game ones for pickles only during the test."""
+    monkeypatch.setattr(options, '_INTERNERS', dict(options._INTERNERS))
+
+
+def test_interner_keeps_ids():
+    interner = Interner('test_names')
+    assert [interner.intern(name) for name in ('a', 'b', 'a', 'c')] == [0, 1, 0, 2]
+    assert interner.name(1) == 'b'
+
+
+def test_option_attributes():
+    registry = OptionRegistry()
+    buy = registry.info('buy_corn_10')
+    assert (buy.id, buy.kind, buy.amount, buy.is_back) == (0, 'buy_corn', 10, False)
+    assert registry.info(0) is buy
+    back = registry.info('back_to_road')
+    assert (back.kind, back.amount, back.is_back) == ('back_to_road', None, True)
+    assert registry.info('play_slot_machine').amount is None
+
+
+def test_option_targets():
+    registry = OptionRegistry()
+    registry.add_target('go_mines', 'Forsaken Iridium Mines - East')
+    registry.add_target('go_mines', 'Forsaken Iridium Mines - East')
+    assert registry.info('go_mines').target == 'Forsaken Iridium Mines - East'
+    # The same option id leading to different places has no known target
+    registry.add_target('leave', 'Brackenbridge')
+    registry.add_target('leave', 'Spaceport')
+    registry.add_target('leave', 'Brackenbridge')
+    assert registry.info('leave').target is None
+
+
+def test_bit_set_works_like_a_set():
+    interner = Interner('test_names')
+    names = BitSet(interner, ['a', 'b'])
+    names.add('c')
+    names.add('a')
+    names.discard('b')
+    names.discard('never_seen')
+    assert 'a' in names and 'c' in names
+    assert 'b' not in names and 'never_seen' not in names
+    assert sorted(names) == ['a', 'c']
+    assert len(names) == 2
+    assert names == BitSet(interner, ['c', 'a'])
+    assert names != BitSet(Interner('other_names'), ['a', 'c'])
+
+
+def test_copies_are_independent():
+    names = BitSet(OPTION_IDS, NAMES[:2])
+    for other in (names.copy(), copy.copy(names), copy.deepcopy(names)):
+        other.add(NAMES[2])
+        other.discard(NAMES[0])
+        assert sorted(names) == sorted(NAMES[:2])
+        assert other.interner is OPTION_IDS
+
+
+def test_pickle_keeps_names_in_another_process():
+    data = pickle.dumps(BitSet(OPTION_IDS, NAMES[:2]))
+    # The other process interns the names in another order, so they get other ids
+    code = (
+        'import pickle, sys\n'
+        'from options import OPTION_IDS\n'
+        f'for name in {NAMES[::-1]!r}: OPTION_IDS.intern(name)\n'
+        'names = pickle.loads(sys.stdin.buffer.read())\n'
+        f'print(sorted(names), [OPTION_IDS.ids[name] for name in {NAMES[:2]!r}])\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], input=data, capture_output=True, check=True)
+    assert result.stdout.decode().strip() == f'{sorted(NAMES[:2])!r} [2, 1]'
+
+
+def test_selected_options_are_visited():
+    state = GameState()
+    engine = Engine(state)
+    first = OPTION_IDS.intern('test_option_first')
+    engine.programs = {'Spaceport': {(first,): lambda engine: None}}
+    engine.select_option('Spaceport', (first,))
+    engine.select_option('Spaceport', (OPTION_IDS.intern('test_option_unknown'),))
+    assert list(state.visited_options) == ['test_option_first']
+    assert 'order_wine' in state.invisible_options
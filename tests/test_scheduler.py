@@ -0,0 +1,65 @@
+import copy
+import pickle
+
+from engine import Engine
+from game_state import GameState
+from scheduler import Scheduler
+
+
+def _run(scheduler: Scheduler, time: int) -> list:
+    events = []
+    scheduler.run_until(time, lambda event, times: events.append((event, times)))
+    return events
+
+
+def test_missed_periods_run_once():
+    scheduler = Scheduler()
+    scheduler.schedule(60, 'restock', 60)
+    assert _run(scheduler, 59) == []
+    assert _run(scheduler, 60) == [('restock', 1)]
+    assert _run(scheduler, 60) == []
+    # A long sleep: 120, 180, 240 and 300 are due
+    assert _run(scheduler, 330) == [('restock', 4)]
+    assert scheduler.next_time() == 360
+
+
+def test_one_time_event():
+    scheduler = Scheduler()
+    scheduler.schedule(100, 'arrival')
+    assert _run(scheduler, 1000) == [('arrival', 1)]
+    assert _run(scheduler, 2000) == []
+    assert scheduler.next_time() is None
+
+
+def test_catch_up_order():
+    scheduler = Scheduler()
+    scheduler.schedule(100, 'price', 100)
+    scheduler.schedule(100, 'restock', 100)
+    scheduler.schedule(250, 'arrival')
+    scheduler.schedule(90, 'rare', 1000)
+    # Events of the same minute keep the order of scheduling,
+    # events run in the order of their last due minute
+    assert _run(scheduler, 100) == [('rare', 1), ('price', 1), ('restock', 1)]
+    assert _run(scheduler, 320) == [('arrival', 1), ('price', 2), ('restock', 2)]
+    assert _run(scheduler, 1090) == [('price', 7), ('restock', 7), ('rare', 1)]
+
+
+def test_copies_keep_the_events():
+    scheduler = Scheduler()
+    scheduler.schedule(60, 'restock', 60)
+    for other in (copy.deepcopy(scheduler), pickle.loads(pickle.dumps(scheduler))):
+        assert _run(other, 200) == [('restock', 3)]
+    assert _run(scheduler, 100) == [('restock', 1)]
+
+
+def test_stations_restock_after_a_long_wait():
+    state = GameState()
+    engine = Engine(state)
+    farm = state.world.corn_farm
+    farm.offer = 0
+    state.world.current_time += 12 * 60
+    engine.advance_world()
+    assert farm.offer == 2 * farm.RESTOCK
+    state.world.current_time += 10 * 24 * 60
+    engine.advance_world()
+    assert farm.offer == farm.MAX_OFFER
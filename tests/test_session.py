@@ -0,0 +1,105 @@
+import pytest
+
+from bots import TRADE_LOOP, ScriptedBot, play
+from game_state import GameState
+from history import RunHistory
+from session import GameSession, OptionError
+
+
+def _ids(session) -> list:
+    return [option.id for option in session.options]
+
+
+def test_location_is_shown(session):
+    spaceport = session.state.locations['Spaceport']
+    assert session.text == spaceport['description']
+    assert _ids(session) == list(spaceport['options'])
+    assert not any(option.disabled for option in session.options)
+
+
+def test_goto_moves_the_hero(session):
+    time = session.state.world.current_time
+    version = session.version
+    session.select('go_erratic_rock')
+    assert session.state.world.current_location == 'Erratic Rocks'
+    assert session.state.world.current_time > time
+    assert session.version > version
+    assert 'go_spaceport' in _ids(session)
+
+
+def test_dialogue_levels(session):
+    session.select('go_spaceport')
+    assert session.options_stack == ['go_spaceport']
+    assert _ids(session) == ['enter_hut', 'leave_planet', 'back']
+    session.select('enter_hut')
+    assert session.options_stack == ['go_spaceport', 'enter_hut']
+    session.select('about_kealen')
+    assert session.options_stack == ['go_spaceport', 'enter_hut']
+    session.select('back')
+    session.select('back')
+    assert session.options_stack == []
+    assert _ids(session) == ['go_erratic_rock', 'go_spaceport']
+
+
+def test_hidden_options_are_not_shown(session):
+    session.state.invisible_options.add('enter_hut')
+    session.select('go_spaceport')
+    assert _ids(session) == ['leave_planet', 'back']
+
+
+def test_restocked_offer_is_shown(session):
+    farm = session.state.world.corn_farm
+    farm.offer = 0
+    session.state.hero.cash = 1000
+    session.show_location('Corn Farm')
+    # A long wait: the farm is restocked before the hero approaches it
+    session.state.world.current_time += 10 * 24 * 60
+    session.select('approach_farm')
+    assert farm.offer == farm.MAX_OFFER
+    assert f'{farm.MAX_OFFER} tonnes' in session.text
+    assert not any(option.disabled for option in session.options if option.id == 'buy_corn_1')
+
+
+def test_hidden_and_unknown_options_are_rejected(session):
+    for option_id in ('take_passenger_from_bar_to_city', 'go_hyenas_hideout', 'no_such_option'):
+        with pytest.raises(OptionError):
+            session.select(option_id)
+    assert session.state.world.current_location == 'Spaceport'
+    assert not session.state.truck.contracts
+
+
+def test_run_is_recorded_once(tmp_path):
+    history = RunHistory(str(tmp_path / 'runs.db'))
+    session = GameSession(GameState(traffic_seed=0), history)
+    session.show_location('Spaceport')
+    play(session, ScriptedBot(TRADE_LOOP))
+    assert history.count() == 1
+    assert history.top(1)[0].route[0] == 'Spaceport'
+    session.select('leave_planet')
+    history.flush()
+    assert history.count() == 1
+    history.close()
+
+
+def test_sessions_share_content():
+    first = GameSession(GameState())
+    second = GameSession(GameState())
+    assert first.engine.encounters is second.engine.encounters
+    assert first.engine.programs['Spaceport'] is second.engine.programs['Spaceport']
+    assert first.state.locations['Spaceport'] is second.state.locations['Spaceport']
+
+
+def test_changed_location_is_copied():
+    first = GameSession(GameState())
+    second = GameSession(GameState())
+    name = 'Forsaken Iridium Mines - West'
+    description = second.state.locations[name]['description']
+    first.state.world.current_location = 'Forsaken Iridium Mines - East'
+    first.engine.get_new_truck({})
+    assert first.state.locations[name]['description'] != description
+    assert second.state.locations[name]['description'] == description
+
+
+def test_destination_of_shown_options(session):
+    assert session.destination('go_erratic_rock') == 'Erratic Rocks'
+    assert session.destination('no_such_option') is None
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from shared_world import SharedWorld
+
+
+def test_take_never_goes_below_zero(tmp_path):
+    world = SharedWorld(str(tmp_path / 'planet.db'))
+    world.add('Fuel station', 100, 0)
+    with ThreadPoolExecutor(8) as pool:
+        taken = list(pool.map(lambda _: world.take('Fuel station', 3), range(100)))
+    assert sum(ok for ok, _ in taken) == 33
+    assert world.offer('Fuel station') == 1
+    assert all(offer >= 0 for _, offer in taken)
+
+
+def test_first_player_sets_the_stock(tmp_path):
+    world = SharedWorld(str(tmp_path / 'planet.db'))
+    world.add('Fuel station', 100, 0)
+    world.add('Fuel station', 5, 0)
+    assert world.offers() == {'Fuel station': 100}
+    assert world.take('Fuel station', 101) == (False, 100)
+
+
+def test_every_period_is_restocked_once(tmp_path):
+    world = SharedWorld(str(tmp_path / 'planet.db'))
+    world.add('Fuel station', 100, 0)
+    world.take('Fuel station', 90)
+    assert world.restock('Fuel station', 2, 20, 100) == 50
+    assert world.restock('Fuel station', 2, 20, 100) == 50
+    assert world.restock('Fuel station', 1, 20, 100) == 50
+    assert world.restock('Fuel station', 10, 20, 100) == 100
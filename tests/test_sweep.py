@@ -0,0 +1,35 @@
+import pytest
+
+from sweep import ResultCache, check_params, grid_points, play_point, sweep
+
+GRID = {'world.corn_farm.price': [20, 40], 'hero.cash': [50]}
+
+
+def test_grid_points():
+    assert grid_points(GRID) == [
+        {'world.corn_farm.price': 20, 'hero.cash': 50},
+        {'world.corn_farm.price': 40, 'hero.cash': 50},
+    ]
+    assert grid_points({}) == [{}]
+
+
+def test_unknown_parameter():
+    check_params(GRID)
+    with pytest.raises(AttributeError, match='world.corn_farm.prise'):
+        check_params({'world.corn_farm.prise': [1]})
+
+
+def test_games_are_reproducible():
+    point = {'world.corn_farm.price': 20}
+    assert play_point(point, 'random', 3, 200) == play_point(point, 'random', 3, 200)
+
+
+def test_cached_games_are_not_played_again(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    reports = []
+    columns = sweep(GRID, 'trade', range(2), 300, cache=cache, report=reports.append)
+    assert columns['world.corn_farm.price'] == [20, 20, 40, 40]
+    assert columns['seed'] == [0, 1, 0, 1]
+    assert len(columns['cash']) == 4
+    assert sweep(GRID, 'trade', range(2), 300, cache=cache, report=reports.append) == columns
+    assert reports == ['4 games, 0 cached, 4 to play', '4 games, 4 cached, 0 to play']
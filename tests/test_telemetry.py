@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from game_state import GameState
+from telemetry import Telemetry, day_file, load_day
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def test_records_are_loaded_back(tmp_path):
+    directory = str(tmp_path)
+    state = GameState()
+    telemetry = Telemetry(directory, capacity=8, interval=60)
+    for i in range(5):
+        state.hero.cash = 100 + i
+        telemetry.record('go_mines', state, 0.001)
+    telemetry.flush()
+    telemetry.record('go_to_restaurant', state, 0.002)
+    telemetry.close()
+
+    day = load_day(_today(), directory)
+    assert list(day['cash']) == [100, 101, 102, 103, 104, 104]
+    options = [day['option_names'][i] for i in day['option']]
+    assert options == ['go_mines'] * 5 + ['go_to_restaurant']
+    assert day['location_names'] == [state.world.current_location]
+
+
+def test_full_buffer_drops_records(tmp_path):
+    telemetry = Telemetry(str(tmp_path), capacity=4, interval=60)
+    telemetry._stop = True
+    telemetry._wake.set()
+    telemetry._thread.join()
+    state = GameState()
+    for _ in range(6):
+        telemetry.record('go_mines', state, 0.001)
+    assert telemetry.dropped == 2
+    telemetry.close()
+    assert len(load_day(_today(), str(tmp_path))['cash']) == 4
+
+
+def test_cut_off_block_is_skipped(tmp_path):
+    directory = str(tmp_path)
+    state = GameState()
+    telemetry = Telemetry(directory, interval=60)
+    for _ in range(2):
+        telemetry.record('go_mines', state, 0.001)
+        telemetry.flush()
+    telemetry.close()
+    path = day_file(directory, _today())
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-10])
+    assert len(load_day(_today(), directory)['cash']) == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from trade import _fewest_purchases, purchase_options
+
+
+@pytest.mark.parametrize('cash, space', [(400, 14), (5000, 30), (0, 30), (400, 0)])
+def test_plan_cost_is_the_spent_cash(session, cash, space):
+    state = session.state
+    state.hero.cash = cash
+    state.truck.truck_space = space
+    plan = session.engine.plan_cargo(100)
+    assert plan.cost <= cash
+    assert sum(plan.cargo.values()) <= space
+    assert sum(purchase.amount for purchase in plan.purchases) == sum(plan.cargo.values())
+    for purchase in plan.purchases:
+        session.engine.run_action(purchase.option_id, {purchase.good: purchase.amount})
+    assert cash - state.hero.cash == plan.cost
+    for good, tons in plan.cargo.items():
+        assert state.truck.cargo[good] == tons
+
+
+def test_plan_buys_nothing_without_profit(session):
+    session.state.hero.cash = 5000
+    for good in ('corn_farm', 'mine', 'wreckyard'):
+        getattr(session.state.world, good).price = 10 ** 6
+    plan = session.engine.plan_cargo(100)
+    assert plan.cargo == {} and plan.cost == 0 and plan.purchases == ()
+
+
+def test_fewest_purchases():
+    fewest = _fewest_purchases([10, 5, 1], 17)
+    assert sorted(fewest[17]) == [1, 1, 5, 10]
+    assert fewest[0] == ()
+    assert _fewest_purchases([5], 7)[7] is None
+
+
+def test_purchase_options(session):
+    options = purchase_options(session.state.locations)
+    assert set(options) == {'corn', 'coal', 'scrap'}
+    for good, purchases in options.items():
+        assert purchases
+        for amount, purchase in purchases.items():
+            assert purchase.option_id == f'buy_{good}_{amount}'
+
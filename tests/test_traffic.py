@@ -0,0 +1,49 @@
+from traffic import Route, Traffic, road_graph, road_route
+
+ROADS = {('A', 'B'): 30, ('B', 'C'): 60, ('A', 'C'): 120}
+VEHICLES = [('truck', 40), ('biker', 90), ('police', 70)] * 3
+
+
+def _trips(traffic: Traffic, queries: list) -> list:
+    return [[vehicle.kind for vehicle in traffic.meet(*query)] for query in queries]
+
+
+def test_meetings_depend_only_on_the_seed():
+    queries = [('A', 'B', 600 * i, 600 * i + 45) for i in range(10)] + [('C', 'B', 3000, 3060)]
+    expected = _trips(Traffic(ROADS, VEHICLES, 1), queries)
+    assert any(expected)
+    # The same meetings whatever was asked before, and after old trips were forgotten
+    traffic = Traffic(ROADS, VEHICLES, 1)
+    traffic.meet('A', 'C', 20000, 20100)
+    assert _trips(traffic, queries) == expected
+    assert _trips(traffic, queries[::-1]) == expected[::-1]
+    assert _trips(Traffic(ROADS, VEHICLES, 2), queries) != expected
+
+
+def test_unknown_road():
+    assert Traffic(ROADS, VEHICLES, 1).meet('A', 'D', 0, 100) == []
+    assert Traffic({}, VEHICLES, 1).meet('A', 'B', 0, 100) == []
+
+
+def test_road_graph():
+    locations = {
+        'A': {'options': {'go_b': {'goto': 'B', 'effects': {'distance': 30}}, 'go_next': {'goto': 'next'}}},
+        'B': {'options': {'go_a': {'goto': 'A', 'effects': {'distance': 20}}, 'go_c': {'goto': 'C'}}},
+    }
+    assert road_graph(locations) == {('A', 'B'): 20}
+
+
+def test_road_route():
+    roads = {('A', 'B'): 10, ('B', 'C'): 10, ('A', 'C'): 30, ('D', 'E'): 1}
+    assert road_route(roads, 'A', 'C') == Route(['A', 'B', 'C'], 20)
+    assert road_route(roads, 'C', 'A') == Route(['C', 'B', 'A'], 20)
+    assert road_route(roads, 'A', 'A') == Route(['A'], 0)
+    assert road_route(roads, 'A', 'D') is None
+
+
+def test_game_routes(session):
+    engine = session.engine
+    assert engine.route('Spaceport', 'Spaceport').distance == 0
+    assert engine.route('Spaceport', 'Erratic Rocks') == road_route(engine.roads(), 'Spaceport', 'Erratic Rocks')
+    assert engine.route('Spaceport', 'Erratic Rocks').distance == 28
+    assert engine.route('Spaceport', 'Nowhere') is None
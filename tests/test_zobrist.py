@@ -0,0 +1,75 @@
+import copy
+import pickle
+import random
+
+from bots import RandomBot
+from game_state import GameState
+from zobrist import full_hash
+
+
+def test_incremental_hash_equals_full_hash(session):
+    session.state.state_hash()
+    bot = RandomBot(1)
+    for _ in range(300):
+        option_id = bot.choose(session)
+        if option_id is None:
+            break
+        session.select(option_id)
+        assert session.state.state_hash() == full_hash(session.state)
+
+
+def test_equal_states_have_equal_hashes():
+    assert GameState(traffic_seed=1).state_hash() == GameState(traffic_seed=1).state_hash()
+
+
+def test_containers_are_hashed():
+    state = GameState()
+    start = state.state_hash()
+    state.truck.cargo['coal'] += 3
+    state.options_stack.append('go_spaceport')
+    state.invisible_options.discard('order_wine')
+    assert state.state_hash() == full_hash(state) != start
+    state.truck.cargo['coal'] -= 3
+    state.options_stack.pop()
+    state.invisible_options.add('order_wine')
+    assert state.state_hash() == start
+
+
+def test_copies_keep_the_hash(session):
+    bot = RandomBot(2)
+    for _ in range(100):
+        option_id = bot.choose(session)
+        if option_id is None:
+            break
+        session.select(option_id)
+    state = session.state
+    for other in (copy.deepcopy(state), pickle.loads(pickle.dumps(state))):
+        assert other.state_hash() == state.state_hash() == full_hash(other)
+        other.hero.cash += 1
+        other.truck.cargo['coal'] += 1
+        other.invisible_options.add('go_mines')
+        assert other.state_hash() == full_hash(other) != state.state_hash()
+        assert state.state_hash() == full_hash(state)
+
+
+def test_snapshot_round_trip(session):
+    session.state.state_hash()
+    bot = RandomBot(3)
+    snapshots = []
+    for _ in range(200):
+        option_id = bot.choose(session)
+        if option_id is None:
+            break
+        session.select(option_id)
+        snapshots.append((session.snapshot(), session.state.state_hash()))
+    random.seed(5)
+    for _ in range(50):
+        data, expected = random.choice(snapshots)
+        session.restore(data)
+        assert session.state.state_hash() == expected == full_hash(session.state)
+        session.restore(session.snapshot())
+        assert session.state.state_hash() == expected
+        option_id = RandomBot(7).choose(session)
+        if option_id is not None:
+            session.select(option_id)
+            assert session.state.state_hash() == full_hash(session.state)
@@ -0,0 +1,198 @@
+from functools import cache
+from typing import NamedTuple
+
+
+class Good(NamedTuple):
+    """
+    Cargo which can be bought for resale.
+
+    - station: attribute of World with offer and price;
+    - market: location where the good is sold;
+    - buyer: attribute of World with the sell price (<name>_price).
+    """
+    name: str
+    station: str
+    market: str
+    buyer: str
+
+    def sell_price(self, world) -> int:
+        """Current price the buyer pays for a ton."""
+        return getattr(getattr(world, self.buyer), f'{self.name}_price')
+
+
+GOODS = (
+    Good('corn', 'corn_farm', 'Mining Settlement', 'trading_house'),
+    Good('coal', 'mine', 'Brackenbridge', 'factory'),
+    Good('scrap', 'wreckyard', 'Brackenbridge', 'factory'),
+)
+
+
+class Purchase(NamedTuple):
+    """Purchase option: its location, options_stack and option id."""
+    location: str
+    options_stack: tuple
+    option_id: str
+    good: str
+    amount: int
+
+
+class CargoPlan(NamedTuple):
+    """
+    The most profitable cargo for the truck.
+
+    - profit: cash after selling everything minus cost of goods and extra fuel;
+    - cargo: tons to buy by good;
+    - purchases: options to select, the fewest for every good.
+    """
+    profit: float
+    cargo: dict
+    cost: int
+    fuel_cost: float
+    purchases: tuple
+
+
+def purchase_options(locations: dict) -> dict:
+    """
+    Purchase options of goods in the locations ('buy_<good>_<n>' options with the <good> effect).
+
+    :return: good -> amount -> Purchase.
+    """
+    found = {good.name: {} for good in GOODS}
+
+    def walk(location: str, options: dict, stack: tuple) -> None:
+        for option_id, option in options.items():
+            effects = option.get('effects') or {}
+            for good in found:
+                if option_id.startswith(f'buy_{good}_') and effects.get(good):
+                    amount = effects[good]
+                    found[good][amount] = Purchase(location, stack, option_id, good, amount)
+            if option.get('options'):
+                walk(location, option['options'], stack + (option_id,))
+
+    for name, location in locations.items():
+        walk(name, location.get('options') or {}, ())
+    return found
+
+
+def _fewest_purchases(amounts: list, limit: int) -> list:
+    """
+    Helper: fewest purchases giving every total (coin change).
+
+    :return: list by total of tuples of amounts, None if the total can't be bought.
+    """
+    fewest = [()] + [None] * limit
+    for total in range(1, limit + 1):
+        for amount in amounts:
+            if amount <= total and fewest[total - amount] is not None:
+                candidate = fewest[total - amount] + (amount,)
+                if fewest[total] is None or len(candidate) < len(fewest[total]):
+                    fewest[total] = candidate
+    return fewest
+
+
+def _purchase_cost(station, amounts: tuple) -> int:
+    """
+    Helper: cost of the purchases made one after another at the station.
+
+    Every purchase raises the price of the next one (see MarketPrice).
+    """
+    cost = 0
+    bought = 0
+    for amount in amounts:
+        cost += amount * station.price_after('price', bought)
+        bought += amount
+    return cost
+
+
+def plan_cargo(engine, distance: int = 0) -> CargoPlan:
+    """
+    The most profitable cargo mix for the current cash, truck space and station offers.
+
+    Dynamic programming over goods, free space and cash with memoized subproblems.
+    Purchases are made from the biggest one, each at the price raised by the previous ones.
+    All tons of a good are sold at once at the current buyer price, the price falls
+    only after the sale (the recovery of prices during the trip is not counted).
+    Every ton of cargo increases fuel consumption (see Engine.drive_cost),
+    so the plan pays for extra fuel on the distance driven with the cargo,
+    fuel is counted at the cheapest station price.
+    """
+    state = engine.state
+    truck = state.truck
+    world = state.world
+    options = purchase_options(state.locations)
+    goods = [good for good in GOODS if options[good.name]]
+
+    space = max(truck.truck_space, 0)
+    stations = [getattr(world, good.station) for good in goods]
+    # Money above the price of a full truck doesn't change the plan
+    prices = [station.price_after('price', space) for station in stations]
+    cash = min(max(state.hero.cash, 0), space * max(prices, default=0))
+    fuel_price = min(world.dex_gas_station.price, world.gruber_gas_station.price / 5)
+    start_load = sum(truck.cargo.values())
+    base_fuel = engine.drive_cost(distance, start_load)[0]
+
+    fewest = [
+        [amounts and tuple(sorted(amounts, reverse=True)) for amounts in
+         _fewest_purchases(sorted(options[good.name], reverse=True), space)]
+        for good in goods
+    ]
+    # Cost of the fewest purchases by good and tons
+    costs = [
+        [None if amounts is None else _purchase_cost(station, amounts) for amounts in purchases]
+        for station, purchases in zip(stations, fewest)
+    ]
+
+    @cache
+    def best(i: int, space_left: int, cash_left: int) -> tuple:
+        """Helper: (profit, -purchases count, tons of goods from i on)."""
+        if i == len(goods):
+            load = start_load + space - space_left
+            fuel = (engine.drive_cost(distance, load)[0] - base_fuel) * fuel_price
+            return -fuel, 0, ()
+
+        sell_price = goods[i].sell_price(world)
+        result = None
+        for tons in range(min(space_left, stations[i].offer) + 1):
+            cost = costs[i][tons]
+            if cost is None or cost > cash_left:
+                continue
+            profit, steps, rest = best(i + 1, space_left - tons, cash_left - cost)
+            candidate = (profit + tons * sell_price - cost, steps - len(fewest[i][tons]), (tons,) + rest)
+            if result is None or candidate[:2] > result[:2]:
+                result = candidate
+        return result
+
+    profit, _, tons = best(0, space, cash)
+    cargo = {good.name: amount for good, amount in zip(goods, tons) if amount}
+    purchases = tuple(
+        options[good.name][amount]
+        for i, (good, total) in enumerate(zip(goods, tons))
+        for amount in fewest[i][total]
+    )
+    cost = sum(costs[i][amount] for i, amount in enumerate(tons))
+    fuel_cost = (engine.drive_cost(distance, start_load + sum(tons))[0] - base_fuel) * fuel_price
+    return CargoPlan(profit, cargo, cost, fuel_cost, purchases)
+
+
+def trade_advice(engine) -> str:
+    """
+    Advisor's text about the most profitable cargo.
+
+    The cargo is driven from the current location to the farthest market.
+    """
+    here = engine.state.world.current_location
+    routes = [engine.route(here, good.market) for good in GOODS]
+    distance = max((route.distance for route in routes if route is not None), default=0)
+    plan = plan_cargo(engine, distance)
+    if not plan.cargo:
+        return 'Nothing is worth buying right now.'
+
+    lines = [f'Buy for {plan.cost} cr and sell with [green]{plan.profit:.0f} cr profit[/green]:']
+    for good in GOODS:
+        amount = plan.cargo.get(good.name)
+        if amount:
+            where = {purchase.location for purchase in plan.purchases if purchase.good == good.name}
+            lines.append(f'– {amount} t of {good.name} in {", ".join(sorted(where))}, '
+                         f'sell in {good.market} for {good.sell_price(engine.state.world)} cr per ton')
+    lines.append(f'Extra fuel for the load: {plan.fuel_cost:.0f} cr on {distance} km.')
+    return '\n'.join(lines)
@@ -0,0 +1,200 @@
+import heapq
+import random
+from bisect import bisect_left, insort
+from typing import NamedTuple
+
+# Minutes a vehicle stays in a location before the next road
+STOP_MINUTES = (30, 240)
+# Roads of the last day are kept, older ones are forgotten
+KEEP_MINUTES = 1440
+
+
+def road_graph(locations: dict) -> dict:
+    """
+    Roads between locations (gotos of the first dialogue level with the distance effect).
+
+    :return: road (pair of locations in sorted order) -> distance in km.
+    """
+    roads = {}
+    for name, location in locations.items():
+        for option in (location.get('options') or {}).values():
+            target = option.get('goto')
+            distance = (option.get('effects') or {}).get('distance')
+            if not target or target == 'next' or not distance:
+                continue
+            road = tuple(sorted((name, target)))
+            roads[road] = min(distance, roads.get(road, distance))
+    return roads
+
+
+class Route(NamedTuple):
+    """Shortest route: locations from the start to the destination and the distance in km."""
+    locations: list
+    distance: int
+
+
+def road_route(roads: dict, start: str, destination: str) -> Route | None:
+    """
+    Shortest route between locations over the road graph (Dijkstra).
+
+    :param roads: road -> distance (see road_graph).
+    :return: None if there is no route.
+    """
+    neighbours = {}
+    for (first, second), distance in roads.items():
+        neighbours.setdefault(first, []).append((second, distance))
+        neighbours.setdefault(second, []).append((first, distance))
+    best = {start: 0}
+    previous = {}
+    queue = [(0, start)]
+    while queue:
+        distance, name = heapq.heappop(queue)
+        if name == destination:
+            locations = [name]
+            while name in previous:
+                name = previous[name]
+                locations.append(name)
+            return Route(locations[::-1], distance)
+        if distance > best[name]:
+            continue
+        for target, length in neighbours.get(name, ()):
+            total = distance + length
+            if total < best.get(target, total + 1):
+                best[target] = total
+                previous[target] = name
+                heapq.heappush(queue, (total, target))
+    return None
+
+
+class Vehicle:
+    """
+    NPC vehicle driving between locations.
+
+    The route is random, but made by the vehicle's own generator,
+    so it depends only on the traffic seed and is the same in copies of the game.
+    """
+
+    __slots__ = ('kind', 'speed', 'location', 'time', 'rng')
+
+    def __init__(self, kind: str, speed: int, location: str, rng: random.Random) -> None:
+        """Initialize the vehicle standing in the location at minute 0."""
+        self.kind = kind
+        self.speed = speed
+        self.location = location
+        # The route is known up to this minute
+        self.time = 0
+        self.rng = rng
+
+
+class Traffic:
+    """
+    NPC vehicles on the road graph.
+
+    Trips of vehicles are kept by roads as (start, end, vehicle) lists sorted by start,
+    so vehicles on the road during the hero's trip are found with a binary search.
+    Vehicles are moved only when the traffic is queried and only up to the queried minute
+    (the vehicle known for the shortest time first), so a trip of the hero costs
+    the trips of vehicles since the previous query, not a step of every vehicle.
+    """
+
+    def __init__(self, roads: dict, vehicles: list, seed: int) -> None:
+        """
+        Initialize the traffic.
+
+        :param roads: road -> distance (see road_graph).
+        :param vehicles: list of (kind, speed in km/h).
+        """
+        self.roads = roads
+        self.kinds = vehicles
+        self.seed = seed
+        self.neighbours = {}
+        for a, b in roads:
+            self.neighbours.setdefault(a, []).append(b)
+            self.neighbours.setdefault(b, []).append(a)
+        for names in self.neighbours.values():
+            names.sort()
+        # The longest trip on the road, trips started earlier are over before the query
+        slowest = min((speed for _, speed in vehicles), default=1)
+        self.longest = {road: distance * 60 // slowest + 1 for road, distance in roads.items()}
+        self.reset()
+
+    def reset(self) -> None:
+        """Put vehicles to their starting locations, their routes are generated again."""
+        self.trips = {road: [] for road in self.roads}
+        self.vehicles = []
+        self.queue = []
+        self.kept_from = 0
+        locations = sorted(self.neighbours)
+        if not locations:
+            return
+        for i, (kind, speed) in enumerate(self.kinds):
+            rng = random.Random(f'{self.seed}:{i}')
+            self.vehicles.append(Vehicle(kind, speed, rng.choice(locations), rng))
+            self.queue.append((0, i))
+        heapq.heapify(self.queue)
+
+    def _drive(self, i: int) -> None:
+        """Helper: the vehicle stops in its location and drives to a random neighbour."""
+        vehicle = self.vehicles[i]
+        rng = vehicle.rng
+        start = vehicle.time + rng.randint(*STOP_MINUTES)
+        target = rng.choice(self.neighbours[vehicle.location])
+        road = tuple(sorted((vehicle.location, target)))
+        end = start + round(self.roads[road] / vehicle.speed * 60)
+        insort(self.trips[road], (start, end, i))
+        vehicle.location = target
+        vehicle.time = end
+
+    def advance(self, time: int) -> None:
+        """Generate routes of all vehicles up to the minute, trips older than a day are forgotten."""
+        queue = self.queue
+        while queue and queue[0][0] < time:
+            _, i = queue[0]
+            self._drive(i)
+            heapq.heapreplace(queue, (self.vehicles[i].time, i))
+
+        cutoff = time - KEEP_MINUTES
+        if cutoff > self.kept_from:
+            for road, trips in self.trips.items():
+                del trips[:bisect_left(trips, (cutoff - self.longest[road],))]
+            self.kept_from = cutoff
+
+    def meet(self, source: str, destination: str, start: int, end: int) -> list:
+        """
+        Vehicles on the road between locations during the hero's trip, in the order of meeting.
+
+        :return: list of Vehicle (empty if there is no such road).
+        """
+        road = tuple(sorted((source, destination)))
+        trips = self.trips.get(road)
+        if trips is None:
+            return []
+        # Forgotten trips are generated again from the start
+        if start < self.kept_from:
+            self.reset()
+            trips = self.trips[road]
+        self.advance(end)
+
+        met = []
+        first = bisect_left(trips, (start - self.longest[road],))
+        last = bisect_left(trips, (end,))
+        for trip_start, trip_end, i in trips[first:last]:
+            if trip_end > start:
+                met.append((max(trip_start, start), i))
+        met.sort()
+        return [self.vehicles[i] for _, i in met]
+
+
+def road_vehicles(table) -> list:
+    """
+    Vehicles of road encounters: events of the road table with vehicles (count) and speed.
+
+    :return: list of (kind, speed) for Traffic.
+    """
+    if table is None:
+        return []
+    return [
+        (event['id'], event.get('speed', 50))
+        for event in table.events
+        for _ in range(event.get('vehicles', 1))
+    ]
@@ -0,0 +1,521 @@
+import hashlib
+
+from options import BitSet, _INTERNERS, _restore_bitset
+
+_MASK = (1 << 64) - 1
+
+# Keys of (scope, field, value) and bases of integer fields,
+# they never change, so they are computed once
+_KEYS = {}
+_BASES = {}
+
+# Types of field values which are hashed as a whole
+_SCALARS = frozenset({int, float, str, bool, tuple, type(None)})
+
+
+def _digest(text: str) -> int:
+    """Helper: 64-bit digest of the text."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+
+def _field_base(scope: str, field) -> int:
+    """Helper: base of keys of integer values of the field."""
+    base = _BASES.get((scope, field))
+    if base is None:
+        base = _BASES[scope, field] = _digest(f'{scope}\0{field}')
+    return base
+
+
+def zobrist_key(scope: str, field, value) -> int:
+    """
+    Random-looking 64-bit key of the field value.
+
+    Keys are derived from the text of the value, not from Python hash(),
+    so they are the same in every process and every run.
+    Integers (time, cash, fuel...) take too many values to keep their keys,
+    their keys are mixed from the base of the field by the tuple hash
+    (hashes of ints and tuples of ints do not depend on PYTHONHASHSEED).
+    """
+    if type(value) is int:
+        return hash((_field_base(scope, field), value)) & _MASK
+    try:
+        return _KEYS[scope, field, value]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable values (dicts in contracts and police events) are keyed by their text
+        value = repr(value)
+        if (scope, field, value) in _KEYS:
+            return _KEYS[scope, field, value]
+    key = _digest(f'{scope}\0{field}\0{value!r}')
+    _KEYS[scope, field, value] = key
+    return key
+
+
+class ZobristHash:
+    """
+    Zobrist hash of the game state.
+
+    The hash is XOR of keys of all (field, value) pairs of the state.
+    When a field changes, the key of the old value and the key of the new value
+    are XORed into the hash, so every change costs O(1) and the hash
+    never has to be recomputed from scratch.
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        """Initialize the hash of an empty state."""
+        self.value = 0
+
+    def toggle(self, scope: str, field, value) -> None:
+        """Add the (field, value) pair to the hash or remove it (XOR is its own inverse)."""
+        self.value ^= zobrist_key(scope, field, value)
+
+
+_MISSING = object()
+
+
+class Hashed:
+    """
+    Mixin of game state objects whose fields are part of the state hash.
+
+    Objects are not hashed and cost nothing until track() is called for them
+    (or for the object they belong to). Tracked objects get a twin class
+    which hashes fields on assignment; fields listed in UNHASHED
+    and private fields are skipped.
+    Dicts, lists and BitSets assigned to fields are replaced with
+    hashed versions, which update the hash on their own changes.
+    Values inside them (e.g. lists in dicts) are hashed by value,
+    so they have to be replaced, not changed in place.
+    """
+
+    UNHASHED = ()
+    # Properties computed from other fields (they are hashed by these fields)
+    DERIVED = ()
+    _zobrist = None
+    _scope = ''
+    _bases = {}
+
+    def _hashed_fields(self):
+        """Helper: names and values of hashed fields."""
+        for name, value in self._fields():
+            if name[0] != '_' and name not in self.UNHASHED:
+                yield name, value
+
+    def _fields(self):
+        """Helper: names and values of all fields."""
+        return list(vars(self).items())
+
+    def _hashed_base(self) -> type:
+        """Helper: game state class of the object (the same for tracked twins)."""
+        return type(self)
+
+    def __setstate__(self, fields: dict) -> None:
+        """Restore fields of a copy (they come after the object, so objects may link each other)."""
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+
+class _Tracking:
+    """Hashing part of twin classes of tracked objects (see _tracking_class)."""
+
+    def __setattr__(self, name: str, value) -> None:
+        # Fast path: a number is replaced with another one (the most frequent change),
+        # _bases has key bases of hashed fields while the object is tracked
+        base = self._bases.get(name)
+        if base is not None and type(value) is int:
+            old = getattr(self, name)
+            if type(old) is int:
+                self._zobrist.value ^= (hash((base, old)) ^ hash((base, value))) & _MASK
+                object.__setattr__(self, name, value)
+                return
+
+        if name in self.DERIVED:
+            object.__setattr__(self, name, value)
+            return
+
+        zobrist = self._zobrist
+        if zobrist is not None and name[0] != '_' and name not in self.UNHASHED:
+            scope = self._scope
+            old = getattr(self, name, _MISSING)
+            if name not in self._bases:
+                self._bases[name] = _field_base(scope, name)
+            if type(value) in _SCALARS and type(old) in _SCALARS:
+                zobrist.value ^= zobrist_key(scope, name, old) ^ zobrist_key(scope, name, value)
+                object.__setattr__(self, name, value)
+                return
+            if old is not _MISSING:
+                _detach(zobrist, old, scope, name)
+            value = _attach(zobrist, value, scope, name)
+        if name not in self._field_names:
+            self._field_names[name] = None
+        object.__setattr__(self, name, value)
+
+    def _fields(self):
+        # Instance __dict__ is not touched: since Python 3.12
+        # an object whose __dict__ was requested reads its attributes slower
+        fields = []
+        for name in self._field_names:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                fields.append((name, value))
+        return fields
+
+    def _hashed_base(self) -> type:
+        return type(self).__bases__[1]
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are restored as tracked objects with the same hash
+        fields = dict(self._fields())
+        return _restore_tracked, (type(self).__bases__[1], tuple(fields)), fields
+
+
+# Game state class -> its tracked twin
+_TRACKING_CLASSES = {}
+
+
+def _tracking_class(cls: type) -> type:
+    """Helper: twin of the Hashed class which hashes assigned fields."""
+    tracked = _TRACKING_CLASSES.get(cls)
+    if tracked is None:
+        tracked = type(cls.__name__, (_Tracking, cls), {'_field_names': {}})
+        _TRACKING_CLASSES[cls] = tracked
+    return tracked
+
+
+def _restore_tracked(cls: type, names: tuple) -> Hashed:
+    """Helper: rebuild the tracked object, its fields are set by __setstate__ (copying must not change the hash)."""
+    obj = cls.__new__(cls)
+    tracked = _tracking_class(cls)
+    for name in names:
+        tracked._field_names.setdefault(name)
+    obj.__class__ = tracked
+    return obj
+
+
+class HashedDict(dict):
+    """Dict which keeps its items in the state hash."""
+
+    __slots__ = ('_zobrist', '_scope')
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._zobrist = None
+        self._scope = ''
+
+    def __setitem__(self, key, value) -> None:
+        if self._zobrist is not None:
+            if key in self:
+                self._zobrist.toggle(self._scope, key, self[key])
+            self._zobrist.toggle(self._scope, key, value)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        if self._zobrist is not None and key in self:
+            self._zobrist.toggle(self._scope, key, self[key])
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        if self._zobrist is not None:
+            self._zobrist.toggle(self._scope, key, value)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self) -> None:
+        for key in list(self):
+            del self[key]
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return _restore_container, (type(self), dict(self), self._scope, self._zobrist)
+
+
+class HashedList(list):
+    """
+    List which keeps its items with their positions in the state hash.
+
+    Push and pop (the way options_stack is used) are O(1),
+    other changes rehash the list.
+    """
+
+    __slots__ = ('_zobrist', '_scope')
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self._zobrist = None
+        self._scope = ''
+
+    def _toggle_all(self) -> None:
+        """Helper: add all items to the hash or remove them."""
+        if self._zobrist is not None:
+            for i, value in enumerate(self):
+                self._zobrist.toggle(self._scope, i, value)
+
+    def append(self, value) -> None:
+        if self._zobrist is not None:
+            self._zobrist.toggle(self._scope, len(self), value)
+        super().append(value)
+
+    def pop(self, index: int = -1):
+        if index not in (-1, len(self) - 1):
+            self._toggle_all()
+            value = super().pop(index)
+            self._toggle_all()
+            return value
+        value = super().pop()
+        if self._zobrist is not None:
+            self._zobrist.toggle(self._scope, len(self), value)
+        return value
+
+    def _rehashed(name: str):
+        """Helper: list method which rehashes the list around the change."""
+        method = getattr(list, name)
+
+        def wrapper(self, *args):
+            self._toggle_all()
+            try:
+                return method(self, *args)
+            finally:
+                self._toggle_all()
+        wrapper.__name__ = name
+        return wrapper
+
+    __setitem__ = _rehashed('__setitem__')
+    __delitem__ = _rehashed('__delitem__')
+    __iadd__ = _rehashed('__iadd__')
+    __imul__ = _rehashed('__imul__')
+    extend = _rehashed('extend')
+    insert = _rehashed('insert')
+    remove = _rehashed('remove')
+    clear = _rehashed('clear')
+    reverse = _rehashed('reverse')
+    sort = _rehashed('sort')
+    del _rehashed
+
+    def __reduce__(self):
+        return _restore_container, (type(self), list(self), self._scope, self._zobrist)
+
+
+class HashedBitSet(BitSet):
+    """BitSet which keeps its names in the state hash (one key per changed bit)."""
+
+    __slots__ = ('_zobrist', '_scope')
+
+    def __init__(self, interner, names=()) -> None:
+        self._zobrist = None
+        self._scope = ''
+        super().__init__(interner, names)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name == 'bits' and self._zobrist is not None:
+            changed = self.bits ^ value
+            while changed:
+                low = changed & -changed
+                self._zobrist.toggle(self._scope, self.interner.name(low.bit_length() - 1), True)
+                changed ^= low
+        object.__setattr__(self, name, value)
+
+    # Copies are made by __reduce__, so they stay hashed
+    __copy__ = None
+    __deepcopy__ = None
+
+    def __reduce__(self):
+        return _restore_hashed_bitset, (self.interner.kind, tuple(self), self._scope, self._zobrist)
+
+
+def _restore_container(cls, items, scope: str, zobrist):
+    """Helper: rebuild a hashed dict or list (copying must not change the hash)."""
+    container = cls(items)
+    container._scope = scope
+    container._zobrist = zobrist
+    return container
+
+
+def _restore_hashed_bitset(kind: str, names: tuple, scope: str, zobrist) -> HashedBitSet:
+    """Helper: rebuild a hashed BitSet by names (ids may differ in another process)."""
+    bitset = HashedBitSet(_INTERNERS[kind], names)
+    bitset._scope = scope
+    bitset._zobrist = zobrist
+    return bitset
+
+
+# Private fields of tracked objects with hashing data
+_HASHING_FIELDS = ('_zobrist', '_scope', '_bases')
+
+
+def _restore_untracked(cls: type) -> Hashed:
+    """Helper: rebuild the object without hashing, its fields are set by __setstate__."""
+    return cls.__new__(cls)
+
+
+def untracked_reduce(obj):
+    """
+    Reduction of a hashed object to its plain version, for pickles
+    which are smaller without hashing data (e.g. snapshots).
+
+    Is used as Pickler.reducer_override, NotImplemented for other objects.
+    """
+    if isinstance(obj, _Tracking):
+        fields = {name: value for name, value in obj._fields() if name not in _HASHING_FIELDS}
+        return _restore_untracked, (type(obj).__bases__[1],), fields
+    if isinstance(obj, HashedDict):
+        return dict, (dict(obj),)
+    if isinstance(obj, HashedList):
+        return list, (list(obj),)
+    if isinstance(obj, HashedBitSet):
+        return _restore_bitset, (obj.interner.kind, tuple(obj))
+    return NotImplemented
+
+
+def _fold(value) -> int:
+    """Helper: XOR of keys of all hashed items inside the attached value."""
+    zobrist = ZobristHash()
+    if isinstance(value, Hashed):
+        for name, field in value._hashed_fields():
+            if isinstance(field, _TRACKED):
+                zobrist.value ^= _fold(field)
+            else:
+                zobrist.toggle(value._scope, name, field)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            zobrist.toggle(value._scope, key, item)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            zobrist.toggle(value._scope, i, item)
+    else:
+        for name in value:
+            zobrist.toggle(value._scope, name, True)
+    return zobrist.value
+
+
+def _attach_object(zobrist: ZobristHash, obj: Hashed, scope: str) -> None:
+    """Helper: add all fields of the object to the hash and start hashing its changes."""
+    if not isinstance(obj, _Tracking):
+        tracked = _tracking_class(type(obj))
+        for name, _ in obj._fields():
+            tracked._field_names.setdefault(name)
+        obj.__class__ = tracked
+    obj._field_names.setdefault('_scope')
+    obj._field_names.setdefault('_zobrist')
+    obj._field_names.setdefault('_bases')
+    object.__setattr__(obj, '_scope', scope)
+    bases = {}
+    for name, value in list(obj._hashed_fields()):
+        bases[name] = _field_base(scope, name)
+        object.__setattr__(obj, name, _attach(zobrist, value, scope, name))
+    object.__setattr__(obj, '_bases', bases)
+    object.__setattr__(obj, '_zobrist', zobrist)
+
+
+def _attach(zobrist: ZobristHash, value, scope: str, name: str):
+    """
+    Helper: add the field value to the hash.
+
+    :return: the value to store in the field (hashed version of containers).
+    """
+    inner = f'{scope}.{name}'
+    if isinstance(value, Hashed):
+        _attach_object(zobrist, value, inner)
+        return value
+
+    if isinstance(value, BitSet):
+        if not isinstance(value, HashedBitSet):
+            hashed = HashedBitSet(value.interner)
+            hashed.bits = value.bits
+            value = hashed
+    elif isinstance(value, dict):
+        value = HashedDict(value)
+    elif isinstance(value, list):
+        value = HashedList(value)
+    else:
+        zobrist.toggle(scope, name, value)
+        return value
+
+    value._scope = inner
+    value._zobrist = None
+    zobrist.value ^= _fold(value)
+    value._zobrist = zobrist
+    return value
+
+
+def _detach(zobrist: ZobristHash, value, scope: str, name: str) -> None:
+    """Helper: remove the old field value from the hash before it is replaced."""
+    if isinstance(value, _TRACKED):
+        zobrist.value ^= _fold(value)
+        _forget(value)
+    else:
+        zobrist.toggle(scope, name, value)
+
+
+def _forget(value) -> None:
+    """Helper: stop hashing changes of the value which is not a part of the state anymore."""
+    if isinstance(value, Hashed):
+        object.__setattr__(value, '_zobrist', None)
+        object.__setattr__(value, '_bases', {})
+        for _, item in value._hashed_fields():
+            _forget(item)
+    elif isinstance(value, _TRACKED):
+        value._zobrist = None
+
+
+_TRACKED = (Hashed, HashedDict, HashedList, HashedBitSet)
+
+
+def assign_fields(target: Hashed, source: Hashed) -> None:
+    """
+    Make fields of the target equal to fields of the source.
+
+    Nested objects and BitSets are updated in place and equal values are skipped,
+    so a tracked target pays only for the fields which differ.
+    """
+    for name, value in source._fields():
+        if name[0] == '_':
+            continue
+        current = getattr(target, name, _MISSING)
+        if current is value:
+            continue
+        if isinstance(current, Hashed) and isinstance(value, Hashed) and \
+                current._hashed_base() is value._hashed_base():
+            assign_fields(current, value)
+        elif isinstance(current, BitSet) and isinstance(value, BitSet) and current.interner is value.interner:
+            current.bits = value.bits
+        elif type(current) is not type(value) or current != value:
+            setattr(target, name, value)
+
+
+def track(obj: Hashed, scope: str = 'state') -> ZobristHash:
+    """
+    Start incremental hashing of the object (usually GameState).
+
+    The first hash is computed from scratch, then it follows changes in O(1).
+
+    :return: the hash, its value follows all later changes of the object.
+    """
+    zobrist = ZobristHash()
+    _attach_object(zobrist, obj, scope)
+    return zobrist
+
+
+def full_hash(obj: Hashed) -> int:
+    """Hash of the tracked object computed from scratch (to check the incremental one)."""
+    return _fold(obj)